@@ -1,10 +1,27 @@
+import os
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from .utils import verify_token
 from ..database.supabase import supabase_client
+from ..services.cache import TTLCache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
 
+# Profiles of recently authenticated users, keyed and tagged by token
+# subject, so protected endpoints skip the profiles lookup. Profile changes
+# made through the API invalidate the entry (and keep lookups that overlap
+# the change from caching the old profile); others show up within the TTL.
+AUTH_PRINCIPAL_CACHE_SIZE = int(os.getenv("AUTH_PRINCIPAL_CACHE_SIZE", "10000"))
+AUTH_PRINCIPAL_CACHE_TTL = float(os.getenv("AUTH_PRINCIPAL_CACHE_TTL", "60"))
+
+principal_cache = TTLCache(maxsize=AUTH_PRINCIPAL_CACHE_SIZE, ttl=AUTH_PRINCIPAL_CACHE_TTL)
+# Profile columns never handed to endpoints or kept in the cache
+SECRET_PROFILE_COLUMNS = frozenset({"password_hash"})
+
+def invalidate_principal(user_id: str):
+    """Drop a user's cached profile after it changes"""
+    principal_cache.invalidate([str(user_id)])
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     """Get current authenticated user"""
     credentials_exception = HTTPException(
@@ -21,12 +38,19 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     except Exception:
         raise credentials_exception
         
-    user = supabase_client.table('profiles').select('*').eq('id', user_id).single().execute()
+    cached = principal_cache.get(str(user_id))
+    if cached is not None:
+        return cached
+    generation = principal_cache.generation()
+
+    user = await supabase_client.table('profiles').select('*').eq('id', user_id).single().execute()
     
     if not user.data:
         raise credentials_exception
-        
-    return user.data
+
+    principal = {column: value for column, value in user.data.items() if column not in SECRET_PROFILE_COLUMNS}
+    principal_cache.set(str(user_id), principal, tags=(str(user_id),), generation=generation)
+    return principal
 
 async def get_current_active_user(current_user = Depends(get_current_user)):
     """Get current active user"""
@@ -0,0 +1,205 @@
+import json
+import re
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from .postgrest import AsyncPostgrestClient
+
+
+def _split_top_level(text: str, separator: str = ",") -> List[str]:
+    """Split on separator outside quotes, parentheses and braces"""
+    parts, depth, quoted, current = [], 0, False, []
+    for i, char in enumerate(text):
+        if char == '"' and (i == 0 or text[i - 1] != "\\"):
+            quoted = not quoted
+        elif not quoted and char in "({":
+            depth += 1
+        elif not quoted and char in ")}":
+            depth -= 1
+        elif not quoted and depth == 0 and char == separator:
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    parts.append("".join(current))
+    return parts
+
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    return value
+
+
+def _like(pattern: str, flags: int = 0) -> "re.Pattern":
+    regex = "".join(".*" if c in "%*" else "." if c == "_" else re.escape(c) for c in pattern)
+    return re.compile(f"^{regex}$", flags | re.DOTALL)
+
+
+def _coerce(raw: str, like: Any) -> Any:
+    """Convert a filter argument to the type of the column value it is compared with"""
+    if isinstance(like, bool):
+        return raw.lower() == "true"
+    if isinstance(like, (int, float)):
+        return float(raw)
+    return raw
+
+
+def _matches(row: Dict, column: str, expression: str) -> bool:
+    operator, _, argument = expression.partition(".")
+    negate = operator == "not"
+    if negate:
+        operator, _, argument = argument.partition(".")
+    value = row.get(column)
+
+    if operator == "is":
+        result = value is None if argument == "null" else value == (argument == "true")
+    elif operator == "in":
+        options = [_unquote(v) for v in _split_top_level(argument[1:-1])]
+        result = value is not None and str(value) in options
+    elif operator == "cs":
+        wanted = [_unquote(v) for v in _split_top_level(argument[1:-1]) if v]
+        result = isinstance(value, list) and all(w in value for w in wanted)
+    elif operator in ("like", "ilike"):
+        pattern = _like(argument, re.IGNORECASE if operator == "ilike" else 0)
+        result = value is not None and bool(pattern.match(str(value)))
+    elif value is None:
+        result = False
+    else:
+        target = _coerce(argument, value)
+        current = float(value) if isinstance(target, float) else value if isinstance(target, bool) else str(value)
+        result = {
+            "eq": current == target,
+            "neq": current != target,
+            "gt": current > target,
+            "gte": current >= target,
+            "lt": current < target,
+            "lte": current <= target
+        }[operator]
+    return not result if negate else result
+
+
+def _matches_or(row: Dict, expression: str) -> bool:
+    for condition in _split_top_level(expression[1:-1]):
+        column, _, rest = condition.strip().partition(".")
+        if _matches(row, column, rest):
+            return True
+    return False
+
+
+class InMemoryPostgrest:
+    """
+    In-process stand-in for PostgREST, for exercising the data access layer
+    without a database.
+
+    Serves the subset of the PostgREST API the routes use: column selection,
+    eq/neq/gt/gte/lt/lte/in/cs/like/ilike/is filters (and not./or=),
+    order, limit/offset, single-object responses, exact counts,
+    insert/upsert/update/delete and rpc calls to registered Python
+    functions. Embedded resources and filters on them are ignored.
+
+        fake = InMemoryPostgrest({"faculty": [...]})
+        client = fake.client()
+    """
+
+    def __init__(self, tables: Optional[Dict[str, List[Dict]]] = None):
+        self.tables: Dict[str, List[Dict]] = {name: [dict(row) for row in rows] for name, rows in (tables or {}).items()}
+        self.functions: Dict[str, Callable[[Dict, "InMemoryPostgrest"], Any]] = {}
+        self.requests: List[httpx.Request] = []
+
+    def client(self, **kwargs) -> AsyncPostgrestClient:
+        return AsyncPostgrestClient("http://postgrest.test", transport=httpx.MockTransport(self.handle), **kwargs)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        path = request.url.path.strip("/")
+        body = json.loads(request.content) if request.content else None
+        if path.startswith("rpc/"):
+            function = self.functions.get(path[4:])
+            if function is None:
+                return self._error(404, f"Could not find the function {path[4:]}", "PGRST202")
+            return httpx.Response(200, json=function(body or {}, self))
+
+        rows = self.tables.setdefault(path, [])
+        params = list(request.url.params.multi_items())
+        prefer = request.headers.get("prefer", "")
+
+        if request.method == "POST":
+            return self._write_response(request, self._insert(rows, body, params, prefer))
+
+        selected = [row for row in rows if self._row_matches(row, params)]
+        if request.method == "PATCH":
+            for row in selected:
+                row.update(body or {})
+            return self._write_response(request, selected)
+        if request.method == "DELETE":
+            self.tables[path] = [row for row in rows if row not in selected]
+            return self._write_response(request, selected)
+        return self._read_response(request, selected, params, prefer)
+
+    def _row_matches(self, row: Dict, params: List[Tuple[str, str]]) -> bool:
+        for key, expression in params:
+            if key in ("select", "order", "limit", "offset", "on_conflict", "columns") or "." in key:
+                continue
+            if key == "or":
+                if not _matches_or(row, expression):
+                    return False
+            elif not _matches(row, key, expression):
+                return False
+        return True
+
+    def _insert(self, rows: List[Dict], body: Any, params: List[Tuple[str, str]], prefer: str) -> List[Dict]:
+        new_rows = body if isinstance(body, list) else [body]
+        conflict = dict(params).get("on_conflict", "id").split(",")
+        written = []
+        for new_row in new_rows:
+            existing = None
+            if "resolution=" in prefer:
+                existing = next((r for r in rows if all(k in new_row and r.get(k) == new_row[k] for k in conflict)), None)
+            if existing is not None:
+                if "resolution=merge-duplicates" in prefer:
+                    existing.update(new_row)
+                written.append(existing)
+                continue
+            row = dict(new_row)
+            row.setdefault("id", str(uuid.uuid4()))
+            rows.append(row)
+            written.append(row)
+        return written
+
+    def _project(self, row: Dict, params: List[Tuple[str, str]]) -> Dict:
+        columns = dict(params).get("select", "*")
+        names = [c for c in _split_top_level(columns) if c and "(" not in c]
+        if "*" in names or not names:
+            return dict(row)
+        return {name.split(":")[-1]: row.get(name.split(":")[-1]) for name in names}
+
+    def _read_response(self, request: httpx.Request, rows: List[Dict], params: List[Tuple[str, str]], prefer: str) -> httpx.Response:
+        options = dict(params)
+        for clause in reversed(options.get("order", "").split(",") if options.get("order") else []):
+            column, _, direction = clause.partition(".")
+            rows = sorted(rows, key=lambda r: (r.get(column) is None, r.get(column)), reverse=direction.startswith("desc"))
+        total = len(rows)
+        offset = int(options.get("offset", 0))
+        limit = int(options["limit"]) if "limit" in options else None
+        rows = rows[offset:offset + limit if limit is not None else None]
+
+        headers = {}
+        if "count=exact" in prefer:
+            headers["Content-Range"] = f"{offset}-{offset + max(len(rows) - 1, 0)}/{total}"
+        data = [self._project(row, params) for row in rows]
+        if "vnd.pgrst.object" in request.headers.get("accept", ""):
+            if len(data) != 1:
+                return self._error(406, "JSON object requested, multiple (or no) rows returned", "PGRST116")
+            return httpx.Response(200, json=data[0], headers=headers)
+        return httpx.Response(200, json=data, headers=headers)
+
+    def _write_response(self, request: httpx.Request, rows: List[Dict]) -> httpx.Response:
+        if "return=representation" not in request.headers.get("prefer", ""):
+            return httpx.Response(204)
+        return httpx.Response(201 if request.method == "POST" else 200, json=[dict(row) for row in rows])
+
+    def _error(self, status_code: int, message: str, code: str) -> httpx.Response:
+        return httpx.Response(status_code, json={"message": message, "code": code, "details": None, "hint": None})
@@ -0,0 +1,72 @@
+-- Ranked full-text search over the weighted full_text columns.
+-- Each function matches with websearch_to_tsquery (served by the GIN
+-- indexes from 001), applies the optional filters, and returns the ids of
+-- the best matches ordered by ts_rank_cd. The API hydrates those ids.
+-- Function bodies avoid inner semicolons so setup_db.py can split on them.
+
+create or replace function search_faculty_ranked(
+    search_query text,
+    result_limit integer default 10,
+    departments text[] default null,
+    institution_patterns text[] default null,
+    domains text[] default null,
+    cities text[] default null,
+    states text[] default null
+)
+returns table (id uuid, rank real)
+language sql stable
+as $$
+    select f.id, ts_rank_cd(f.full_text, q) as rank
+    from faculty f, websearch_to_tsquery('english', search_query) q
+    where f.full_text @@ q
+      and (departments is null or f.department = any(departments))
+      and (institution_patterns is null or f.institution ilike any(institution_patterns))
+      and (domains is null or f.expertise @> domains)
+      and (cities is null or f.city = any(cities))
+      and (states is null or f.state = any(states))
+    order by rank desc, f.id
+    limit result_limit
+$$;
+
+create or replace function search_publications_ranked(
+    search_query text,
+    result_limit integer default 10,
+    departments text[] default null,
+    institution_patterns text[] default null,
+    domains text[] default null
+)
+returns table (id uuid, rank real)
+language sql stable
+as $$
+    select p.id, ts_rank_cd(p.full_text, q) as rank
+    from publications p, websearch_to_tsquery('english', search_query) q
+    where p.full_text @@ q
+      and (domains is null or p.research_domains @> domains)
+      and (
+          (departments is null and institution_patterns is null)
+          or exists (
+              select 1
+              from faculty_publications fp
+              join faculty f on f.id = fp.faculty_id
+              where fp.publication_id = p.id
+                and (departments is null or f.department = any(departments))
+                and (institution_patterns is null or f.institution ilike any(institution_patterns))
+          )
+      )
+    order by rank desc, p.id
+    limit result_limit
+$$;
+
+create or replace function search_research_works_ranked(
+    search_query text,
+    result_limit integer default 10
+)
+returns table (id uuid, rank real)
+language sql stable
+as $$
+    select r.id, ts_rank_cd(r.full_text, q) as rank
+    from research_works r, websearch_to_tsquery('english', search_query) q
+    where r.full_text @@ q
+    order by rank desc, r.id
+    limit result_limit
+$$;
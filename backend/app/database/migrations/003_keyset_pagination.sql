@@ -0,0 +1,101 @@
+-- Keyset pagination for the ranked full-text search functions from 002.
+-- Results are ordered by (rank desc, id), so a page resumes strictly after
+-- the (after_rank, after_id) of the last row the client saw instead of
+-- skipping rows with OFFSET. Both arguments null means the first page.
+-- The 002 signatures are dropped first so PostgREST does not see two
+-- overloads of the same function.
+
+drop function if exists search_faculty_ranked(text, integer, text[], text[], text[], text[], text[]);
+drop function if exists search_publications_ranked(text, integer, text[], text[], text[]);
+drop function if exists search_research_works_ranked(text, integer);
+
+create or replace function search_faculty_ranked(
+    search_query text,
+    result_limit integer default 10,
+    departments text[] default null,
+    institution_patterns text[] default null,
+    domains text[] default null,
+    cities text[] default null,
+    states text[] default null,
+    after_rank real default null,
+    after_id uuid default null
+)
+returns table (id uuid, rank real)
+language sql stable
+as $$
+    select ranked.id, ranked.rank
+    from (
+        select f.id, ts_rank_cd(f.full_text, q) as rank
+        from faculty f, websearch_to_tsquery('english', search_query) q
+        where f.full_text @@ q
+          and (departments is null or f.department = any(departments))
+          and (institution_patterns is null or f.institution ilike any(institution_patterns))
+          and (domains is null or f.expertise @> domains)
+          and (cities is null or f.city = any(cities))
+          and (states is null or f.state = any(states))
+    ) ranked
+    where after_rank is null
+       or ranked.rank < after_rank
+       or (ranked.rank = after_rank and ranked.id > after_id)
+    order by ranked.rank desc, ranked.id
+    limit result_limit
+$$;
+
+create or replace function search_publications_ranked(
+    search_query text,
+    result_limit integer default 10,
+    departments text[] default null,
+    institution_patterns text[] default null,
+    domains text[] default null,
+    after_rank real default null,
+    after_id uuid default null
+)
+returns table (id uuid, rank real)
+language sql stable
+as $$
+    select ranked.id, ranked.rank
+    from (
+        select p.id, ts_rank_cd(p.full_text, q) as rank
+        from publications p, websearch_to_tsquery('english', search_query) q
+        where p.full_text @@ q
+          and (domains is null or p.research_domains @> domains)
+          and (
+              (departments is null and institution_patterns is null)
+              or exists (
+                  select 1
+                  from faculty_publications fp
+                  join faculty f on f.id = fp.faculty_id
+                  where fp.publication_id = p.id
+                    and (departments is null or f.department = any(departments))
+                    and (institution_patterns is null or f.institution ilike any(institution_patterns))
+              )
+          )
+    ) ranked
+    where after_rank is null
+       or ranked.rank < after_rank
+       or (ranked.rank = after_rank and ranked.id > after_id)
+    order by ranked.rank desc, ranked.id
+    limit result_limit
+$$;
+
+create or replace function search_research_works_ranked(
+    search_query text,
+    result_limit integer default 10,
+    after_rank real default null,
+    after_id uuid default null
+)
+returns table (id uuid, rank real)
+language sql stable
+as $$
+    select ranked.id, ranked.rank
+    from (
+        select r.id, ts_rank_cd(r.full_text, q) as rank
+        from research_works r, websearch_to_tsquery('english', search_query) q
+        where r.full_text @@ q
+    ) ranked
+    where after_rank is null
+       or ranked.rank < after_rank
+       or (ranked.rank = after_rank and ranked.id > after_id)
+    order by ranked.rank desc, ranked.id
+    limit result_limit
+$$;
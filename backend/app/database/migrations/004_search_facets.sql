@@ -0,0 +1,57 @@
+-- Per-facet hit counts for a faculty search, in one aggregated pass.
+-- Matches faculty the same way search_all does (full-text or ILIKE),
+-- then unpivots each match into one (facet, value) row per facet and
+-- groups them. Counts are disjunctive: each facet is counted with every
+-- filter applied except its own, so selecting a department still shows
+-- how many hits the other departments would give.
+
+create or replace function search_faculty_facets(
+    search_query text,
+    use_fulltext boolean default true,
+    departments text[] default null,
+    institution_patterns text[] default null,
+    domains text[] default null,
+    cities text[] default null,
+    states text[] default null
+)
+returns table (facet text, value text, hits bigint)
+language sql stable
+as $$
+    with matched as (
+        select
+            f.department,
+            f.institution,
+            f.city,
+            f.state,
+            f.expertise,
+            (departments is null or f.department = any(departments)) as in_department,
+            (institution_patterns is null or f.institution ilike any(institution_patterns)) as in_institution,
+            (domains is null or f.expertise @> domains) as in_domain,
+            (cities is null or f.city = any(cities)) as in_city,
+            (states is null or f.state = any(states)) as in_state
+        from faculty f
+        where (use_fulltext and f.full_text @@ websearch_to_tsquery('english', search_query))
+           or (not use_fulltext and (
+                f.name ilike '%' || search_query || '%'
+                or f.department ilike '%' || search_query || '%'
+                or f.institution ilike '%' || search_query || '%'
+                or f.expertise @> array[search_query]
+           ))
+    )
+    select v.facet, v.value, count(*) filter (where v.included) as hits
+    from matched m
+    cross join lateral (
+        values
+            ('departments', m.department, m.in_institution and m.in_domain and m.in_city and m.in_state),
+            ('institutions', m.institution, m.in_department and m.in_domain and m.in_city and m.in_state),
+            ('cities', m.city, m.in_department and m.in_institution and m.in_domain and m.in_state),
+            ('states', m.state, m.in_department and m.in_institution and m.in_domain and m.in_city)
+        union all
+        select 'domains', d, m.in_department and m.in_institution and m.in_city and m.in_state
+        from unnest(coalesce(m.expertise, '{}')) d
+    ) v (facet, value, included)
+    where v.value is not null and v.value <> ''
+    group by v.facet, v.value
+    having count(*) filter (where v.included) > 0
+    order by v.facet, hits desc, v.value
+$$;
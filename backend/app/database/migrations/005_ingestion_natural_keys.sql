@@ -0,0 +1,79 @@
+-- Natural keys for bulk ingestion. The scraper pipeline upserts faculty,
+-- publications and authorship links in chunks and resolves conflicts on
+-- these unique indexes instead of primary keys it does not know yet.
+-- Rows duplicated by earlier per-row ingestion are merged first (the
+-- oldest row of each key is kept and links are moved onto it), so the
+-- unique indexes can be created on existing data.
+
+alter table publications add column if not exists dedupe_key text;
+
+-- DOI when known, otherwise normalized title plus year (see
+-- app/services/ingestion.py publication_key)
+update publications
+set dedupe_key = case
+    when coalesce(trim(doi), '') <> '' then 'doi:' || lower(trim(doi))
+    else 'title:' || trim(regexp_replace(lower(title), '[^0-9a-z]+', ' ', 'g')) || ':' || coalesce(year::text, '')
+end
+where dedupe_key is null;
+
+-- Drop links that would repeat once duplicate faculty and publications are
+-- folded into their kept row, preferring a link that already points there
+delete from faculty_publications fp
+using (
+    select l.ctid as link_ctid,
+           row_number() over (
+               partition by coalesce(f.keep_id, l.faculty_id), coalesce(p.keep_id, l.publication_id)
+               order by (l.faculty_id = coalesce(f.keep_id, l.faculty_id)
+                         and l.publication_id = coalesce(p.keep_id, l.publication_id)) desc
+           ) as copy
+    from faculty_publications l
+    left join (
+        select id, first_value(id) over (partition by name, department order by created_at, id) as keep_id
+        from faculty
+        where department is not null
+    ) f on f.id = l.faculty_id
+    left join (
+        select id, first_value(id) over (partition by dedupe_key order by created_at, id) as keep_id
+        from publications
+        where dedupe_key is not null
+    ) p on p.id = l.publication_id
+) d
+where fp.ctid = d.link_ctid and d.copy > 1;
+
+update faculty_publications l
+set faculty_id = f.keep_id
+from (
+    select id, first_value(id) over (partition by name, department order by created_at, id) as keep_id
+    from faculty
+    where department is not null
+) f
+where l.faculty_id = f.id and f.id <> f.keep_id;
+
+update faculty_publications l
+set publication_id = p.keep_id
+from (
+    select id, first_value(id) over (partition by dedupe_key order by created_at, id) as keep_id
+    from publications
+    where dedupe_key is not null
+) p
+where l.publication_id = p.id and p.id <> p.keep_id;
+
+delete from faculty f
+using (
+    select id, row_number() over (partition by name, department order by created_at, id) as copy
+    from faculty
+    where department is not null
+) d
+where f.id = d.id and d.copy > 1;
+
+delete from publications p
+using (
+    select id, row_number() over (partition by dedupe_key order by created_at, id) as copy
+    from publications
+    where dedupe_key is not null
+) d
+where p.id = d.id and d.copy > 1;
+
+create unique index if not exists faculty_natural_key_idx on faculty (name, department);
+create unique index if not exists publications_dedupe_key_idx on publications (dedupe_key);
+create unique index if not exists faculty_publications_link_idx on faculty_publications (faculty_id, publication_id);
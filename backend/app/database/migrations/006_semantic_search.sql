@@ -0,0 +1,95 @@
+-- Semantic search over publications and faculty with pgvector (the
+-- extension is enabled in 001). Embeddings are 384-d sentence vectors
+-- (all-MiniLM-L6-v2, see app/ml/embeddings.py) written by ingestion and
+-- compared by cosine distance.
+--
+-- HNSW rather than IVFFlat: it needs no training pass over existing rows,
+-- so the index can be created on an empty table and stays accurate as
+-- ingestion adds rows. hnsw.ef_search is set per call from the API.
+
+alter table publications add column if not exists embedding vector(384);
+alter table faculty add column if not exists embedding vector(384);
+
+create index if not exists publications_embedding_hnsw_idx
+    on publications using hnsw (embedding vector_cosine_ops) with (m = 16, ef_construction = 64);
+create index if not exists faculty_embedding_hnsw_idx
+    on faculty using hnsw (embedding vector_cosine_ops) with (m = 16, ef_construction = 64);
+
+-- Approximate nearest neighbours of query_embedding. With text_weight > 0
+-- the candidates are re-scored as a blend of cosine similarity and the
+-- full-text rank of query_text (normalized to [0, 1) by ts_rank_cd flag 32).
+-- Candidates are over-fetched so blending can promote rows past the first
+-- match_count neighbours.
+create or replace function match_publications(
+    query_embedding vector(384),
+    match_count integer default 10,
+    query_text text default null,
+    text_weight real default 0,
+    min_similarity real default 0,
+    ef_search integer default 40
+)
+returns table (id uuid, similarity real, text_rank real, score real)
+language plpgsql
+as $$
+#variable_conflict use_column
+begin
+    perform set_config('hnsw.ef_search', ef_search::text, true);
+    return query
+    with candidates as (
+        select p.id, p.full_text, (1 - (p.embedding <=> query_embedding))::real as similarity
+        from publications p
+        where p.embedding is not null
+        order by p.embedding <=> query_embedding
+        limit greatest(match_count * 4, 40)
+    ), scored as (
+        select c.id, c.similarity,
+               case when query_text is null or text_weight = 0 then 0::real
+                    else ts_rank_cd(c.full_text, websearch_to_tsquery('english', query_text), 32)::real
+               end as text_rank
+        from candidates c
+    )
+    select s.id, s.similarity, s.text_rank,
+           ((1 - text_weight) * s.similarity + text_weight * s.text_rank)::real as score
+    from scored s
+    where s.similarity >= min_similarity
+    order by 4 desc, 1
+    limit match_count;
+end;
+$$;
+
+create or replace function match_faculty(
+    query_embedding vector(384),
+    match_count integer default 10,
+    query_text text default null,
+    text_weight real default 0,
+    min_similarity real default 0,
+    ef_search integer default 40
+)
+returns table (id uuid, similarity real, text_rank real, score real)
+language plpgsql
+as $$
+#variable_conflict use_column
+begin
+    perform set_config('hnsw.ef_search', ef_search::text, true);
+    return query
+    with candidates as (
+        select f.id, f.full_text, (1 - (f.embedding <=> query_embedding))::real as similarity
+        from faculty f
+        where f.embedding is not null
+        order by f.embedding <=> query_embedding
+        limit greatest(match_count * 4, 40)
+    ), scored as (
+        select c.id, c.similarity,
+               case when query_text is null or text_weight = 0 then 0::real
+                    else ts_rank_cd(c.full_text, websearch_to_tsquery('english', query_text), 32)::real
+               end as text_rank
+        from candidates c
+    )
+    select s.id, s.similarity, s.text_rank,
+           ((1 - text_weight) * s.similarity + text_weight * s.text_rank)::real as score
+    from scored s
+    where s.similarity >= min_similarity
+    order by 4 desc, 1
+    limit match_count;
+end;
+$$;
@@ -0,0 +1,19 @@
+-- Precomputed "similar publications" and "similar experts" lists. Each row
+-- holds an item's top-k neighbours by embedding similarity, best first,
+-- computed in batch (scripts/build_neighbors.py) and refreshed by
+-- ingestion for the items a batch affects (app/services/neighbors.py).
+-- A lookup is one primary-key read plus one read of the k neighbours.
+
+create table if not exists publication_neighbors (
+    publication_id uuid primary key references publications(id) on delete cascade,
+    neighbor_ids uuid[] not null default '{}',
+    similarities real[] not null default '{}',
+    computed_at timestamp with time zone default now()
+);
+
+create table if not exists faculty_neighbors (
+    faculty_id uuid primary key references faculty(id) on delete cascade,
+    neighbor_ids uuid[] not null default '{}',
+    similarities real[] not null default '{}',
+    computed_at timestamp with time zone default now()
+);
@@ -0,0 +1,29 @@
+-- Aggregates behind /api/analytics/research. The API reads these few
+-- grouped rows instead of every research_trends and faculty row, and
+-- caches the assembled response until ingestion changes the data.
+
+create or replace view analytics_publication_trends as
+select year,
+       coalesce(sum(publication_count), 0)::bigint as publications,
+       coalesce(sum(citation_count), 0)::bigint as citations
+from research_trends
+where year is not null
+group by year
+order by year;
+
+create or replace view analytics_department_stats as
+select department,
+       count(*) as faculty_count,
+       coalesce(sum(citations), 0)::bigint as citations
+from faculty
+where department is not null and department <> ''
+group by department
+order by department;
+
+create or replace view analytics_metrics as
+select (select coalesce(sum(citations), 0) from faculty)::bigint as total_citations,
+       (select coalesce(avg(coalesce(h_index, 0)), 0) from faculty)::real as average_h_index,
+       (select count(*) from faculty) as total_faculty,
+       (select coalesce(sum(publication_count), 0) from research_trends)::bigint as total_publications;
+
+create index if not exists research_trends_trending_score_idx on research_trends (trending_score desc);
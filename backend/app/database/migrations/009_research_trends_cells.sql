@@ -0,0 +1,20 @@
+-- research_trends is produced by the trend engine (app/services/trends.py),
+-- one row per research domain and period. Publications only carry a year,
+-- so the engine writes whole-year cells with quarter = 0. Ingestion upserts
+-- the cells a batch changes on (topic, year, quarter).
+
+-- Rows the engine wrote; it only ever deletes these, so trend data loaded
+-- from elsewhere is left alone
+alter table research_trends add column if not exists computed boolean not null default false;
+
+-- Keep the most recently updated row of each cell so the unique index can
+-- be created on existing data
+delete from research_trends t
+using (
+    select id, row_number() over (partition by topic, year, quarter order by updated_at desc nulls last, id desc) as copy
+    from research_trends
+) d
+where t.id = d.id and d.copy > 1;
+
+create unique index if not exists research_trends_topic_period_key
+    on research_trends (topic, year, quarter);
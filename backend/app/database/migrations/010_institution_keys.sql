@@ -0,0 +1,138 @@
+-- Institution filters match a stored key instead of ILIKE patterns over
+-- every alias, so they agree with how search results name institutions.
+-- faculty.institution_key is the normalized canonical name of a registered
+-- institution (app/data/institution_aliases.json), or the normalized name
+-- itself otherwise. The backfill here only normalizes; run
+-- scripts/build_institution_keys.py afterwards to resolve aliases.
+
+alter table faculty add column if not exists institution_key text;
+
+update faculty
+set institution_key = nullif(trim(regexp_replace(lower(institution), '[^0-9a-z]+', ' ', 'g')), '')
+where institution_key is null and institution is not null;
+
+create index if not exists faculty_institution_key_idx on faculty (institution_key);
+
+drop function if exists search_faculty_ranked(text, integer, text[], text[], text[], text[], text[], real, uuid);
+drop function if exists search_publications_ranked(text, integer, text[], text[], text[], real, uuid);
+drop function if exists search_faculty_facets(text, boolean, text[], text[], text[], text[], text[]);
+
+create or replace function search_faculty_ranked(
+    search_query text,
+    result_limit integer default 10,
+    departments text[] default null,
+    institution_keys text[] default null,
+    domains text[] default null,
+    cities text[] default null,
+    states text[] default null,
+    after_rank real default null,
+    after_id uuid default null
+)
+returns table (id uuid, rank real)
+language sql stable
+as $$
+    select ranked.id, ranked.rank
+    from (
+        select f.id, ts_rank_cd(f.full_text, q) as rank
+        from faculty f, websearch_to_tsquery('english', search_query) q
+        where f.full_text @@ q
+          and (departments is null or f.department = any(departments))
+          and (institution_keys is null or f.institution_key = any(institution_keys))
+          and (domains is null or f.expertise @> domains)
+          and (cities is null or f.city = any(cities))
+          and (states is null or f.state = any(states))
+    ) ranked
+    where after_rank is null
+       or ranked.rank < after_rank
+       or (ranked.rank = after_rank and ranked.id > after_id)
+    order by ranked.rank desc, ranked.id
+    limit result_limit
+$$;
+
+create or replace function search_publications_ranked(
+    search_query text,
+    result_limit integer default 10,
+    departments text[] default null,
+    institution_keys text[] default null,
+    domains text[] default null,
+    after_rank real default null,
+    after_id uuid default null
+)
+returns table (id uuid, rank real)
+language sql stable
+as $$
+    select ranked.id, ranked.rank
+    from (
+        select p.id, ts_rank_cd(p.full_text, q) as rank
+        from publications p, websearch_to_tsquery('english', search_query) q
+        where p.full_text @@ q
+          and (domains is null or p.research_domains @> domains)
+          and (
+              (departments is null and institution_keys is null)
+              or exists (
+                  select 1
+                  from faculty_publications fp
+                  join faculty f on f.id = fp.faculty_id
+                  where fp.publication_id = p.id
+                    and (departments is null or f.department = any(departments))
+                    and (institution_keys is null or f.institution_key = any(institution_keys))
+              )
+          )
+    ) ranked
+    where after_rank is null
+       or ranked.rank < after_rank
+       or (ranked.rank = after_rank and ranked.id > after_id)
+    order by ranked.rank desc, ranked.id
+    limit result_limit
+$$;
+
+create or replace function search_faculty_facets(
+    search_query text,
+    use_fulltext boolean default true,
+    departments text[] default null,
+    institution_keys text[] default null,
+    domains text[] default null,
+    cities text[] default null,
+    states text[] default null
+)
+returns table (facet text, value text, hits bigint)
+language sql stable
+as $$
+    with matched as (
+        select
+            f.department,
+            f.institution,
+            f.city,
+            f.state,
+            f.expertise,
+            (departments is null or f.department = any(departments)) as in_department,
+            (institution_keys is null or f.institution_key = any(institution_keys)) as in_institution,
+            (domains is null or f.expertise @> domains) as in_domain,
+            (cities is null or f.city = any(cities)) as in_city,
+            (states is null or f.state = any(states)) as in_state
+        from faculty f
+        where (use_fulltext and f.full_text @@ websearch_to_tsquery('english', search_query))
+           or (not use_fulltext and (
+                f.name ilike '%' || search_query || '%'
+                or f.department ilike '%' || search_query || '%'
+                or f.institution ilike '%' || search_query || '%'
+                or f.expertise @> array[search_query]
+           ))
+    )
+    select v.facet, v.value, count(*) filter (where v.included) as hits
+    from matched m
+    cross join lateral (
+        values
+            ('departments', m.department, m.in_institution and m.in_domain and m.in_city and m.in_state),
+            ('institutions', m.institution, m.in_department and m.in_domain and m.in_city and m.in_state),
+            ('cities', m.city, m.in_department and m.in_institution and m.in_domain and m.in_state),
+            ('states', m.state, m.in_department and m.in_institution and m.in_domain and m.in_city)
+        union all
+        select 'domains', d, m.in_department and m.in_institution and m.in_city and m.in_state
+        from unnest(coalesce(m.expertise, '{}')) d
+    ) v (facet, value, included)
+    where v.value is not null and v.value <> ''
+    group by v.facet, v.value
+    having count(*) filter (where v.included) > 0
+    order by v.facet, hits desc, v.value
+$$;
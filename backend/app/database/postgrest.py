@@ -0,0 +1,301 @@
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DB_POOL_MAX_CONNECTIONS = int(os.getenv("DB_POOL_MAX_CONNECTIONS", "20"))
+DB_POOL_MAX_KEEPALIVE = int(os.getenv("DB_POOL_MAX_KEEPALIVE", "10"))
+DB_KEEPALIVE_EXPIRY = float(os.getenv("DB_KEEPALIVE_EXPIRY", "30"))
+DB_TIMEOUT = float(os.getenv("DB_TIMEOUT", "10"))
+DB_CONNECT_TIMEOUT = float(os.getenv("DB_CONNECT_TIMEOUT", "5"))
+DB_HTTP2 = os.getenv("DB_HTTP2", "true").lower() == "true"
+
+# Characters that force a list element to be double-quoted in PostgREST syntax
+_RESERVED = set(',.:()"\\ {}')
+
+
+def _value(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return str(value).lower()
+    return str(value)
+
+
+def _quote(value: Any) -> str:
+    text = _value(value)
+    if any(c in _RESERVED for c in text):
+        return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+    return text
+
+
+class PostgrestError(Exception):
+    """An error response from PostgREST"""
+
+    def __init__(self, status_code: int, message: str, code: Optional[str] = None, details: Any = None, hint: Any = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+        self.code = code
+        self.details = details
+        self.hint = hint
+
+
+class APIResponse:
+    """Rows returned by a request, plus the total when a count was asked for"""
+
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+    def __repr__(self):
+        return f"APIResponse(data={self.data!r}, count={self.count!r})"
+
+
+class QueryBuilder:
+    """
+    Chainable PostgREST request, mirroring the supabase-py builder.
+
+    Nothing is sent until execute() is awaited.
+    """
+
+    def __init__(self, client: "AsyncPostgrestClient", path: str, method: str = "GET", body: Any = None):
+        self._client = client
+        self._path = path
+        self._method = method
+        self._body = body
+        self._params: List[Tuple[str, str]] = []
+        self._headers: Dict[str, str] = {}
+        self._prefer: List[str] = []
+        self._order: List[str] = []
+        self._negate_next = False
+
+    # Operations
+
+    def select(self, columns: str = "*", count: Optional[str] = None) -> "QueryBuilder":
+        self._params.append(("select", "".join(c for c in columns if not c.isspace())))
+        if count:
+            self._prefer.append(f"count={count}")
+        return self
+
+    def insert(self, rows: Union[Dict, List[Dict]]) -> "QueryBuilder":
+        return self._write("POST", rows)
+
+    def upsert(self, rows: Union[Dict, List[Dict]], on_conflict: Optional[str] = None, ignore_duplicates: bool = False) -> "QueryBuilder":
+        self._write("POST", rows)
+        self._prefer.append("resolution=ignore-duplicates" if ignore_duplicates else "resolution=merge-duplicates")
+        if on_conflict:
+            self._params.append(("on_conflict", on_conflict))
+        return self
+
+    def update(self, values: Dict) -> "QueryBuilder":
+        return self._write("PATCH", values)
+
+    def delete(self) -> "QueryBuilder":
+        return self._write("DELETE", None)
+
+    def _write(self, method: str, body: Any) -> "QueryBuilder":
+        self._method = method
+        self._body = body
+        self._prefer.append("return=representation")
+        if isinstance(body, list) and body:
+            # Bulk writes need a uniform column set across rows
+            columns = sorted({key for row in body for key in row})
+            self._params.append(("columns", ",".join(columns)))
+        return self
+
+    # Filters
+
+    @property
+    def not_(self) -> "QueryBuilder":
+        self._negate_next = True
+        return self
+
+    def filter(self, column: str, operator: str, criteria: str) -> "QueryBuilder":
+        if self._negate_next:
+            self._negate_next = False
+            operator = f"not.{operator}"
+        self._params.append((column, f"{operator}.{criteria}"))
+        return self
+
+    def eq(self, column: str, value: Any) -> "QueryBuilder":
+        return self.filter(column, "eq", _value(value))
+
+    def neq(self, column: str, value: Any) -> "QueryBuilder":
+        return self.filter(column, "neq", _value(value))
+
+    def gt(self, column: str, value: Any) -> "QueryBuilder":
+        return self.filter(column, "gt", _value(value))
+
+    def gte(self, column: str, value: Any) -> "QueryBuilder":
+        return self.filter(column, "gte", _value(value))
+
+    def lt(self, column: str, value: Any) -> "QueryBuilder":
+        return self.filter(column, "lt", _value(value))
+
+    def lte(self, column: str, value: Any) -> "QueryBuilder":
+        return self.filter(column, "lte", _value(value))
+
+    def like(self, column: str, pattern: str) -> "QueryBuilder":
+        return self.filter(column, "like", _value(pattern))
+
+    def ilike(self, column: str, pattern: str) -> "QueryBuilder":
+        return self.filter(column, "ilike", _value(pattern))
+
+    def is_(self, column: str, value: Any) -> "QueryBuilder":
+        return self.filter(column, "is", _value(value))
+
+    def in_(self, column: str, values: Iterable[Any]) -> "QueryBuilder":
+        return self.filter(column, "in", "(" + ",".join(_quote(v) for v in values) + ")")
+
+    def contains(self, column: str, value: Union[List, Dict, str]) -> "QueryBuilder":
+        if isinstance(value, dict):
+            return self.filter(column, "cs", json.dumps(value))
+        if isinstance(value, (list, tuple, set)):
+            return self.filter(column, "cs", "{" + ",".join(_quote(v) for v in value) + "}")
+        return self.filter(column, "cs", str(value))
+
+    def or_(self, filters: str, reference_table: Optional[str] = None) -> "QueryBuilder":
+        key = f"{reference_table}.or" if reference_table else "or"
+        self._params.append((key, f"({filters})"))
+        return self
+
+    # Modifiers
+
+    def order(self, column: str, desc: bool = False, nullsfirst: bool = False, reference_table: Optional[str] = None) -> "QueryBuilder":
+        clause = f"{column}.{'desc' if desc else 'asc'}" + (".nullsfirst" if nullsfirst else "")
+        if reference_table:
+            # Orders the embedded rows within each parent row
+            self._params.append((f"{reference_table}.order", clause))
+        else:
+            self._order.append(clause)
+        return self
+
+    def limit(self, size: int, reference_table: Optional[str] = None) -> "QueryBuilder":
+        # With reference_table, caps the embedded rows per parent row
+        self._params.append((f"{reference_table}.limit" if reference_table else "limit", str(size)))
+        return self
+
+    def range(self, start: int, end: int) -> "QueryBuilder":
+        self._params.append(("offset", str(start)))
+        self._params.append(("limit", str(end - start + 1)))
+        return self
+
+    def single(self) -> "QueryBuilder":
+        self._headers["Accept"] = "application/vnd.pgrst.object+json"
+        return self
+
+    async def execute(self, timeout: Optional[float] = None) -> APIResponse:
+        """
+        Send the request on the shared connection pool
+        Args:
+            timeout: Overrides the client's default timeout for this call
+        """
+        params = list(self._params)
+        if self._order:
+            params.append(("order", ",".join(self._order)))
+        headers = dict(self._headers)
+        if self._prefer:
+            headers["Prefer"] = ",".join(self._prefer)
+        return await self._client.request(self._method, self._path, params, headers, self._body, timeout)
+
+
+class AsyncPostgrestClient:
+    """
+    One pooled, keep-alive HTTP/2 connection set to PostgREST, shared by
+    every route. Pass transport to run against an in-process stand-in.
+    """
+
+    def __init__(
+        self,
+        rest_url: str,
+        api_key: str = "",
+        max_connections: int = DB_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections: int = DB_POOL_MAX_KEEPALIVE,
+        keepalive_expiry: float = DB_KEEPALIVE_EXPIRY,
+        timeout: float = DB_TIMEOUT,
+        connect_timeout: float = DB_CONNECT_TIMEOUT,
+        http2: bool = DB_HTTP2,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        if http2 and transport is None:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("h2 is not installed, falling back to HTTP/1.1 (pip install 'httpx[http2]')")
+                http2 = False
+
+        headers = {"Accept": "application/json", "Content-Type": "application/json"}
+        if api_key:
+            headers["apikey"] = api_key
+            headers["Authorization"] = f"Bearer {api_key}"
+
+        self.rest_url = rest_url.rstrip("/")
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.http2 = http2
+        self._http_options = {
+            "base_url": self.rest_url,
+            "headers": headers,
+            "http2": http2,
+            "limits": self.limits,
+            "timeout": httpx.Timeout(timeout, connect=connect_timeout),
+            "transport": transport
+        }
+        self._http = httpx.AsyncClient(**self._http_options)
+
+    def table(self, name: str) -> QueryBuilder:
+        return QueryBuilder(self, f"/{name}")
+
+    from_ = table
+
+    def rpc(self, function: str, params: Optional[Dict] = None) -> QueryBuilder:
+        return QueryBuilder(self, f"/rpc/{function}", method="POST", body=params or {})
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: List[Tuple[str, str]],
+        headers: Dict[str, str],
+        body: Any = None,
+        timeout: Optional[float] = None
+    ) -> APIResponse:
+        kwargs: Dict[str, Any] = {"params": params, "headers": headers}
+        if body is not None:
+            kwargs["content"] = json.dumps(body, default=str)
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+
+        if self._http.is_closed:
+            # Closed by a previous application shutdown; modules keep this
+            # client for the life of the process, so reopen the pool
+            self._http = httpx.AsyncClient(**self._http_options)
+        response = await self._http.request(method, path, **kwargs)
+        payload = response.json() if response.content else None
+        if response.status_code >= 400:
+            error = payload if isinstance(payload, dict) else {}
+            raise PostgrestError(
+                response.status_code,
+                error.get("message") or response.reason_phrase,
+                error.get("code"),
+                error.get("details"),
+                error.get("hint")
+            )
+
+        count = None
+        content_range = response.headers.get("content-range", "")
+        if "/" in content_range and not content_range.endswith("*"):
+            count = int(content_range.rsplit("/", 1)[1])
+        return APIResponse(payload if payload is not None else [], count)
+
+    async def aclose(self):
+        """Close the pooled connections; the next request opens a new pool"""
+        await self._http.aclose()
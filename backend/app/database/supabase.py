@@ -1,7 +1,8 @@
-from supabase import create_client, Client
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
 import logging
+from .postgrest import AsyncPostgrestClient
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -12,22 +13,29 @@ load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+# Point at a PostgREST server directly (e.g. a local one) instead of Supabase
+POSTGREST_URL = os.getenv("POSTGREST_URL")
 
-if not SUPABASE_URL or not SUPABASE_KEY:
+if not POSTGREST_URL and (not SUPABASE_URL or not SUPABASE_KEY):
     raise ValueError("Missing Supabase credentials. Please check your .env file.")
 
-def get_supabase_client() -> Client:
+@lru_cache()
+def get_supabase_client() -> AsyncPostgrestClient:
     """
-    Get or create a Supabase client instance
+    Get the shared, connection-pooled PostgREST client
     """
-    try:
-        if not SUPABASE_URL or not SUPABASE_KEY:
-            raise ValueError("Supabase credentials not found in environment variables")
-        
-        client = create_client(SUPABASE_URL, SUPABASE_KEY)
-        logger.info("Supabase client initialized successfully")
-        return client
-        
-    except Exception as e:
-        logger.error(f"Failed to initialize Supabase client: {str(e)}")
-        raise
\ No newline at end of file
+    rest_url = POSTGREST_URL or f"{SUPABASE_URL.rstrip('/')}/rest/v1"
+    client = AsyncPostgrestClient(rest_url, SUPABASE_KEY or "")
+    logger.info(f"PostgREST client initialized for {rest_url} (http2={client.http2})")
+    return client
+
+async def close_supabase_client():
+    """
+    Close the pooled connections; called on application shutdown. The
+    client itself stays cached, since routes hold it from import time, and
+    reopens its pool if the application starts again in this process.
+    """
+    if get_supabase_client.cache_info().currsize:
+        await get_supabase_client().aclose()
+
+supabase_client = get_supabase_client()
@@ -1,13 +1,30 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
 from app.routes import search, analytics
+from app.database.supabase import close_supabase_client
+from app.ml.scheduler import stop_schedulers
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The ML stack loads lazily on first use; workers that also classify
+    # can opt in to paying the model load cost before taking traffic
+    if os.getenv("ML_WARMUP", "false").lower() == "true":
+        from app.ml.domain_classifier import warm_up
+        await asyncio.to_thread(warm_up)
+    yield
+    await stop_schedulers()
+    await close_supabase_client()
 
 app = FastAPI(
     title="ScholarSphere API",
     description="API for ScholarSphere - Academic Research Network Platform",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CLASSIFICATION_CACHE_PATH = os.getenv(
+    "CLASSIFICATION_CACHE_PATH",
+    os.path.join(os.getenv("MODEL_CACHE_DIR", "./ml_models"), "classification_cache.sqlite3")
+)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Collapse whitespace only. Case is kept because the model is
+    case-sensitive; this is the exact text the model scores.
+    """
+    return " ".join(text.split())
+
+
+def content_key(text: str, model_name: str, labels: Iterable[str]) -> str:
+    """
+    Hash the normalized text together with the model and label set, so a
+    change to any of them produces a different key
+    """
+    normalized = normalize_text(text)
+    digest = hashlib.sha256()
+    for part in (model_name, "\x1f".join(labels), normalized):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+
+class ClassificationCache:
+    """
+    SQLite-backed store of per-label classification scores.
+
+    Scores rather than thresholded domains are stored, so a cached entry can
+    serve any threshold.
+    """
+
+    def __init__(self, path: str = CLASSIFICATION_CACHE_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("pragma journal_mode=wal")
+        self._conn.execute(
+            "create table if not exists classifications (key text primary key, scores text not null)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys: List[str]) -> Dict[str, Dict[str, float]]:
+        """Return the cached scores for whichever of keys are present"""
+        found: Dict[str, Dict[str, float]] = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(unique), 500):
+                chunk = unique[start:start + 500]
+                rows = self._conn.execute(
+                    f"select key, scores from classifications where key in ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                found.update((key, json.loads(scores)) for key, scores in rows)
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return found
+
+    def set_many(self, entries: Dict[str, Dict[str, float]]):
+        """Store scores for many keys in one transaction"""
+        if not entries:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "insert or replace into classifications (key, scores) values (?, ?)",
+                [(key, json.dumps(scores)) for key, scores in entries.items()]
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = self._conn.execute("select count(*) from classifications").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "path": self.path,
+                "entries": entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+@lru_cache()
+def get_classification_cache() -> Optional[ClassificationCache]:
+    """Shared on-disk cache, or None if it is disabled or cannot be opened"""
+    if os.getenv("CLASSIFICATION_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    try:
+        return ClassificationCache()
+    except Exception as e:
+        logger.error(f"Classification cache unavailable: {str(e)}")
+        return None
@@ -1,49 +1,333 @@
-from transformers import pipeline
 import numpy as np
-from typing import List, Dict
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 import logging
 import asyncio
+import os
+import time
 from functools import lru_cache
+from .classification_cache import ClassificationCache, content_key, get_classification_cache, normalize_text
+from .scheduler import InferenceScheduler
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+MODEL_NAME = "facebook/bart-large-mnli"
+
+# Number of (text, candidate label) pairs per forward pass
+CLASSIFIER_BATCH_SIZE = int(os.getenv("CLASSIFIER_BATCH_SIZE", "64"))
+
+# Same hypothesis the zero-shot pipeline builds for each candidate label
+HYPOTHESIS_TEMPLATE = "This example is {}."
+
+RESEARCH_DOMAINS = [
+    "Computer Science",
+    "Artificial Intelligence",
+    "Machine Learning",
+    "Data Science",
+    "Bioinformatics",
+    "Natural Language Processing",
+    "Computer Vision",
+    "Robotics",
+    "Physics",
+    "Mathematics",
+    "Chemistry",
+    "Biology",
+    "Medicine",
+    "Environmental Science",
+    "Social Sciences",
+    "Economics",
+    "Psychology",
+    "Engineering",
+    "Materials Science",
+    "Neuroscience"
+]
+
+# Seed vocabulary for the fast path's per-domain TF-IDF centroids
+DOMAIN_KEYWORDS = {
+    "Computer Science": "algorithm algorithms software programming compiler operating system distributed computing network networks database cloud security cryptography",
+    "Artificial Intelligence": "artificial intelligence intelligent agent agents reasoning knowledge representation planning expert system fuzzy logic heuristic search",
+    "Machine Learning": "machine learning deep learning neural network neural networks supervised unsupervised reinforcement learning classification regression training model",
+    "Data Science": "data science data analytics big data data mining visualization statistical analysis dataset datasets prediction forecasting",
+    "Bioinformatics": "bioinformatics genome genomic sequence sequencing protein gene expression dna rna molecular phylogenetic",
+    "Natural Language Processing": "natural language processing nlp text language translation sentiment speech corpus language model named entity",
+    "Computer Vision": "computer vision image images video object detection segmentation recognition visual camera face",
+    "Robotics": "robot robots robotic robotics manipulator autonomous navigation drone uav motion planning actuator",
+    "Physics": "physics quantum particle optics optical laser plasma thermodynamics relativity photon spectroscopy",
+    "Mathematics": "mathematics mathematical theorem proof algebra topology graph theory differential equations numerical analysis optimization",
+    "Chemistry": "chemistry chemical synthesis catalyst catalysis reaction organic inorganic polymer molecule compound",
+    "Biology": "biology biological cell cells organism ecology evolution species microbial microbiology plant",
+    "Medicine": "medicine medical clinical patient patients disease diagnosis treatment cancer health hospital therapy",
+    "Environmental Science": "environmental environment climate pollution water air quality sustainability waste ecosystem emission",
+    "Social Sciences": "social society sociology education policy political community survey culture behavior",
+    "Economics": "economics economic market markets finance financial price inflation trade investment banking",
+    "Psychology": "psychology psychological cognitive mental health behavior behaviour emotion personality anxiety stress",
+    "Engineering": "engineering mechanical electrical civil design control power circuit structural manufacturing",
+    "Materials Science": "materials material nanomaterials nanoparticles composite alloy thin film corrosion microstructure ceramic",
+    "Neuroscience": "neuroscience brain neural neuron neurons cortex cognition eeg fmri synaptic"
+}
+
+# Fast-path confidence gates: minimum cosine similarity of the best domain,
+# and minimum relative gap between the best and second-best domain
+FAST_PATH_ENABLED = os.getenv("CLASSIFIER_FAST_PATH", "true").lower() == "true"
+FAST_PATH_MIN_SIMILARITY = float(os.getenv("CLASSIFIER_FAST_PATH_MIN_SIMILARITY", "0.2"))
+FAST_PATH_MIN_MARGIN = float(os.getenv("CLASSIFIER_FAST_PATH_MIN_MARGIN", "0.5"))
+
+# Inference backend: "pytorch" (full precision), "int8" (dynamically
+# quantized Linear layers) or "onnx" (ONNX Runtime, needs optimum)
+CLASSIFIER_BACKEND = os.getenv("CLASSIFIER_BACKEND", "pytorch")
+CLASSIFIER_BACKENDS = ("pytorch", "int8", "onnx")
+ONNX_EXPORT_DIR = os.path.join(os.getenv("MODEL_CACHE_DIR", "./ml_models"), "onnx")
+
+def model_id(backend: str = CLASSIFIER_BACKEND) -> str:
+    """Identity of the model as served by a backend; backends can disagree slightly"""
+    return MODEL_NAME if backend == "pytorch" else f"{MODEL_NAME}+{backend}"
+
+def _load_onnx_pipeline():
+    from transformers import pipeline
+
+    try:
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+    except ImportError:
+        raise ImportError("CLASSIFIER_BACKEND=onnx requires optimum: pip install 'optimum[onnxruntime]'")
+    from transformers import AutoTokenizer
+
+    # Export once, then load the saved graph on later starts
+    export_dir = os.path.join(ONNX_EXPORT_DIR, MODEL_NAME.replace("/", "--"))
+    if os.path.isdir(export_dir):
+        model = ORTModelForSequenceClassification.from_pretrained(export_dir)
+        tokenizer = AutoTokenizer.from_pretrained(export_dir)
+    else:
+        logger.info(f"Exporting {MODEL_NAME} to ONNX in {export_dir}")
+        model = ORTModelForSequenceClassification.from_pretrained(MODEL_NAME, export=True)
+        tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+        model.save_pretrained(export_dir)
+        tokenizer.save_pretrained(export_dir)
+
+    return pipeline("zero-shot-classification", model=model, tokenizer=tokenizer)
+
 @lru_cache()
-def get_classifier():
+def get_classifier(backend: str = CLASSIFIER_BACKEND):
     """
     Initialize and cache the zero-shot classification pipeline
     """
-    return pipeline(
+    if backend not in CLASSIFIER_BACKENDS:
+        raise ValueError(f"Unknown classifier backend {backend!r}, expected one of {CLASSIFIER_BACKENDS}")
+
+    if backend == "onnx":
+        return _load_onnx_pipeline()
+
+    # Imported here so that importing the API does not pull in torch/transformers
+    from transformers import pipeline
+
+    classifier = pipeline(
         "zero-shot-classification",
-        model="facebook/bart-large-mnli",
+        model=MODEL_NAME,
         device=-1  # CPU
     )
+    if backend == "int8":
+        import torch
+
+        # Weights of every Linear layer stored as int8; activations are
+        # quantized on the fly, so no calibration data is needed
+        classifier.model = torch.ao.quantization.quantize_dynamic(
+            classifier.model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    return classifier
+
+def domains_from_scores(scores: Dict[str, float], threshold: float = 0.3) -> List[str]:
+    """Domains scoring above threshold, best first, or ["Other"] if none do"""
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    domains = [label for label, score in ranked if score > threshold]
+    return domains if domains else ["Other"]
+
+class CentroidDomainClassifier:
+    """
+    Cheap first-pass classifier: cosine similarity between a text's TF-IDF
+    vector and one centroid per domain built from its name and keywords.
+
+    Only clear-cut, single-domain texts get an answer. A text qualifies when
+    its best domain is similar enough, well ahead of the runner-up, and no
+    other domain reaches min_similarity, so the fast path's single-label
+    answer matches what multi-label zero-shot scoring would give. Everything
+    else, including texts that plausibly span several domains, returns None
+    so the caller can escalate it to the zero-shot model.
+    """
+
+    def __init__(
+        self,
+        domains: List[str],
+        min_similarity: float = FAST_PATH_MIN_SIMILARITY,
+        min_margin: float = FAST_PATH_MIN_MARGIN
+    ):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        self.domains = domains
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+        self.vectorizer = TfidfVectorizer(stop_words="english", ngram_range=(1, 2), sublinear_tf=True)
+        # Rows are L2-normalized, so a dot product is a cosine similarity
+        self.centroids = self.vectorizer.fit_transform(
+            [f"{domain} {DOMAIN_KEYWORDS.get(domain, '')}" for domain in domains]
+        )
+
+    def score(self, texts: List[str]) -> List[Optional[Dict[str, float]]]:
+        """
+        Score texts against the domain centroids
+        Returns:
+            Per text, a score dict with the winning domain between 0.5 and 1
+            (every other domain 0), or None when the text is ambiguous or
+            matches more than one domain
+        """
+        if not texts:
+            return []
+
+        similarities = (self.vectorizer.transform(texts) @ self.centroids.T).toarray()
+        results: List[Optional[Dict[str, float]]] = []
+        for row in similarities:
+            order = np.argsort(row)[::-1]
+            best, runner_up = row[order[0]], row[order[1]]
+            margin = (best - runner_up) / best if best > 0 else 0.0
+            # A second plausible domain means a multi-label answer: leave it to zero-shot
+            if best < self.min_similarity or margin < self.min_margin or runner_up >= self.min_similarity:
+                results.append(None)
+                continue
+
+            scores = {domain: 0.0 for domain in self.domains}
+            scores[self.domains[order[0]]] = round(0.5 + 0.5 * float(margin), 4)
+            results.append(scores)
+        return results
 
 class DomainClassifier:
-    def __init__(self):
+    def __init__(self, cache: Optional[ClassificationCache] = None, fast_path: Optional[bool] = None, backend: Optional[str] = None):
         """Initialize the domain classifier with pre-defined research domains"""
-        self.research_domains = [
-            "Computer Science",
-            "Artificial Intelligence",
-            "Machine Learning",
-            "Data Science",
-            "Bioinformatics",
-            "Natural Language Processing",
-            "Computer Vision",
-            "Robotics",
-            "Physics",
-            "Mathematics",
-            "Chemistry",
-            "Biology",
-            "Medicine",
-            "Environmental Science",
-            "Social Sciences",
-            "Economics",
-            "Psychology",
-            "Engineering",
-            "Materials Science",
-            "Neuroscience"
-        ]
+        self.research_domains = list(RESEARCH_DOMAINS)
+        self.backend = backend or CLASSIFIER_BACKEND
+
+        self.cache = cache if cache is not None else get_classification_cache()
+        use_fast_path = FAST_PATH_ENABLED if fast_path is None else fast_path
+        self.fast_path = CentroidDomainClassifier(self.research_domains) if use_fast_path else None
+        self.last_batch_stats: Dict = {}
+        self.tier_counts = {"cached": 0, "fast_path": 0, "zero_shot": 0}
+
+    def score_texts(self, texts: List[str], batch_size: Optional[int] = None) -> List[Dict[str, float]]:
+        """
+        Score every research domain for many texts, reusing cached scores
+        Args:
+            texts: The texts to classify
+            batch_size: Number of (text, label) pairs per forward pass
+        Returns:
+            One {domain: score} dict per text, in input order
+        """
+        keys = [content_key(text, model_id(self.backend), self.research_domains) if text and text.strip() else None for text in texts]
+        resolved = self.cache.get_many([key for key in keys if key]) if self.cache is not None else {}
+        self.tier_counts["cached"] += len(resolved)
+
+        # Only texts that are new or changed go further, each once, as the
+        # normalized text the key was computed from
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key and key not in resolved:
+                missing.setdefault(key, normalize_text(text))
+
+        # Clear-cut texts are answered by the fast path; the rest escalate
+        escalated = list(missing)
+        if missing and self.fast_path is not None:
+            escalated = []
+            for key, scores in zip(missing, self.fast_path.score(list(missing.values()))):
+                if scores is None:
+                    escalated.append(key)
+                else:
+                    resolved[key] = scores
+            self.tier_counts["fast_path"] += len(missing) - len(escalated)
+
+        if escalated:
+            inferred = dict(zip(escalated, self._infer_scores([missing[key] for key in escalated], batch_size)))
+            # Only zero-shot results are worth persisting; the fast path is cheap
+            if self.cache is not None:
+                self.cache.set_many(inferred)
+            resolved.update(inferred)
+            self.tier_counts["zero_shot"] += len(escalated)
+
+        return [dict(resolved[key]) if key else {} for key in keys]
+
+    def _infer_scores(self, texts: List[str], batch_size: Optional[int] = None) -> List[Dict[str, float]]:
+        """Run batched zero-shot inference for every (text, domain) pair"""
+        import torch
+
+        batch_size = batch_size or CLASSIFIER_BATCH_SIZE
+        classifier = get_classifier(self.backend)
+        tokenizer, model = classifier.tokenizer, classifier.model
+        # Pick the logits the pipeline itself compares for multi-label scoring
+        entailment_id = classifier.entailment_id
+        contradiction_id = model.config.num_labels - 1 if entailment_id == 0 else 0
+        hypotheses = [HYPOTHESIS_TEMPLATE.format(label) for label in self.research_domains]
+
+        scores: List[Dict[str, float]] = [{} for _ in texts]
+        pending = [i for i, text in enumerate(texts) if text and text.strip()]
+        if not pending:
+            return scores
+
+        started = time.perf_counter()
+
+        # Sort by token length so each batch pads to roughly its own length
+        lengths = tokenizer([texts[i] for i in pending], add_special_tokens=False, truncation=True)["input_ids"]
+        token_count = dict(zip(pending, (len(ids) for ids in lengths)))
+        pending.sort(key=token_count.get)
+
+        # Flatten texts x labels so a batch can span several publications
+        pairs = [(i, j) for i in pending for j in range(len(hypotheses))]
+        batches = 0
+        for start in range(0, len(pairs), batch_size):
+            chunk = pairs[start:start + batch_size]
+            inputs = tokenizer(
+                [texts[i] for i, _ in chunk],
+                [hypotheses[j] for _, j in chunk],
+                padding=True,
+                truncation="only_first",
+                return_tensors="pt"
+            ).to(model.device)
+
+            with torch.inference_mode():
+                logits = model(**inputs).logits
+
+            # Multi-label zero-shot: softmax over contradiction vs entailment per pair
+            entailment = logits[:, [contradiction_id, entailment_id]].softmax(dim=-1)[:, 1].tolist()
+            for (i, j), probability in zip(chunk, entailment):
+                scores[i][self.research_domains[j]] = probability
+            batches += 1
+
+        elapsed = time.perf_counter() - started
+        self.last_batch_stats = {
+            "texts": len(pending),
+            "pairs": len(pairs),
+            "batches": batches,
+            "batch_size": batch_size,
+            "seconds": round(elapsed, 3),
+            "texts_per_sec": round(len(pending) / elapsed, 2) if elapsed else 0.0
+        }
+        logger.info(
+            f"Classified {len(pending)} texts in {batches} batches "
+            f"({self.last_batch_stats['texts_per_sec']} texts/sec)"
+        )
+        return scores
+
+    def classify_texts(self, texts: List[str], threshold: float = 0.3, batch_size: Optional[int] = None) -> List[List[str]]:
+        """
+        Classify many texts into research domains in shared batches
+        Args:
+            texts: The texts to classify (publication title + abstract)
+            threshold: Minimum confidence score to include a domain
+            batch_size: Number of (text, label) pairs per forward pass
+        Returns:
+            One list of predicted research domains per text
+        """
+        try:
+            all_scores = self.score_texts(texts, batch_size)
+        except Exception as e:
+            logger.error(f"Error in classify_texts: {str(e)}")
+            return [["Other"] for _ in texts]
+
+        return [domains_from_scores(scores, threshold) for scores in all_scores]
 
     def classify_text(self, text: str, threshold: float = 0.3) -> List[str]:
         """
@@ -54,25 +338,7 @@ class DomainClassifier:
         Returns:
             List of predicted research domains
         """
-        try:
-            classifier = get_classifier()
-            result = classifier(
-                text,
-                candidate_labels=self.research_domains,
-                multi_label=True
-            )
-            
-            # Get domains above threshold
-            domains = [
-                label for label, score in zip(result['labels'], result['scores'])
-                if score > threshold
-            ]
-            
-            return domains if domains else ["Other"]
-            
-        except Exception as e:
-            logger.error(f"Error in classify_text: {str(e)}")
-            return ["Other"]
+        return self.classify_texts([text], threshold)[0]
 
     def classify_publication(self, publication: Dict) -> Dict:
         """
@@ -99,74 +365,105 @@ class DomainClassifier:
             publication['research_domains'] = ["Other"]
             return publication
 
-    def batch_classify_publications(self, publications: List[Dict]) -> List[Dict]:
+    def batch_classify_publications(self, publications: List[Dict], batch_size: Optional[int] = None) -> List[Dict]:
         """
-        Classify multiple publications
+        Classify multiple publications in shared inference batches
         Args:
             publications: List of publication dictionaries
+            batch_size: Number of (text, label) pairs per forward pass
         Returns:
             List of publications with added research domains
         """
-        classified_publications = []
-        
-        for pub in publications:
-            try:
-                classified_pub = self.classify_publication(pub)
-                classified_publications.append(classified_pub)
-            except Exception as e:
-                logger.error(f"Error classifying publication: {str(e)}")
-                pub['research_domains'] = ["Other"]
-                classified_publications.append(pub)
+        texts = [f"{pub.get('title', '')} {pub.get('abstract') or ''}" for pub in publications]
+        for pub, domains in zip(publications, self.classify_texts(texts, batch_size=batch_size)):
+            pub['research_domains'] = domains
                 
-        return classified_publications
+        return publications
 
-async def classify_research_domain(texts: List[str]) -> List[dict]:
+@lru_cache()
+def get_domain_classifier() -> DomainClassifier:
+    """
+    Shared domain classifier instance
+    """
+    return DomainClassifier()
+
+def warm_up():
+    """
+    Load the model and run one classification so the first real request
+    does not pay for loading weights
+    """
+    started = time.perf_counter()
+    classifier = get_domain_classifier()
+    classifier._infer_scores(["Warm-up text for the research domain classifier"])
+    logger.info(f"Domain classifier ({classifier.backend}) warmed up in {time.perf_counter() - started:.2f}s")
+
+@lru_cache()
+def get_domain_scheduler() -> InferenceScheduler:
+    """
+    Shared scheduler that micro-batches domain scoring requests from
+    concurrent callers into single model runs
+    """
+    return InferenceScheduler(get_domain_classifier().score_texts)
+
+async def classify_publications_async(publications: List[Dict], threshold: float = 0.3) -> List[Dict]:
+    """
+    Classify publications through the shared scheduler, so ingestion batches
+    together with concurrent API requests instead of running its own passes
+    Args:
+        publications: List of publication dictionaries
+        threshold: Minimum confidence score to include a domain
+    Returns:
+        List of publications with added research domains
+    """
+    texts = [f"{pub.get('title', '')} {pub.get('abstract') or ''}" for pub in publications]
+    try:
+        # Bulk work waits for queue space rather than being rejected
+        all_scores = await get_domain_scheduler().submit_many(texts, block=True)
+    except Exception as e:
+        logger.error(f"Error classifying publications: {str(e)}")
+        all_scores = [{} for _ in texts]
+
+    for pub, scores in zip(publications, all_scores):
+        pub['research_domains'] = domains_from_scores(scores, threshold)
+    return publications
+
+async def _indexed_result(index: int, future: asyncio.Future) -> Tuple[int, Optional[Dict[str, float]], Optional[str]]:
+    try:
+        return index, await future, None
+    except Exception as e:
+        return index, None, str(e)
+
+async def classify_research_domain(texts: List[str], threshold: float = 0.3, top_k: int = 3) -> AsyncIterator[dict]:
     """
     Classify research domains for given texts using zero-shot classification
+    Args:
+        texts: The texts to classify
+        threshold: Minimum confidence score to include a domain
+        top_k: Maximum number of domains reported per text
+    Yields:
+        One result per text, tagged with its index, in completion order
     """
-    if not texts:
-        return []
-
-    classifier = get_classifier()
-    
-    # Process in batches to avoid memory issues
-    batch_size = 5
-    results = []
-    
-    for i in range(0, len(texts), batch_size):
-        batch = texts[i:i + batch_size]
-        batch_results = []
-        
-        for text in batch:
-            if not text.strip():
-                batch_results.append({"domains": [], "scores": []})
-                continue
-                
-            # Classify the text against all research domains
-            result = classifier(
-                text,
-                candidate_labels=RESEARCH_DOMAINS,
-                multi_label=True
-            )
-            
-            # Filter domains with confidence > 0.3
-            confident_domains = [
-                {"domain": domain, "confidence": score}
-                for domain, score in zip(result["labels"], result["scores"])
-                if score > 0.3
-            ]
-            
-            # Sort by confidence
-            confident_domains.sort(key=lambda x: x["confidence"], reverse=True)
-            
-            batch_results.append({
-                "domains": [d["domain"] for d in confident_domains[:3]],
-                "scores": [d["confidence"] for d in confident_domains[:3]]
-            })
-            
-        results.extend(batch_results)
-        
-        # Small delay to prevent overloading
-        await asyncio.sleep(0.1)
-    
-    return results 
\ No newline at end of file
+    scheduler = get_domain_scheduler()
+    pending = []
+    for index, text in enumerate(texts):
+        if not text or not text.strip():
+            yield {"index": index, "domains": [], "scores": []}
+            continue
+        pending.append(_indexed_result(index, await scheduler.enqueue(text)))
+
+    for next_result in asyncio.as_completed(pending):
+        index, scores, error = await next_result
+        if error is not None:
+            yield {"index": index, "error": error}
+            continue
+
+        confident_domains = sorted(
+            ((domain, score) for domain, score in scores.items() if score > threshold),
+            key=lambda item: item[1],
+            reverse=True
+        )[:top_k]
+        yield {
+            "index": index,
+            "domains": [domain for domain, _ in confident_domains],
+            "scores": [score for _, score in confident_domains]
+        }
@@ -0,0 +1,148 @@
+import logging
+import os
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .scheduler import InferenceScheduler
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+# Must match the vector(...) columns created by migration 006
+EMBEDDING_DIM = 384
+# "transformer" (EMBEDDING_MODEL, mean pooled) or "hashing" (lexical feature
+# hashing: no model download, for local runs and tests)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "transformer")
+EMBEDDING_BACKENDS = ("transformer", "hashing")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+# Truncate inputs to this many tokens (the model's limit is 256 word pieces)
+EMBEDDING_MAX_TOKENS = int(os.getenv("EMBEDDING_MAX_TOKENS", "256"))
+
+
+class TransformerEmbedder:
+    """
+    Sentence embeddings from a transformer encoder: mean of the token
+    vectors over the attention mask, L2-normalized so a dot product is the
+    cosine similarity
+    """
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL, batch_size: int = EMBEDDING_BATCH_SIZE):
+        # Imported here so that importing the API does not pull in torch/transformers
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        self._torch = torch
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModel.from_pretrained(model_name).eval()
+        if self.model.config.hidden_size != EMBEDDING_DIM:
+            raise ValueError(f"{model_name} produces {self.model.config.hidden_size}-d vectors, expected {EMBEDDING_DIM}")
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = []
+        with self._torch.inference_mode():
+            for start in range(0, len(texts), self.batch_size):
+                encoded = self.tokenizer(
+                    texts[start:start + self.batch_size],
+                    padding=True,
+                    truncation=True,
+                    max_length=EMBEDDING_MAX_TOKENS,
+                    return_tensors="pt"
+                )
+                tokens = self.model(**encoded).last_hidden_state
+                mask = encoded["attention_mask"].unsqueeze(-1).to(tokens.dtype)
+                pooled = (tokens * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+                vectors.append(self._torch.nn.functional.normalize(pooled, dim=1).numpy())
+        return np.vstack(vectors).astype(np.float32) if vectors else np.zeros((0, EMBEDDING_DIM), np.float32)
+
+
+class HashingEmbedder:
+    """
+    Hashed unigram and bigram counts, L2-normalized. Purely lexical, but
+    deterministic and free of model downloads.
+    """
+
+    model_name = "hashing"
+
+    def __init__(self):
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        self.vectorizer = HashingVectorizer(
+            n_features=EMBEDDING_DIM,
+            ngram_range=(1, 2),
+            stop_words="english",
+            alternate_sign=False,
+            norm="l2"
+        )
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return self.vectorizer.transform(texts).toarray().astype(np.float32)
+
+
+@lru_cache()
+def get_embedder(backend: str = EMBEDDING_BACKEND):
+    """Shared embedding model for a backend"""
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {EMBEDDING_BACKENDS}")
+    if backend == "hashing":
+        return HashingEmbedder()
+    return TransformerEmbedder()
+
+
+@lru_cache()
+def get_embedding_scheduler() -> InferenceScheduler:
+    """
+    Shared scheduler that batches embedding requests from concurrent
+    searches (and ingestion) into single model runs
+    """
+    return InferenceScheduler(lambda texts: list(get_embedder().embed(texts)))
+
+
+async def embed_texts(texts: List[str], block: bool = False) -> np.ndarray:
+    """
+    Embed texts through the shared scheduler
+    Args:
+        texts: Texts to embed
+        block: Wait for queue space instead of raising SchedulerOverloaded
+            (for bulk callers such as ingestion)
+    Returns:
+        Array of shape (len(texts), EMBEDDING_DIM), rows L2-normalized
+    """
+    if not texts:
+        return np.zeros((0, EMBEDDING_DIM), np.float32)
+    vectors = await get_embedding_scheduler().submit_many(texts, block=block)
+    return np.vstack(vectors).astype(np.float32)
+
+
+def publication_text(publication: Dict) -> str:
+    return " ".join(part for part in (
+        publication.get("title") or "",
+        publication.get("abstract") or "",
+        publication.get("journal") or publication.get("venue") or ""
+    ) if part)
+
+
+def faculty_text(faculty: Dict, publication_titles: Iterable[str] = ()) -> str:
+    """Research interests and department, plus titles of the faculty's publications"""
+    interests = faculty.get("research_interests") or []
+    parts = [", ".join(interests), faculty.get("department") or ""]
+    parts.extend(list(publication_titles)[:20])
+    return ". ".join(part for part in parts if part)
+
+
+def to_pgvector(vector: np.ndarray) -> List[float]:
+    """JSON form of a vector column value; PostgREST casts the array to vector"""
+    return [round(float(x), 6) for x in vector]
+
+
+def parse_vector(value) -> Optional[np.ndarray]:
+    """Vector column value as returned by PostgREST ("[0.1,...]") or as a list"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = [float(x) for x in value.strip("[]").split(",") if x]
+    vector = np.asarray(value, dtype=np.float32)
+    return vector if vector.shape == (EMBEDDING_DIM,) else None
@@ -0,0 +1,256 @@
+import asyncio
+import logging
+import os
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MICROBATCH_MAX_SIZE = int(os.getenv("CLASSIFIER_MICROBATCH_SIZE", "16"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("CLASSIFIER_MICROBATCH_WAIT_MS", "10"))
+INFERENCE_WORKERS = int(os.getenv("CLASSIFIER_INFERENCE_WORKERS", "1"))
+MAX_QUEUE_SIZE = int(os.getenv("CLASSIFIER_MAX_QUEUE", "1024"))
+
+
+class SchedulerOverloaded(Exception):
+    """Raised when the inference queue cannot take more work"""
+
+
+class SchedulerStopped(Exception):
+    """Raised for queued items the scheduler will no longer run"""
+
+
+# Every scheduler created in this process, so shutdown can stop them
+_schedulers: "weakref.WeakSet[InferenceScheduler]" = weakref.WeakSet()
+
+
+def _fail(future: asyncio.Future, error: Exception):
+    """Fail a pending future from any thread, on the loop it belongs to"""
+    def set_error():
+        if not future.done():
+            future.set_exception(error)
+
+    loop = future.get_loop()
+    if not loop.is_closed():
+        loop.call_soon_threadsafe(set_error)
+
+
+class InferenceScheduler:
+    """
+    Collect single inference requests from any number of callers and run
+    them through a batch function together.
+
+    Items are queued and flushed as one batch once max_batch_size items are
+    waiting or the oldest has waited max_wait_ms. The batch function runs
+    on a worker pool so inference never blocks the event loop, and each
+    result is handed back to the future of the caller that submitted it.
+
+    The queue is bounded by max_queue_size. Interactive callers are turned
+    away with SchedulerOverloaded once it is full, while bulk callers can
+    pass block=True to wait for room instead.
+
+    The workers are started on the event loop of the first caller and
+    restarted on the next one's if they have stopped. Items still queued
+    then are carried over when they were queued on the same loop; callers
+    waiting on another loop are failed with SchedulerStopped rather than
+    left hanging.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = MICROBATCH_MAX_SIZE,
+        max_wait_ms: float = MICROBATCH_MAX_WAIT_MS,
+        workers: int = INFERENCE_WORKERS,
+        max_queue_size: int = MAX_QUEUE_SIZE
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._dispatchers: List[asyncio.Task] = []
+
+        # Metrics
+        self.batch_size_histogram: Dict[int, int] = {}
+        self.batches = 0
+        self.items = 0
+        self.rejected = 0
+        self.failed_batches = 0
+        self.in_flight = 0
+        self._queue_wait_total = 0.0
+        self._inference_total = 0.0
+        _schedulers.add(self)
+
+    def _drain(self) -> List[Tuple[Any, asyncio.Future, float]]:
+        """Take every entry still waiting in the queue"""
+        entries = []
+        while self._queue is not None and not self._queue.empty():
+            entries.append(self._queue.get_nowait())
+        return entries
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if any(not task.done() and task.get_loop() is loop for task in self._dispatchers):
+            return
+        # Workers left on another loop cannot serve this one
+        for task in self._dispatchers:
+            if not task.done() and not task.get_loop().is_closed():
+                task.get_loop().call_soon_threadsafe(task.cancel)
+        pending = self._drain()
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        for entry in pending:
+            future = entry[1]
+            if future.done():
+                continue
+            if future.get_loop() is loop:
+                self._queue.put_nowait(entry)
+            else:
+                _fail(future, SchedulerStopped("Inference scheduler was restarted on another event loop"))
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def check_capacity(self, count: int = 1):
+        """Raise SchedulerOverloaded if count more items would overflow the queue"""
+        if self.queue_depth + count > self.max_queue_size:
+            self.rejected += count
+            raise SchedulerOverloaded(
+                f"Inference queue is full ({self.queue_depth}/{self.max_queue_size} items waiting)"
+            )
+
+    async def submit(self, item: Any, block: bool = False) -> Any:
+        """Queue one item and wait for its result"""
+        future = await self.enqueue(item, block)
+        return await future
+
+    async def submit_many(self, items: List[Any], block: bool = True) -> List[Any]:
+        """Queue many items and wait for all of their results, in order"""
+        futures = [await self.enqueue(item, block) for item in items]
+        return await asyncio.gather(*futures)
+
+    async def enqueue(self, item: Any, block: bool = False) -> asyncio.Future:
+        """
+        Queue one item and return the future that will hold its result
+        Args:
+            item: Input for the batch function
+            block: Wait for room when the queue is full instead of raising
+        Returns:
+            Future resolved with the batch function's output for this item
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        entry = (item, future, time.perf_counter())
+        if block:
+            await self._queue.put(entry)
+        else:
+            try:
+                self._queue.put_nowait(entry)
+            except asyncio.QueueFull:
+                self.rejected += 1
+                raise SchedulerOverloaded(f"Inference queue is full ({self.max_queue_size} items waiting)")
+        return future
+
+    def _record_batch(self, size: int, queued_at: List[float], started: float, finished: float):
+        # Power-of-two buckets: 1, 2, 4, 8, ...
+        bucket = 1 << (size - 1).bit_length()
+        self.batch_size_histogram[bucket] = self.batch_size_histogram.get(bucket, 0) + 1
+        self.batches += 1
+        self.items += size
+        self._queue_wait_total += sum(started - queued for queued in queued_at)
+        self._inference_total += finished - started
+
+    def stats(self) -> Dict:
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_size": self.max_queue_size,
+            "in_flight": self.in_flight,
+            "batches": self.batches,
+            "items": self.items,
+            "failed_batches": self.failed_batches,
+            "rejected": self.rejected,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "batch_size_histogram": {str(size): count for size, count in sorted(self.batch_size_histogram.items())},
+            "avg_queue_wait_ms": round(1000 * self._queue_wait_total / self.items, 2) if self.items else 0.0,
+            "avg_batch_latency_ms": round(1000 * self._inference_total / self.batches, 2) if self.batches else 0.0
+        }
+
+    async def _collect(self) -> List[Tuple[Any, asyncio.Future, float]]:
+        """Wait for the first item, then gather more until the batch is full or the deadline passes"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Callers that gave up while queued do not need inference
+            batch = [entry for entry in batch if not entry[1].cancelled()]
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            self.in_flight += len(batch)
+            try:
+                results = await loop.run_in_executor(self._executor, self.batch_fn, [item for item, _, _ in batch])
+            except asyncio.CancelledError:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(SchedulerStopped("Inference scheduler was stopped"))
+                raise
+            except Exception as e:
+                logger.error(f"Inference batch of {len(batch)} failed: {str(e)}")
+                self.failed_batches += 1
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            finally:
+                self.in_flight -= len(batch)
+
+            self._record_batch(len(batch), [queued for _, _, queued in batch], started, time.perf_counter())
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def stop(self):
+        """Stop the workers and fail the items still queued; the next caller starts them again"""
+        loop = asyncio.get_running_loop()
+        for task in self._dispatchers:
+            # Workers started on a loop that has since closed are already gone
+            if task.get_loop() is loop:
+                task.cancel()
+            elif not task.get_loop().is_closed():
+                task.get_loop().call_soon_threadsafe(task.cancel)
+        await asyncio.gather(*(task for task in self._dispatchers if task.get_loop() is loop), return_exceptions=True)
+        self._dispatchers = []
+        for _, future, _ in self._drain():
+            _fail(future, SchedulerStopped("Inference scheduler was stopped"))
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+async def stop_schedulers():
+    """Stop every scheduler that has been started (called on app shutdown)"""
+    for scheduler in list(_schedulers):
+        if scheduler._dispatchers:
+            await scheduler.stop()
@@ -1,21 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from typing import Dict
-from ..services.analytics_service import AnalyticsService
+from ..services.analytics_service import AnalyticsService, analytics_snapshot
 
 router = APIRouter(prefix="/api/analytics", tags=["analytics"])
 
+# Stateless apart from the shared database client, so one instance serves all requests
+analytics_service = AnalyticsService()
+
 @router.get("/research", response_model=Dict)
-async def get_research_analytics():
+async def get_research_analytics(request: Request, response: Response):
     """
     Get comprehensive research analytics including:
     - Publication trends over time
     - Faculty distribution by department
     - Top research areas
     - Key metrics (citations, h-index, etc.)
+
+    Served from the analytics snapshot; clients holding the current ETag
+    get 304 Not Modified.
     """
     try:
-        analytics_service = AnalyticsService()
-        return await analytics_service.get_research_analytics()
+        analytics, etag = await analytics_snapshot.get(analytics_service.get_research_analytics)
+        if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+            return Response(status_code=304, headers={"ETag": etag})
+
+        response.headers["ETag"] = etag
+        return analytics
     except ValueError as ve:
         raise HTTPException(status_code=404, detail=str(ve))
     except Exception as e:
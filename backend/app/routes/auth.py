@@ -8,7 +8,7 @@ from ..auth.utils import (
     create_access_token,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
-from ..auth.deps import get_current_active_user
+from ..auth.deps import get_current_active_user, invalidate_principal
 from ..schemas.auth import UserCreate, UserLogin, Token, UserUpdate, UserResponse
 from ..database.supabase import supabase_client
 import uuid
@@ -20,7 +20,7 @@ async def register(user_data: UserCreate) -> Any:
     """Register a new user"""
     try:
         # Check if user already exists
-        existing_user = supabase_client.table('profiles').select('*').eq('email', user_data.email).execute()
+        existing_user = await supabase_client.table('profiles').select('*').eq('email', user_data.email).execute()
         if existing_user.data:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -38,7 +38,7 @@ async def register(user_data: UserCreate) -> Any:
             'password_hash': get_password_hash(user_data.password)
         }
         
-        response = supabase_client.table('profiles').insert(new_user).execute()
+        response = await supabase_client.table('profiles').insert(new_user).execute()
         return response.data[0]
         
     except Exception as e:
@@ -52,7 +52,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()) -> Any:
     """Login user and return JWT token"""
     try:
         # Get user
-        user = supabase_client.table('profiles').select('*').eq('email', form_data.username).single().execute()
+        user = await supabase_client.table('profiles').select('*').eq('email', form_data.username).single().execute()
         
         if not user.data or not verify_password(form_data.password, user.data['password_hash']):
             raise HTTPException(
@@ -93,7 +93,8 @@ async def update_user_me(
     try:
         update_data = user_update.dict(exclude_unset=True)
         
-        response = supabase_client.table('profiles').update(update_data).eq('id', current_user['id']).execute()
+        response = await supabase_client.table('profiles').update(update_data).eq('id', current_user['id']).execute()
+        invalidate_principal(current_user['id'])
         
         return response.data[0]
         
@@ -107,7 +108,7 @@ async def update_user_me(
 async def reset_password(email: str) -> Any:
     """Request password reset"""
     try:
-        user = supabase_client.table('profiles').select('*').eq('email', email).single().execute()
+        user = await supabase_client.table('profiles').select('*').eq('email', email).single().execute()
         
         if not user.data:
             # Return success even if email doesn't exist (security best practice)
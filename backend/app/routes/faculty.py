@@ -1,15 +1,17 @@
 from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
 from typing import List, Dict
-from ..ml.domain_classifier import DomainClassifier
+from ..ml.classification_cache import get_classification_cache
 from ..database.supabase import supabase_client
 from ..auth.deps import get_current_active_user
+from ..services.ingestion import FacultyIngestion
+from ..services.scrape_pipeline import ScrapePipeline
+from scripts.scraper import AsyncIRINSScraper, IRINS_BASE_URL
+from scripts.crawl_state import get_crawl_state
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-classifier = DomainClassifier()
-
 # Global variable to track scraping progress
 scraping_status = {
     "is_running": False,
@@ -23,7 +25,7 @@ scraping_status = {
 async def get_faculty_list(current_user = Depends(get_current_active_user)):
     """Get list of all faculty members"""
     try:
-        response = supabase_client.table('faculty').select('*').execute()
+        response = await supabase_client.table('faculty').select('*').execute()
         return response.data
     except Exception as e:
         logger.error(f"Error fetching faculty list: {str(e)}")
@@ -33,7 +35,7 @@ async def get_faculty_list(current_user = Depends(get_current_active_user)):
 async def get_faculty_detail(faculty_id: str, current_user = Depends(get_current_active_user)):
     """Get detailed information for a specific faculty member"""
     try:
-        response = supabase_client.table('faculty').select('*').eq('id', faculty_id).single().execute()
+        response = await supabase_client.table('faculty').select('*').eq('id', faculty_id).single().execute()
         if not response.data:
             raise HTTPException(status_code=404, detail="Faculty not found")
         return response.data
@@ -82,51 +84,34 @@ async def scrape_and_store_faculty_data():
     global scraping_status
     
     try:
-        # Scrape faculty data
-        data = scraper.scrape_all()
-        scraping_status["total_faculty"] = len(data['faculty'])
-        
-        # Process each faculty member
-        for i, faculty in enumerate(data['faculty']):
-            try:
-                scraping_status["processed_faculty"] = i + 1
-                scraping_status["current_faculty"] = faculty['name']
-                
-                # Classify publications
-                if 'publications' in faculty:
-                    faculty['publications'] = classifier.batch_classify_publications(faculty['publications'])
-                
-                # Store faculty data
-                response = supabase_client.table('faculty').upsert({
-                    'name': faculty['name'],
-                    'department': faculty['department'],
-                    'designation': faculty.get('designation', ''),
-                    'email': faculty.get('email', ''),
-                    'research_interests': faculty.get('research_interests', []),
-                    'image_url': faculty.get('image_url', None)
-                }).execute()
-                
-                faculty_id = response.data[0]['id']
-                
-                # Store publications
-                if 'publications' in faculty:
-                    for pub in faculty['publications']:
-                        supabase_client.table('publications').upsert({
-                            'title': pub['title'],
-                            'authors': pub['authors'],
-                            'journal': pub.get('journal', ''),
-                            'year': pub.get('year', ''),
-                            'doi': pub.get('doi', None),
-                            'research_domains': pub.get('research_domains', ['Other']),
-                            'faculty_id': faculty_id
-                        }).execute()
-                        
-            except Exception as e:
-                logger.error(f"Error processing faculty {faculty.get('name', 'unknown')}: {str(e)}")
-                continue
+        # Fetch, parse, classify and store run as concurrent stages, so
+        # faculty are written while the crawl is still going; see
+        # services/scrape_pipeline.py. With crawl state only faculty changed
+        # since the last crawl are processed.
+        crawl_state = get_crawl_state()
+        pipeline = ScrapePipeline(
+            AsyncIRINSScraper(IRINS_BASE_URL, state=crawl_state),
+            FacultyIngestion(supabase_client),
+            crawl_state,
+            status=scraping_status
+        )
+        stats = await pipeline.run()
+        if stats["error"] and not stats["stored_faculty"]:
+            raise Exception(stats["error"])
+
+        scraping_status["pipeline"] = stats
+        scraping_status["ingestion"] = pipeline.ingestion.stats()
+        if crawl_state is not None:
+            scraping_status["crawl_state"] = crawl_state.stats()
+        logger.info(f"Scrape pipeline: {stats}")
+        logger.info(f"Ingestion: {scraping_status['ingestion']}")
                 
         scraping_status["is_running"] = False
         scraping_status["current_faculty"] = "Completed"
+        classification_cache = get_classification_cache()
+        if classification_cache is not None:
+            scraping_status["classification_cache"] = classification_cache.stats()
+            logger.info(f"Classification cache: {scraping_status['classification_cache']}")
         
     except Exception as e:
         logger.error(f"Error in scrape_and_store_faculty_data: {str(e)}")
@@ -137,8 +122,12 @@ async def scrape_and_store_faculty_data():
 async def get_faculty_publications(faculty_id: str, current_user = Depends(get_current_active_user)):
     """Get publications for a specific faculty member"""
     try:
-        response = supabase_client.table('publications').select('*').eq('faculty_id', faculty_id).execute()
-        return response.data
+        # Authorship lives in faculty_publications; publications has no faculty column
+        response = await supabase_client.table('faculty_publications') \
+            .select('publications!inner(*)') \
+            .eq('faculty_id', faculty_id) \
+            .execute()
+        return [link['publications'] for link in response.data or [] if link.get('publications')]
     except Exception as e:
         logger.error(f"Error fetching faculty publications: {str(e)}")
         raise HTTPException(status_code=500, detail="Error fetching faculty publications")
@@ -148,16 +137,19 @@ async def search_faculty(query: str, current_user = Depends(get_current_active_u
     """Search faculty by name, department, or research interests"""
     try:
         # First try exact domain match in publications
-        pub_response = supabase_client.table('publications').select('faculty_id').contains('research_domains', [query]).execute()
-        faculty_ids = list(set([p['faculty_id'] for p in pub_response.data]))
+        link_response = await supabase_client.table('faculty_publications') \
+            .select('faculty_id, publications!inner(research_domains)') \
+            .contains('publications.research_domains', [query]) \
+            .execute()
+        faculty_ids = list(set([str(link['faculty_id']) for link in link_response.data or []]))
         
         # Then search other faculty fields
-        response = supabase_client.table('faculty').select('*').or_(
+        response = await supabase_client.table('faculty').select('*').or_(",".join([
             f"id.in.({','.join(faculty_ids)})" if faculty_ids else "id.is.null",
             f"name.ilike.%{query}%",
             f"department.ilike.%{query}%",
             f"research_interests.cs.{{{query}}}"
-        ).execute()
+        ])).execute()
         
         return response.data
     except Exception as e:
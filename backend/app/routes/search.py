@@ -1,81 +1,147 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from typing import List, Optional, Dict
-from pydantic import BaseModel
+from uuid import UUID
+from pydantic import BaseModel, Field
 import os
-from dotenv import load_dotenv
-from supabase import create_client, Client
+import json
 import logging
-from supabase import create_client, Client
-from ..ml.domain_classifier import classify_research_domain
+from ..database.supabase import get_supabase_client
+from ..ml.domain_classifier import classify_research_domain, get_domain_classifier, get_domain_scheduler
+from ..ml.embeddings import embed_texts
+from ..ml.scheduler import SchedulerOverloaded
 from ..schemas.search import SearchResult, FacultyResult, PublicationResult, ResearchResult
+from ..services.fanout import FanOutExecutor, DEFAULT_SUBQUERY_TIMEOUT
+from ..services.cache import search_cache, make_search_key, normalize_query
+from ..services.facets import facet_index, scan_faculty_facets
+from ..services.institutions import get_institution_registry
+from ..services.pagination import MAX_PAGE_SIZE, InvalidCursor, decode_cursor, encode_cursor, split_page
+from ..services.semantic import SEMANTIC_SEARCH_BACKEND, SEMANTIC_TARGETS, semantic_match
+from ..services.neighbors import NEIGHBOR_TABLES, NEIGHBORS_K
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-load_dotenv()
-
 router = APIRouter(prefix="/api/search", tags=["search"])
 
-# Initialize Supabase client
-try:
-    supabase_url = os.getenv("SUPABASE_URL")
-    supabase_key = os.getenv("SUPABASE_KEY")
-    
-    if not supabase_url or not supabase_key:
-        raise ValueError("Supabase credentials not found")
-    
-    supabase: Client = create_client(supabase_url, supabase_key)
-    logger.info("Supabase client initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize Supabase client: {str(e)}")
-    raise
+# Shared pooled PostgREST client
+supabase = get_supabase_client()
+
+# Shared pool for running the independent sub-queries of a search concurrently
+fanout = FanOutExecutor()
+
+# Per sub-query timeouts (seconds); trends are supplementary so they get less
+SUBQUERY_TIMEOUTS = {
+    "faculty": float(os.getenv("SEARCH_FACULTY_TIMEOUT", DEFAULT_SUBQUERY_TIMEOUT)),
+    "profiles": float(os.getenv("SEARCH_PROFILES_TIMEOUT", DEFAULT_SUBQUERY_TIMEOUT)),
+    "publications": float(os.getenv("SEARCH_PUBLICATIONS_TIMEOUT", DEFAULT_SUBQUERY_TIMEOUT)),
+    "trends": float(os.getenv("SEARCH_TRENDS_TIMEOUT", "2")),
+    "facets": float(os.getenv("SEARCH_FACETS_TIMEOUT", DEFAULT_SUBQUERY_TIMEOUT))
+}
+
+# Queries shorter than this fall back to ILIKE; the English tsquery parser
+# drops most one- and two-letter terms, so they rarely match anything
+FTS_MIN_QUERY_LENGTH = int(os.getenv("SEARCH_FTS_MIN_LENGTH", "3"))
+# Columns returned for semantic and similar-item hits; never the embedding
+# or full_text search columns
+RESULT_COLUMNS = {
+    "publications": "id,title,abstract,authors,journal,year,doi,citations,research_domains",
+    "faculty": "id,name,department,institution,designation,email,research_interests,expertise,"
+               "image_url,irins_profile_url,citations,h_index"
+}
+# Publications returned with each faculty search hit, most cited first
+FACULTY_PUBLICATIONS_LIMIT = int(os.getenv("SEARCH_FACULTY_PUBLICATIONS_LIMIT", "20"))
 
 class SearchQuery(BaseModel):
     query: str
     filters: Optional[dict] = None
-    page: int = 1
-    limit: int = 10
+    page: int = 1  # Unused; pages are addressed with cursor
+    limit: int = Field(10, ge=1, le=MAX_PAGE_SIZE)
+    mode: str = "auto"  # "auto", "fulltext" or "ilike"
+    cursor: Optional[str] = None  # next_cursor from the previous page
+    include_facets: bool = False  # /all only: per-facet hit counts for the query
+
+class SemanticQuery(BaseModel):
+    query: str
+    target: str = "publications"  # "publications" or "faculty"
+    limit: int = Field(10, ge=1, le=MAX_PAGE_SIZE)
+    text_weight: float = Field(0.0, ge=0.0, le=1.0)  # 0 = embeddings only
+    min_similarity: float = Field(0.0, ge=-1.0, le=1.0)
+
+def resolve_search_mode(search_query: SearchQuery, query: str) -> str:
+    """Pick full-text or ILIKE matching for a normalized query"""
+    if search_query.mode == "auto":
+        return "fulltext" if len(query) >= FTS_MIN_QUERY_LENGTH else "ilike"
+    if search_query.mode not in ("fulltext", "ilike"):
+        raise HTTPException(status_code=400, detail=f"Unknown search mode: {search_query.mode}")
+    return search_query.mode
+
+async def fetch_ranked(function: str, params: Dict, table: str, columns: str = "*") -> List[Dict]:
+    """
+    Run a ranked full-text search function and load the matching rows
+    Args:
+        function: Name of the search RPC, which returns (id, rank) best first
+        params: Arguments for the RPC
+        table: Table to load the matching rows from
+        columns: Select expression for the loaded rows (may embed relations)
+    Returns:
+        Rows in rank order, each with its ts_rank_cd score under "rank"
+    """
+    ranked = (await supabase.rpc(function, params).execute()).data or []
+    if not ranked:
+        return []
+
+    ranks = {r["id"]: r["rank"] for r in ranked}
+    positions = {r["id"]: i for i, r in enumerate(ranked)}
+    response = await supabase.table(table).select(columns).in_("id", list(ranks)).execute()
+    rows = response.data if hasattr(response, 'data') else []
+    for row in rows:
+        row["rank"] = ranks.get(row.get("id"))
+    rows.sort(key=lambda row: positions.get(row.get("id"), len(positions)))
+    return rows
+
+def read_cursor(search_query: SearchQuery, mode: str) -> Optional[Dict[str, Dict]]:
+    """Decode the request cursor, or None on the first page"""
+    try:
+        return decode_cursor(search_query.cursor, mode)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def keyset_params(position: Optional[Dict], limit: int) -> Dict:
+    """
+    Page arguments for a ranked search RPC; one extra row is requested so
+    split_page can tell whether another page exists
+    """
+    position = position or {}
+    return {
+        "result_limit": limit + 1,
+        "after_rank": position.get("rank"),
+        "after_id": position.get("id")
+    }
+
+
+def keyset_page(query_builder, position: Optional[Dict], limit: int):
+    """Order an ILIKE query by id and resume it after the last id seen"""
+    query_builder = query_builder.order("id")
+    if position:
+        query_builder = query_builder.gt("id", position["id"])
+    return query_builder.limit(limit + 1)
 
 @router.get("/filter-options")
-async def get_filter_options():
+async def get_filter_options(request: Request, response: Response):
     """
-    Get available filter options for search
+    Get available filter options for search, with the number of faculty
+    behind each value. Served from the facet index; clients holding the
+    current ETag get 304 Not Modified.
     """
     try:
-        logger.info("Fetching filter options")
-        
-        # Get unique departments
-        departments_response = supabase.table("faculty") \
-            .select("department") \
-            .execute()
-        departments = list(set(d["department"] for d in departments_response.data if d["department"]))
-        
-        # Get unique institutions
-        institutions_response = supabase.table("faculty") \
-            .select("institution") \
-            .execute()
-        institutions = list(set(i["institution"] for i in institutions_response.data if i["institution"]))
-        
-        # Get unique cities and states
-        locations_response = supabase.table("faculty") \
-            .select("city, state") \
-            .execute()
-        cities = list(set(l["city"] for l in locations_response.data if l.get("city")))
-        states = list(set(l["state"] for l in locations_response.data if l.get("state")))
-        
-        # Get unique domains from the domain classifier
-        from ..ml.domain_classifier import DomainClassifier
-        classifier = DomainClassifier()
-        domains = classifier.research_domains
-        
-        return {
-            "departments": sorted(departments),
-            "institutions": sorted(institutions),
-            "domains": sorted(domains),
-            "cities": sorted(cities),
-            "states": sorted(states)
-        }
+        options, etag = await facet_index.snapshot(lambda: scan_faculty_facets(supabase))
+        if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+            return Response(status_code=304, headers={"ETag": etag})
+
+        response.headers["ETag"] = etag
+        return options
     except Exception as e:
         logger.error(f"Error fetching filter options: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -86,14 +152,37 @@ async def search_all(search_query: SearchQuery):
     Search across faculty, profiles, and publications
     """
     try:
-        query = search_query.query.lower()
+        query = normalize_query(search_query.query)
         filters = search_query.filters or {}
         logger.info(f"Processing search query: {query} with filters: {filters}")
 
-        # Search faculty
-        faculty = []
-        try:
-            logger.info("Searching faculty...")
+        mode = resolve_search_mode(search_query, query)
+        positions = read_cursor(search_query, mode)
+        endpoint = "all+facets" if search_query.include_facets else "all"
+        cache_key = make_search_key(endpoint, query, filters, search_query.cursor, search_query.limit, mode)
+        cached = search_cache.get(cache_key)
+        generation = search_cache.generation()
+        if cached is not None:
+            logger.info(f"Serving search query from cache: {query}")
+            return cached
+
+        # Every spelling of a selected institution shares its stored key
+        institutions = get_institution_registry()
+        institution_keys = institutions.filter_keys(filters.get("institution") or []) or None
+
+        async def fetch_faculty() -> List[Dict]:
+            position = (positions or {}).get("faculty")
+            if mode == "fulltext":
+                return await fetch_ranked("search_faculty_ranked", {
+                    "search_query": query,
+                    "departments": filters.get("department") or None,
+                    "institution_keys": institution_keys,
+                    "domains": filters.get("domain") or None,
+                    "cities": filters.get("city") or None,
+                    "states": filters.get("state") or None,
+                    **keyset_params(position, search_query.limit)
+                }, "faculty")
+
             faculty_query = supabase.table("faculty") \
                 .select("*") \
                 .or_(
@@ -106,12 +195,8 @@ async def search_all(search_query: SearchQuery):
             # Apply filters
             if filters.get("department"):
                 faculty_query = faculty_query.in_("department", filters["department"])
-            if filters.get("institution"):
-                # Handle institution variations
-                normalized_institutions = [normalize_institution(inst) for inst in filters["institution"]]
-                faculty_query = faculty_query.or_(
-                    *[f"institution.ilike.%{inst}%" for inst in normalized_institutions]
-                )
+            if institution_keys:
+                faculty_query = faculty_query.in_("institution_key", institution_keys)
             if filters.get("domain"):
                 faculty_query = faculty_query.contains("expertise", filters["domain"])
             if filters.get("city"):
@@ -119,54 +204,50 @@ async def search_all(search_query: SearchQuery):
             if filters.get("state"):
                 faculty_query = faculty_query.in_("state", filters["state"])
                 
-            faculty_response = faculty_query.limit(search_query.limit).execute()
-            faculty = faculty_response.data if hasattr(faculty_response, 'data') else []
-            logger.info(f"Found {len(faculty)} faculty results")
-        except Exception as e:
-            logger.error(f"Error searching faculty: {str(e)}")
-            faculty = []
+            faculty_response = await keyset_page(faculty_query, position, search_query.limit).execute()
+            return faculty_response.data if hasattr(faculty_response, 'data') else []
 
-        # Search profiles
-        profiles = []
-        try:
-            logger.info("Searching profiles...")
-            profiles_response = supabase.table("profiles") \
+        async def fetch_profiles() -> List[Dict]:
+            profiles_query = supabase.table("profiles") \
                 .select("*") \
                 .or_(
                     f"full_name.ilike.%{query}%,"
                     f"department.ilike.%{query}%,"
                     f"institution.ilike.%{query}%,"
                     f"research_interests.cs.{{{query}}}"
-                ) \
-                .limit(search_query.limit) \
-                .execute()
-            
-            profiles = profiles_response.data if hasattr(profiles_response, 'data') else []
-            logger.info(f"Found {len(profiles)} profile results")
-        except Exception as e:
-            logger.error(f"Error searching profiles: {str(e)}")
-            profiles = []
+                )
+            profiles_response = await keyset_page(profiles_query, (positions or {}).get("profiles"), search_query.limit).execute()
+            return profiles_response.data if hasattr(profiles_response, 'data') else []
+
+        publication_columns = """
+            *,
+            faculty_publications (
+                faculty_id,
+                author_position,
+                is_corresponding,
+                faculty (
+                    name,
+                    department,
+                    institution,
+                    irins_profile_url,
+                    email
+                )
+            )
+        """
+
+        async def fetch_publications() -> List[Dict]:
+            position = (positions or {}).get("publications")
+            if mode == "fulltext":
+                return await fetch_ranked("search_publications_ranked", {
+                    "search_query": query,
+                    "departments": filters.get("department") or None,
+                    "institution_keys": institution_keys,
+                    "domains": filters.get("domain") or None,
+                    **keyset_params(position, search_query.limit)
+                }, "publications", publication_columns)
 
-        # Search publications with faculty information
-        publications = []
-        try:
-            logger.info("Searching publications...")
             pub_query = supabase.table("publications") \
-                .select("""
-                    *,
-                    faculty_publications (
-                        faculty_id,
-                        author_position,
-                        is_corresponding,
-                        faculty (
-                            name,
-                            department,
-                            institution,
-                            irins_profile_url,
-                            email
-                        )
-                    )
-                """) \
+                .select(publication_columns) \
                 .or_(
                     f"title.ilike.%{query}%,"
                     f"abstract.ilike.%{query}%,"
@@ -177,20 +258,81 @@ async def search_all(search_query: SearchQuery):
             # Apply filters
             if filters.get("department"):
                 pub_query = pub_query.in_("faculty_publications.faculty.department", filters["department"])
-            if filters.get("institution"):
-                normalized_institutions = [normalize_institution(inst) for inst in filters["institution"]]
-                pub_query = pub_query.or_(
-                    *[f"faculty_publications.faculty.institution.ilike.%{inst}%" for inst in normalized_institutions]
-                )
+            if institution_keys:
+                pub_query = pub_query.in_("faculty_publications.faculty.institution_key", institution_keys)
             if filters.get("domain"):
                 pub_query = pub_query.contains("research_domains", filters["domain"])
                 
-            publications_response = pub_query.limit(search_query.limit).execute()
-            publications = publications_response.data if hasattr(publications_response, 'data') else []
-            logger.info(f"Found {len(publications)} publication results")
-        except Exception as e:
-            logger.error(f"Error searching publications: {str(e)}")
-            publications = []
+            publications_response = await keyset_page(pub_query, position, search_query.limit).execute()
+            return publications_response.data if hasattr(publications_response, 'data') else []
+
+        async def fetch_trends() -> List[Dict]:
+            trends_response = await supabase.table("research_trends") \
+                .select("*") \
+                .or_(f"topic.ilike.%{query}%,category.ilike.%{query}%") \
+                .order("trending_score", desc=True) \
+                .limit(5) \
+                .execute()
+            return trends_response.data if hasattr(trends_response, 'data') else []
+
+        async def fetch_facets() -> Dict[str, Dict[str, int]]:
+            # Every facet's counts come back from one aggregated query
+            facet_response = await supabase.rpc("search_faculty_facets", {
+                "search_query": query,
+                "use_fulltext": mode == "fulltext",
+                "departments": filters.get("department") or None,
+                "institution_keys": institution_keys,
+                "domains": filters.get("domain") or None,
+                "cities": filters.get("city") or None,
+                "states": filters.get("state") or None
+            }).execute()
+            facets = {"departments": {}, "institutions": {}, "domains": {}, "cities": {}, "states": {}}
+            for row in facet_response.data or []:
+                value = row["value"]
+                if row["facet"] == "institutions":
+                    value = institutions.canonical_name(value)
+                counts = facets.setdefault(row["facet"], {})
+                counts[value] = counts.get(value, 0) + row["hits"]
+            return facets
+
+        # Later pages only query the sections the cursor still has rows for;
+        # trends and facet counts are computed with the first page
+        tasks = {
+            "faculty": fetch_faculty,
+            "profiles": fetch_profiles,
+            "publications": fetch_publications
+        }
+        if positions is not None:
+            tasks = {section: task for section, task in tasks.items() if section in positions}
+        else:
+            tasks["trends"] = fetch_trends
+            if search_query.include_facets:
+                tasks["facets"] = fetch_facets
+
+        # The sub-queries are independent, so run them side by side; a
+        # slow or failing one only empties its own section of the response
+        outcome = await fanout.run(tasks, timeouts=SUBQUERY_TIMEOUTS)
+
+        next_positions = {}
+        sections = {}
+        for section in ("faculty", "profiles", "publications"):
+            if section not in tasks:
+                sections[section] = []
+            elif section in outcome.results:
+                ranked = mode == "fulltext" and section != "profiles"
+                sections[section], position = split_page(outcome.results[section], search_query.limit, ranked)
+                if position:
+                    next_positions[section] = position
+            else:
+                # Timed out or failed: the next page retries from the same place
+                sections[section] = []
+                next_positions[section] = (positions or {}).get(section, {})
+        faculty = sections["faculty"]
+        profiles = sections["profiles"]
+        publications = sections["publications"]
+        trends = outcome.results.get("trends", [])
+        logger.info(f"Found {len(faculty)} faculty, {len(profiles)} profile, "
+                    f"{len(publications)} publication and {len(trends)} trend results")
 
         # Format the results
         formatted_results = {
@@ -198,7 +340,7 @@ async def search_all(search_query: SearchQuery):
                 "id": str(f.get("id")),
                 "type": "faculty",
                 "title": f.get("name", ""),
-                "description": f"{f.get('department', '')} at {normalize_institution(f.get('institution', ''))}",
+                "description": f"{f.get('department', '')} at {institutions.canonical_name(f.get('institution', ''))}",
                 "expertise": f.get("expertise", []),
                 "photo_url": f.get("photo_url"),
                 "citations": f.get("citations"),
@@ -208,9 +350,10 @@ async def search_all(search_query: SearchQuery):
                 "irins_profile_url": f.get("irins_profile_url"),
                 "email": f.get("email"),
                 "department": f.get("department", ""),
-                "institution": normalize_institution(f.get("institution", "")),
+                "institution": institutions.canonical_name(f.get("institution", "")),
                 "city": f.get("city", ""),
-                "state": f.get("state", "")
+                "state": f.get("state", ""),
+                "rank": f.get("rank")
             } for f in faculty],
             
             "profiles": [{
@@ -234,9 +377,10 @@ async def search_all(search_query: SearchQuery):
                 "doi": p.get("doi"),
                 "venue": p.get("venue"),
                 "publisher": p.get("publisher"),
-                "citation_count": p.get("citation_count", 0),
+                "citation_count": p.get("citations") or 0,
                 "impact_factor": p.get("impact_factor"),
                 "paper_url": p.get("paper_url"),
+                "rank": p.get("rank"),
                 "authors": [
                     {
                         "name": fp.get("faculty", {}).get("name"),
@@ -250,153 +394,203 @@ async def search_all(search_query: SearchQuery):
         }
 
         # Add research trends if available
-        try:
-            trends_response = supabase.table("research_trends") \
-                .select("*") \
-                .or_(f"topic.ilike.%{query}%,category.ilike.%{query}%") \
-                .order("trending_score.desc") \
-                .limit(5) \
-                .execute()
-            
-            trends = trends_response.data if hasattr(trends_response, 'data') else []
-            if trends:
-                formatted_results["trends"] = [{
-                    "id": str(t.get("id")),
-                    "type": "trend",
-                    "title": t.get("topic", ""),
-                    "description": f"Category: {t.get('category', '')} | Growth Rate: {t.get('growth_rate')}",
-                    "year": t.get("year"),
-                    "quarter": t.get("quarter"),
-                    "publication_count": t.get("publication_count"),
-                    "citation_count": t.get("citation_count"),
-                    "faculty_count": t.get("faculty_count"),
-                    "trending_score": t.get("trending_score")
-                } for t in trends]
-        except Exception as e:
-            logger.error(f"Error searching trends: {str(e)}")
+        if trends:
+            formatted_results["trends"] = [{
+                "id": str(t.get("id")),
+                "type": "trend",
+                "title": t.get("topic", ""),
+                "description": f"Category: {t.get('category', '')} | Growth Rate: {t.get('growth_rate')}",
+                "year": t.get("year"),
+                "quarter": t.get("quarter"),
+                "publication_count": t.get("publication_count"),
+                "citation_count": t.get("citation_count"),
+                "faculty_count": t.get("faculty_count"),
+                "trending_score": t.get("trending_score")
+            } for t in trends]
+
+        # Let clients tell an empty section apart from one that was dropped
+        formatted_results["partial"] = outcome.partial
+        if outcome.partial:
+            formatted_results["incomplete_sections"] = outcome.timed_out + outcome.failed
 
+        if "facets" in outcome.results:
+            formatted_results["facets"] = outcome.results["facets"]
+
+        formatted_results["mode"] = mode
+        formatted_results["next_cursor"] = encode_cursor(mode, next_positions)
         logger.info(f"Returning formatted results with counts - Faculty: {len(formatted_results['faculty'])}, "
                    f"Profiles: {len(formatted_results['profiles'])}, "
                    f"Publications: {len(formatted_results['publications'])}")
 
+        # Partial responses are not cached so a transient timeout is not replayed
+        if not outcome.partial:
+            search_cache.set(cache_key, formatted_results, tags=("faculty", "profiles", "publications", "faculty_publications", "research_trends"), generation=generation)
+
         return formatted_results
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Search error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def fetch_publications_by_faculty(
+    faculty_ids: List[str],
+    domain: Optional[str] = None,
+    limit: int = FACULTY_PUBLICATIONS_LIMIT
+) -> Dict[str, List[Dict]]:
+    """
+    Load the publications of many faculty members with a single query
+    Args:
+        faculty_ids: Faculty to load publications for
+        domain: Only include publications tagged with this research domain
+        limit: Most publications per faculty member, most cited first
+    Returns:
+        Formatted publications grouped by faculty id
+    """
+    if not faculty_ids:
+        return {}
+
+    # Embedding the links under each faculty row lets PostgREST cap them per
+    # faculty member; !inner lets the domain filter on the embedded
+    # publication drop the link row
+    faculty_query = supabase.table("faculty") \
+        .select("""
+            id,
+            faculty_publications (
+                author_position,
+                is_corresponding,
+                publications!inner (
+                    id,
+                    title,
+                    year,
+                    journal,
+                    citations,
+                    doi,
+                    research_domains
+                )
+            )
+        """) \
+        .in_("id", faculty_ids) \
+        .order("publications(citations)", desc=True, reference_table="faculty_publications") \
+        .limit(limit, reference_table="faculty_publications")
+    if domain:
+        faculty_query = faculty_query.contains("faculty_publications.publications.research_domains", [domain])
+
+    faculty_response = await faculty_query.execute()
+    rows = faculty_response.data if hasattr(faculty_response, 'data') else []
+
+    grouped: Dict[str, List[Dict]] = {}
+    for row in rows:
+        for link in row.get("faculty_publications") or []:
+            p = link.get("publications") or {}
+            grouped.setdefault(str(row.get("id")), []).append({
+                "id": str(p.get("id")),
+                "title": p.get("title"),
+                "year": p.get("year"),
+                # Stored as journal/citations; the response keeps its field names
+                "venue": p.get("journal"),
+                "citation_count": p.get("citations") or 0,
+                "paper_url": f"https://doi.org/{p['doi']}" if p.get("doi") else None,
+                "research_domains": p.get("research_domains", []),
+                "is_corresponding": bool(link.get("is_corresponding"))
+            })
+    return grouped
+
 @router.post("/faculty")
 async def search_faculty(search_query: SearchQuery):
     """
     Search faculty profiles with their domain-specific publications
     """
     try:
-        query = search_query.query.lower()
+        query = normalize_query(search_query.query)
         logger.info(f"Searching faculty with query: {query}")
-        
+
+        mode = resolve_search_mode(search_query, query)
+        positions = read_cursor(search_query, mode)
+        cache_key = make_search_key("faculty", query, cursor=search_query.cursor, limit=search_query.limit, mode=mode)
+        cached = search_cache.get(cache_key)
+        generation = search_cache.generation()
+        if cached is not None:
+            return cached
+
+        # Pages come from direct faculty matches ("results") or, when there
+        # are none, from the domain fallback below ("by_domain")
+        next_positions = {}
+        faculty = []
+
         # First search for faculty
-        faculty_response = supabase.table("faculty") \
-            .select("*") \
-            .or_(
-                f"name.ilike.%{query}%,"
-                f"department.ilike.%{query}%,"
-                f"institution.ilike.%{query}%,"
-                f"expertise.cs.{{{query}}}"
-            ) \
-            .execute()
-        
-        faculty = faculty_response.data if hasattr(faculty_response, 'data') else []
+        if positions is None or "results" in positions:
+            position = (positions or {}).get("results")
+            if mode == "fulltext":
+                faculty = await fetch_ranked("search_faculty_ranked", {
+                    "search_query": query,
+                    **keyset_params(position, search_query.limit)
+                }, "faculty")
+            else:
+                faculty_query = supabase.table("faculty") \
+                    .select("*") \
+                    .or_(
+                        f"name.ilike.%{query}%,"
+                        f"department.ilike.%{query}%,"
+                        f"institution.ilike.%{query}%,"
+                        f"expertise.cs.{{{query}}}"
+                    )
+                faculty_response = await keyset_page(faculty_query, position, search_query.limit).execute()
+
+                faculty = faculty_response.data if hasattr(faculty_response, 'data') else []
+            faculty, position = split_page(faculty, search_query.limit, mode == "fulltext")
+            if position:
+                next_positions["results"] = position
         enriched_results = []
 
-        # Function to get domain-specific publications
-        async def get_domain_publications(faculty_id: str, domain: str = None):
-            query = supabase.table("publications") \
-                .select("""
-                    *,
-                    faculty_publications (
-                        faculty_id,
-                        author_position,
-                        is_corresponding
-                    )
-                """) \
-                .eq("faculty_publications.faculty_id", faculty_id)
-            
-            if domain:
-                query = query.contains("research_domains", [domain])
-            
-            publications_response = await query.execute()
-            return publications_response.data if hasattr(publications_response, 'data') else []
+        # Publications for every matched faculty member in one round-trip
+        # (domain-specific if the query could be a domain)
+        publications_by_faculty = await fetch_publications_by_faculty(
+            [f.get("id") for f in faculty if f.get("id") is not None],
+            query if len(query) > 2 else None
+        )
 
-        # Process each faculty member
-        for f in faculty:
-            faculty_id = f.get("id")
-            # Get publications (domain-specific if query matches a domain)
-            publications = await get_domain_publications(faculty_id, query if len(query) > 2 else None)
-            
-            faculty_result = {
-                "id": str(faculty_id),
+        def faculty_result(f: Dict, publications: List[Dict]) -> Dict:
+            return {
+                "id": str(f.get("id")),
                 "type": "faculty",
                 "name": f.get("name", ""),
                 "department": f.get("department", ""),
                 "institution": f.get("institution", ""),
                 "irins_profile_url": f.get("irins_profile_url"),  # IRINS profile URL
-                "publications": [{
-                    "id": str(p.get("id")),
-                    "title": p.get("title"),
-                    "year": p.get("year"),
-                    "venue": p.get("venue"),
-                    "citation_count": p.get("citation_count", 0),
-                    "paper_url": p.get("paper_url"),
-                    "research_domains": p.get("research_domains", []),
-                    "is_corresponding": any(fp.get("is_corresponding") for fp in p.get("faculty_publications", []))
-                } for p in publications]
+                "rank": f.get("rank"),
+                "publications": publications
             }
-            
-            enriched_results.append(faculty_result)
+
+        # Process each faculty member
+        for f in faculty:
+            enriched_results.append(faculty_result(f, publications_by_faculty.get(str(f.get("id")), [])))
         
-        # If searching by domain and no direct faculty matches, search through publications
-        if not enriched_results and len(query) > 2:
-            domain_publications = supabase.table("publications") \
-                .select("""
-                    *,
-                    faculty_publications (
-                        faculty_id,
-                        faculty (*)
-                    )
-                """) \
-                .contains("research_domains", [query]) \
-                .execute()
-            
-            if hasattr(domain_publications, 'data'):
-                faculty_seen = set()
-                for pub in domain_publications.data:
-                    for fp in pub.get("faculty_publications", []):
-                        faculty_data = fp.get("faculty")
-                        if faculty_data and faculty_data.get("id") not in faculty_seen:
-                            faculty_seen.add(faculty_data.get("id"))
-                            # Get complete faculty profile with domain-specific publications
-                            faculty_result = {
-                                "id": str(faculty_data.get("id")),
-            "type": "faculty",
-                                "name": faculty_data.get("name", ""),
-                                "department": faculty_data.get("department", ""),
-                                "institution": faculty_data.get("institution", ""),
-                                "irins_profile_url": faculty_data.get("irins_profile_url"),
-                                "publications": [{
-                                    "id": str(pub.get("id")),
-                                    "title": pub.get("title"),
-                                    "year": pub.get("year"),
-                                    "venue": pub.get("venue"),
-                                    "citation_count": pub.get("citation_count", 0),
-                                    "paper_url": pub.get("paper_url"),
-                                    "research_domains": pub.get("research_domains", []),
-                                    "is_corresponding": any(fp.get("is_corresponding") for fp in pub.get("faculty_publications", []))
-                                }]
-                            }
-                            enriched_results.append(faculty_result)
+        # If searching by domain and no direct faculty matches, list the faculty
+        # with publications in the domain. Pages run over faculty ids, so each
+        # member appears once however many of their publications match.
+        if (positions is None and not enriched_results and len(query) > 2) or "by_domain" in (positions or {}):
+            domain_query = supabase.table("faculty") \
+                .select("*, faculty_publications!inner(publications!inner(research_domains))") \
+                .contains("faculty_publications.publications.research_domains", [query])
+            domain_response = await keyset_page(domain_query, (positions or {}).get("by_domain"), search_query.limit).execute()
+            domain_faculty, position = split_page(domain_response.data or [], search_query.limit, False)
+            if position:
+                next_positions["by_domain"] = position
+
+            domain_publications = await fetch_publications_by_faculty(
+                [f.get("id") for f in domain_faculty if f.get("id") is not None], query
+            )
+            for f in domain_faculty:
+                enriched_results.append(faculty_result(f, domain_publications.get(str(f.get("id")), [])))
         
         logger.info(f"Returning {len(enriched_results)} faculty results")
-        return {"results": enriched_results}
+        response = {"results": enriched_results, "next_cursor": encode_cursor(mode, next_positions)}
+        search_cache.set(cache_key, response, tags=("faculty", "publications", "faculty_publications"), generation=generation)
+        return response
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Faculty search error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -407,16 +601,33 @@ async def search_publications(search_query: SearchQuery):
     Search publications
     """
     try:
-        query = search_query.query.lower()
+        query = normalize_query(search_query.query)
         logger.info(f"Searching publications with query: {query}")
-        
-        response = supabase.table("publications") \
-            .select("*") \
-            .or_(f"title.ilike.%{query}%,abstract.ilike.%{query}%") \
-            .limit(search_query.limit) \
-            .execute()
-        
-        publications = response.data if hasattr(response, 'data') else []
+
+        mode = resolve_search_mode(search_query, query)
+        positions = read_cursor(search_query, mode)
+        cache_key = make_search_key("publications", query, cursor=search_query.cursor, limit=search_query.limit, mode=mode)
+        cached = search_cache.get(cache_key)
+        generation = search_cache.generation()
+        if cached is not None:
+            return cached
+
+        position = (positions or {}).get("results")
+        if positions is not None and position is None:
+            publications = []
+        elif mode == "fulltext":
+            publications = await fetch_ranked("search_publications_ranked", {
+                "search_query": query,
+                **keyset_params(position, search_query.limit)
+            }, "publications")
+        else:
+            pub_query = supabase.table("publications") \
+                .select("*") \
+                .or_(f"title.ilike.%{query}%,abstract.ilike.%{query}%")
+            response = await keyset_page(pub_query, position, search_query.limit).execute()
+            
+            publications = response.data if hasattr(response, 'data') else []
+        publications, position = split_page(publications, search_query.limit, mode == "fulltext")
         
         results = [{
             "id": str(p.get("id")),
@@ -428,14 +639,19 @@ async def search_publications(search_query: SearchQuery):
             "doi": p.get("doi"),
             "venue": p.get("venue"),
             "publisher": p.get("publisher"),
-            "citation_count": p.get("citation_count", 0),
+            "citation_count": p.get("citations") or 0,
             "impact_factor": p.get("impact_factor"),
             "paper_url": p.get("paper_url"),
-            "pdf_url": p.get("pdf_url")
+            "pdf_url": p.get("pdf_url"),
+            "rank": p.get("rank")
         } for p in publications]
         
         logger.info(f"Returning {len(results)} publication results")
-        return {"results": results}
+        response = {"results": results, "next_cursor": encode_cursor(mode, {"results": position} if position else {})}
+        search_cache.set(cache_key, response, tags=("publications",), generation=generation)
+        return response
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Publications search error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -446,16 +662,33 @@ async def search_research(search_query: SearchQuery):
     Search research works
     """
     try:
-        query = search_query.query.lower()
+        query = normalize_query(search_query.query)
         logger.info(f"Searching research works with query: {query}")
-        
-        response = supabase.table("research_works") \
-            .select("*") \
-            .or_(f"title.ilike.%{query}%, description.ilike.%{query}%, domain.ilike.%{query}%, keywords.cs.{{{query}}}") \
-            .limit(search_query.limit) \
-            .execute()
-        
-        research = response.data
+
+        mode = resolve_search_mode(search_query, query)
+        positions = read_cursor(search_query, mode)
+        cache_key = make_search_key("research", query, cursor=search_query.cursor, limit=search_query.limit, mode=mode)
+        cached = search_cache.get(cache_key)
+        generation = search_cache.generation()
+        if cached is not None:
+            return cached
+
+        position = (positions or {}).get("results")
+        if positions is not None and position is None:
+            research = []
+        elif mode == "fulltext":
+            research = await fetch_ranked("search_research_works_ranked", {
+                "search_query": query,
+                **keyset_params(position, search_query.limit)
+            }, "research_works")
+        else:
+            research_query = supabase.table("research_works") \
+                .select("*") \
+                .or_(f"title.ilike.%{query}%, description.ilike.%{query}%, domain.ilike.%{query}%, keywords.cs.{{{query}}}")
+            response = await keyset_page(research_query, position, search_query.limit).execute()
+            
+            research = response.data
+        research, position = split_page(research, search_query.limit, mode == "fulltext")
         logger.info(f"Found {len(research)} research results")
         
         results = [{
@@ -466,52 +699,182 @@ async def search_research(search_query: SearchQuery):
             "researcher": r.get("researcher"),
             "domain": r.get("domain"),
             "status": r.get("status"),
-            "keywords": r.get("keywords", [])
+            "keywords": r.get("keywords", []),
+            "rank": r.get("rank")
         } for r in research]
         
-        return {"results": results}
+        response = {"results": results, "next_cursor": encode_cursor(mode, {"results": position} if position else {})}
+        search_cache.set(cache_key, response, tags=("research_works",), generation=generation)
+        return response
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Research search error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/semantic")
+async def search_semantic(semantic_query: SemanticQuery):
+    """
+    Semantic search: publications or faculty nearest to the query in
+    embedding space, optionally blended with the full-text score
+    """
+    try:
+        query = normalize_query(semantic_query.query)
+        if not query:
+            raise HTTPException(status_code=400, detail="Query must not be empty")
+        target = semantic_query.target
+        if target not in SEMANTIC_TARGETS:
+            raise HTTPException(status_code=400, detail=f"Unknown semantic search target: {target}")
+        logger.info(f"Semantic search over {target} with query: {query}")
+
+        options = {"text_weight": semantic_query.text_weight, "min_similarity": semantic_query.min_similarity}
+        cache_key = make_search_key("semantic", query, filters=options, limit=semantic_query.limit, mode=target)
+        cached = search_cache.get(cache_key)
+        generation = search_cache.generation()
+        if cached is not None:
+            return cached
+
+        try:
+            vector = (await embed_texts([query]))[0]
+        except SchedulerOverloaded as e:
+            logger.warning(f"Rejecting semantic search: {str(e)}")
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+        matches = await semantic_match(
+            supabase, target, vector, semantic_query.limit,
+            query_text=query, **options
+        )
+        rows = {}
+        if matches:
+            response = await supabase.table(target).select(RESULT_COLUMNS[target]).in_("id", [m["id"] for m in matches]).execute()
+            rows = {str(row.get("id")): row for row in response.data or []}
+
+        results = []
+        for match in matches:
+            row = rows.get(str(match["id"]))
+            if row is None:
+                continue
+            results.append({
+                **row,
+                "id": str(row.get("id")),
+                "type": "publication" if target == "publications" else "faculty",
+                "similarity": match["similarity"],
+                "text_rank": match["text_rank"],
+                "score": match["score"]
+            })
+
+        logger.info(f"Returning {len(results)} semantic {target} results")
+        response = {"results": results, "backend": SEMANTIC_SEARCH_BACKEND}
+        search_cache.set(cache_key, response, tags=(target,), generation=generation)
+        return response
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Semantic search error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def fetch_similar(kind: str, item_id: str, limit: int) -> Dict:
+    """
+    Look up an item's precomputed neighbour list (one primary-key read)
+    and load the first limit neighbours, most similar first
+    """
+    cache_key = make_search_key("similar", item_id, limit=limit, mode=kind)
+    cached = search_cache.get(cache_key)
+    generation = search_cache.generation()
+    if cached is not None:
+        return cached
+
+    table, key = NEIGHBOR_TABLES[kind]
+    response = await supabase.table(table).select("neighbor_ids,similarities").eq(key, item_id).limit(1).execute()
+    if not response.data:
+        raise HTTPException(status_code=404, detail=f"No similar {kind} computed for {item_id}")
+    neighbors = list(zip(response.data[0]["neighbor_ids"], response.data[0]["similarities"]))[:limit]
+
+    rows = {}
+    if neighbors:
+        response = await supabase.table(kind).select(RESULT_COLUMNS[kind]).in_("id", [n for n, _ in neighbors]).execute()
+        rows = {str(row.get("id")): row for row in response.data or []}
+    results = [
+        {**rows[str(neighbor_id)], "id": str(neighbor_id), "similarity": similarity}
+        for neighbor_id, similarity in neighbors if str(neighbor_id) in rows
+    ]
+
+    response = {"id": item_id, "results": results}
+    search_cache.set(cache_key, response, tags=(table, kind), generation=generation)
+    return response
+
+@router.get("/publications/{publication_id}/similar")
+async def similar_publications(publication_id: UUID, limit: int = Query(10, ge=1, le=NEIGHBORS_K)):
+    """
+    Publications most similar to a publication, by embedding
+    """
+    try:
+        return await fetch_similar("publications", str(publication_id), limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Similar publications error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/faculty/{faculty_id}/similar")
+async def similar_faculty(faculty_id: UUID, limit: int = Query(10, ge=1, le=NEIGHBORS_K)):
+    """
+    Faculty with the most similar research (interests and publications)
+    """
+    try:
+        return await fetch_similar("faculty", str(faculty_id), limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Similar faculty error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Hit/miss counters and occupancy of the search result cache
+    """
+    return search_cache.stats()
+
 @router.post("/classify-domain")
 async def classify_domain(texts: List[str]):
     """
-    Classify research domains for given texts
+    Classify research domains for given texts, streamed back as NDJSON
+    with one line per text in the order results complete
     """
+    logger.info(f"Classifying {len(texts)} texts")
+
+    # More texts than the queue can ever hold would never succeed on retry
+    scheduler = get_domain_scheduler()
+    if len(texts) > scheduler.max_queue_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {scheduler.max_queue_size} texts can be classified per request"
+        )
+
+    # Shed load up front, while a proper status code can still be sent
     try:
-        logger.info(f"Classifying {len(texts)} texts")
-        domains = await classify_research_domain(texts)
-        logger.info(f"Successfully classified domains")
-        return {"domains": domains}
-    except Exception as e:
-        logger.error(f"Domain classification error: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e)) 
+        scheduler.check_capacity(len(texts))
+    except SchedulerOverloaded as e:
+        logger.warning(f"Rejecting classification request: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
 
-def normalize_institution(institution: str) -> str:
-    """Normalize institution names to handle variations"""
-    if not institution:
-        return ""
-        
-    # Convert to lowercase for comparison
-    inst_lower = institution.lower().strip()
-    
-    # Define common variations
-    variations = {
-        "m s ramaiah institute of technology": [
-            "m s ramaiah institute of technology",
-            "m.s. ramaiah institute of technology",
-            "ms ramaiah institute of technology",
-            "ramaiah institute of technology",
-            "msrit",
-            "rit bangalore"
-        ],
-        # Add more institutions as needed
-    }
-    
-    # Check if the institution matches any variation
-    for standard_name, variants in variations.items():
-        if inst_lower in variants or any(v in inst_lower for v in variants):
-            return "M S Ramaiah Institute of Technology, Bangalore"
-            
-    return institution  # Return original if no match found 
\ No newline at end of file
+    async def stream_results():
+        try:
+            async for result in classify_research_domain(texts):
+                yield json.dumps(result) + "\n"
+        except Exception as e:
+            logger.error(f"Domain classification error: {str(e)}")
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+@router.get("/classify-domain/stats")
+async def get_classification_stats():
+    """
+    Queue depth, batch-size histogram and latency of the inference scheduler,
+    plus how many texts each classifier tier answered
+    """
+    stats = get_domain_scheduler().stats()
+    stats["tiers"] = dict(get_domain_classifier().tier_counts)
+    return stats
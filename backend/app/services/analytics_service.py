@@ -1,78 +1,61 @@
-from typing import Dict, List
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
 from ..database.supabase import get_supabase_client
 
+logger = logging.getLogger(__name__)
+
+# Rebuild interval (seconds), to pick up writes made outside ingestion
+ANALYTICS_SNAPSHOT_TTL = float(os.getenv("ANALYTICS_SNAPSHOT_TTL", "600"))
+
+
 class AnalyticsService:
     def __init__(self):
         self.supabase = get_supabase_client()
 
     async def get_research_analytics(self) -> Dict:
-        """Get research analytics data including metrics, trends, and department statistics"""
+        """
+        Get research analytics data including metrics, trends, and department
+        statistics. The grouping is done by the analytics views (migration
+        008), so the work here does not depend on the number of faculty.
+        """
         try:
-            # Get publication trends and research areas
-            trends_response = await self.supabase.table('research_trends').select(
-                'year, publication_count, citation_count, trending_score, topic, growth_rate'
-            ).order('year', desc=False).execute()
-            
+            trends_response, departments_response, metrics_response, top_research_response = await asyncio.gather(
+                self.supabase.table('analytics_publication_trends').select('year, publications, citations').order('year').execute(),
+                self.supabase.table('analytics_department_stats').select('department, faculty_count, citations').order('department').execute(),
+                self.supabase.table('analytics_metrics').select('*').limit(1).execute(),
+                self.supabase.table('research_trends').select(
+                    'topic, trending_score, growth_rate'
+                ).order('trending_score', desc=True).limit(10).execute()
+            )
+
             if not trends_response.data:
                 raise ValueError("No research trends data found")
-
-            # Get faculty metrics
-            faculty_response = await self.supabase.table('faculty').select(
-                'department, citations, h_index'
-            ).execute()
-            
-            if not faculty_response.data:
+            metrics = metrics_response.data[0] if metrics_response.data else {}
+            if not metrics.get('total_faculty'):
                 raise ValueError("No faculty data found")
 
-            # Process trends data
-            years_data = {}
-            for trend in trends_response.data:
-                year = trend.get('year')
-                if year not in years_data:
-                    years_data[year] = {
-                        'publications': 0,
-                        'citations': 0
-                    }
-                years_data[year]['publications'] += trend.get('publication_count', 0)
-                years_data[year]['citations'] += trend.get('citation_count', 0)
-
-            # Process department statistics
-            department_stats = {}
-            total_citations = 0
-            total_h_index = 0
-            faculty_count = len(faculty_response.data)
-
-            for faculty in faculty_response.data:
-                dept = faculty.get('department')
-                if dept:
-                    if dept not in department_stats:
-                        department_stats[dept] = {'count': 0, 'citations': 0}
-                    department_stats[dept]['count'] += 1
-                    department_stats[dept]['citations'] += faculty.get('citations', 0)
-                total_citations += faculty.get('citations', 0)
-                total_h_index += faculty.get('h_index', 0)
-
-            # Get top research areas
-            top_research_response = await self.supabase.table('research_trends').select(
-                'topic, trending_score, growth_rate'
-            ).order('trending_score', desc=True).limit(10).execute()
-
             return {
                 'facultyByDepartment': [
                     {
-                        'department': dept,
-                        'count': stats['count'],
-                        'citations': stats['citations']
+                        'department': row['department'],
+                        'count': row['faculty_count'],
+                        'citations': row['citations']
                     }
-                    for dept, stats in department_stats.items()
+                    for row in departments_response.data or []
                 ],
                 'publicationTrends': [
                     {
-                        'year': year,
-                        'publications': data['publications'],
-                        'citations': data['citations']
+                        'year': row['year'],
+                        'publications': row['publications'],
+                        'citations': row['citations']
                     }
-                    for year, data in sorted(years_data.items())
+                    for row in trends_response.data
                 ],
                 'topResearchAreas': [
                     {
@@ -83,13 +66,65 @@ class AnalyticsService:
                     for area in (top_research_response.data or [])
                 ],
                 'metrics': {
-                    'totalCitations': total_citations,
-                    'averageHIndex': round(total_h_index / faculty_count if faculty_count else 0, 1),
-                    'totalPublications': sum(data['publications'] for data in years_data.values()),
-                    'totalFaculty': faculty_count
+                    'totalCitations': metrics['total_citations'],
+                    'averageHIndex': round(metrics['average_h_index'] or 0, 1),
+                    'totalPublications': metrics['total_publications'],
+                    'totalFaculty': metrics['total_faculty']
                 }
             }
 
         except Exception as e:
-            print(f"Error fetching analytics data: {str(e)}")
+            logger.error(f"Error fetching analytics data: {str(e)}")
             raise
+
+
+class AnalyticsSnapshot:
+    """
+    The last computed analytics response and its ETag.
+
+    Requests are served from memory; the response is recomputed on the first
+    request after ingestion invalidates it or after the TTL, one computation
+    at a time. Failures are not cached.
+    """
+
+    def __init__(self, ttl: float = ANALYTICS_SNAPSHOT_TTL):
+        self.ttl = ttl
+        self._build_lock = asyncio.Lock()
+        self._snapshot: Optional[Tuple[Dict, str]] = None
+        self._built_at: Optional[float] = None
+        # Bumped by invalidate(), so a computation that overlapped a write is not cached
+        self._generation = 0
+
+    @property
+    def fresh(self) -> bool:
+        return self._snapshot is not None and time.monotonic() - self._built_at < self.ttl
+
+    def invalidate(self):
+        """Recompute on the next request (called after writes to faculty or research_trends)"""
+        self._generation += 1
+        self._built_at = None
+        self._snapshot = None
+
+    async def get(self, compute: Callable[[], Awaitable[Dict]]) -> Tuple[Dict, str]:
+        """Return the analytics response and its ETag, computing it through compute when stale"""
+        snapshot = self._snapshot
+        if snapshot is not None and self.fresh:
+            return snapshot
+
+        # Requests queued behind a computation reuse its result
+        async with self._build_lock:
+            if self.fresh:
+                return self._snapshot
+            generation = self._generation
+            data = await compute()
+            digest = hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+            snapshot = (data, f'"{digest}"')
+            # Invalidated while computing: the result may predate the write, serve it but don't keep it
+            if generation == self._generation:
+                self._snapshot = snapshot
+                self._built_at = time.monotonic()
+            return snapshot
+
+
+# Shared snapshot behind /api/analytics/research, invalidated by ingestion
+analytics_snapshot = AnalyticsSnapshot()
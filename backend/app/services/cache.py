@@ -0,0 +1,157 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "1024"))
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "300"))
+
+
+class TTLCache:
+    """
+    Thread-safe, size-bounded LRU cache whose entries expire after a TTL.
+
+    Entries can be tagged (e.g. with the tables a result was read from) so
+    that writers can drop exactly the entries their changes affect. Readers
+    take generation() before computing a value and pass it to set(), which
+    then skips values that an invalidation of their tags may have outdated.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any, frozenset]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # Bumped by every invalidation; tag -> generation it was last invalidated at,
+        # for the maxsize most recent tags. Older ones count as invalidated at _pruned_at.
+        self._generation = 0
+        self._invalidated_at: "OrderedDict[str, int]" = OrderedDict()
+        self._pruned_at = -1
+        self.stale_sets = 0
+
+    def generation(self) -> int:
+        """Current invalidation generation, to pass to set() for a value about to be computed"""
+        with self._lock:
+            return self._generation
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value, _ = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[str] = (), generation: Optional[int] = None):
+        """
+        Store value under key, evicting the least recently used entries if full
+        Args:
+            generation: generation() taken before value was computed; if any
+                of tags was invalidated since, value is not stored
+        """
+        tags = frozenset(tags)
+        with self._lock:
+            if generation is not None and (
+                self._pruned_at >= generation
+                or any(self._invalidated_at.get(tag, -1) >= generation for tag in tags)
+            ):
+                self.stale_sets += 1
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value, tags)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> bool:
+        """Drop one entry; returns whether it was cached"""
+        with self._lock:
+            removed = self._entries.pop(key, None) is not None
+            if removed:
+                self.invalidations += 1
+            return removed
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        """Drop every entry tagged with any of the given tags"""
+        tags = set(tags)
+        with self._lock:
+            for tag in tags:
+                self._invalidated_at[tag] = self._generation
+                self._invalidated_at.move_to_end(tag)
+            while len(self._invalidated_at) > self.maxsize:
+                _, pruned = self._invalidated_at.popitem(last=False)
+                self._pruned_at = max(self._pruned_at, pruned)
+            self._generation += 1
+            stale = [key for key, (_, _, entry_tags) in self._entries.items() if entry_tags & tags]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+        if stale:
+            logger.info(f"Invalidated {len(stale)} cached entries for {sorted(tags)}")
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "stale_sets": self.stale_sets
+            }
+
+
+def _normalize_filters(filters: Optional[Dict]) -> Tuple:
+    """Canonical, hashable form of a filters dict; empty filters are dropped"""
+    normalized = []
+    for name, value in (filters or {}).items():
+        if value in (None, "", [], ()):
+            continue
+        if isinstance(value, (list, tuple, set)):
+            value = tuple(sorted(str(v).strip() for v in value))
+        else:
+            value = str(value).strip()
+        normalized.append((name, value))
+    return tuple(sorted(normalized))
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase a search query and collapse its whitespace"""
+    return " ".join(query.lower().split())
+
+
+def make_search_key(endpoint: str, query: str, filters: Optional[Dict] = None, cursor: Optional[str] = None, limit: int = 10, mode: str = "") -> Tuple:
+    """Build a cache key from the normalized (query, filters, cursor, limit) of a search"""
+    return (endpoint, mode, normalize_query(query), _normalize_filters(filters), cursor or "", limit)
+
+
+# Shared cache for search endpoint responses, tagged by the tables they read
+search_cache = TTLCache(maxsize=SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL)
@@ -0,0 +1,185 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..ml.domain_classifier import RESEARCH_DOMAINS
+from .institutions import get_institution_registry
+
+logger = logging.getLogger(__name__)
+
+# Full rebuild interval (seconds), to pick up writes made outside the API
+FACET_INDEX_TTL = float(os.getenv("FACET_INDEX_TTL", "3600"))
+FACET_SCAN_PAGE_SIZE = int(os.getenv("FACET_SCAN_PAGE_SIZE", "1000"))
+
+# Response key -> faculty column
+FACET_FIELDS = {
+    "departments": "department",
+    "institutions": "institution",
+    "cities": "city",
+    "states": "state"
+}
+FACET_COLUMNS = "id, department, institution, city, state, expertise"
+
+
+class FacetIndex:
+    """
+    In-memory value counts of the faculty filter columns.
+
+    Built from one scan of the faculty table and then kept current by
+    ingestion through update(), which moves a faculty member's counts from
+    their previous values to the new ones. Updates made while a scan is
+    running are replayed over its rows, since the scan may have read the
+    row before the change. The rendered response and its ETag are cached
+    until the counts change, so serving /filter-options does not depend on
+    the size of the faculty table.
+    """
+
+    def __init__(self, domains: Iterable[str], ttl: float = FACET_INDEX_TTL):
+        self.domains = sorted(domains)
+        self._domain_set = frozenset(self.domains)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._build_lock = asyncio.Lock()
+        self._counts: Dict[str, Counter] = {}
+        self._rows: Dict[str, Tuple] = {}
+        self._built_at: Optional[float] = None
+        self._snapshot: Optional[Tuple[Dict, str]] = None
+        # Changes seen while a scan runs, as (faculty id, row or None if removed)
+        self._scanning = False
+        self._replay: List[Tuple[str, Optional[Dict]]] = []
+
+    @property
+    def loaded(self) -> bool:
+        return self._built_at is not None and time.monotonic() - self._built_at < self.ttl
+
+    def _facet_values(self, row: Dict) -> Tuple:
+        # Spellings of one institution are counted under its canonical name
+        canonical_name = get_institution_registry().canonical_name
+        values = tuple(
+            (canonical_name(row.get(column)) if column == "institution" else row.get(column)) or None
+            for column in FACET_FIELDS.values()
+        )
+        expertise = row.get("expertise") or []
+        domains = tuple(sorted(d for d in set(expertise) if d in self._domain_set))
+        return values + (domains,)
+
+    def _count(self, values: Tuple, delta: int):
+        for key, value in zip(FACET_FIELDS, values):
+            if value:
+                self._counts[key][value] += delta
+                if self._counts[key][value] <= 0:
+                    del self._counts[key][value]
+        for domain in values[-1]:
+            self._counts["domains"][domain] += delta
+            if self._counts["domains"][domain] <= 0:
+                del self._counts["domains"][domain]
+
+    def rebuild(self, rows: Iterable[Dict]):
+        """Replace the index with counts over the given faculty rows, then replay changes made during the scan"""
+        with self._lock:
+            self._counts = {key: Counter() for key in list(FACET_FIELDS) + ["domains"]}
+            self._rows = {}
+            for row in rows:
+                values = self._facet_values(row)
+                self._rows[str(row.get("id"))] = values
+                self._count(values, 1)
+            for faculty_id, row in self._replay:
+                if row is None:
+                    self._remove(faculty_id)
+                else:
+                    self._update(faculty_id, row)
+            self._replay = []
+            self._scanning = False
+            self._built_at = time.monotonic()
+            self._snapshot = None
+        logger.info(f"Built facet index over {len(self._rows)} faculty")
+
+    def _update(self, faculty_id: str, row: Dict):
+        values = self._facet_values(row)
+        previous = self._rows.get(faculty_id)
+        if previous == values:
+            return
+        if previous is not None:
+            self._count(previous, -1)
+        self._count(values, 1)
+        self._rows[faculty_id] = values
+        self._snapshot = None
+
+    def _remove(self, faculty_id: str):
+        previous = self._rows.pop(faculty_id, None)
+        if previous is not None:
+            self._count(previous, -1)
+            self._snapshot = None
+
+    def update(self, row: Dict):
+        """Apply an inserted or updated faculty row to the counts"""
+        faculty_id = str(row.get("id"))
+        with self._lock:
+            if self._scanning:
+                self._replay.append((faculty_id, dict(row)))
+            if self._built_at is not None:
+                self._update(faculty_id, row)
+
+    def remove(self, faculty_id: Any):
+        """Drop a deleted faculty member from the counts"""
+        with self._lock:
+            if self._scanning:
+                self._replay.append((str(faculty_id), None))
+            self._remove(str(faculty_id))
+
+    async def snapshot(self, load_rows: Callable[[], Awaitable[List[Dict]]]) -> Tuple[Dict, str]:
+        """
+        Return the filter options response and its ETag, scanning the
+        faculty table through load_rows only when the index is missing or stale
+        """
+        if not self.loaded:
+            # One scan at a time; requests queued behind it reuse its result
+            async with self._build_lock:
+                if not self.loaded:
+                    with self._lock:
+                        self._scanning = True
+                    try:
+                        rows = await load_rows()
+                    except BaseException:
+                        with self._lock:
+                            self._scanning = False
+                            self._replay = []
+                        raise
+                    self.rebuild(rows)
+
+        with self._lock:
+            if self._snapshot is None:
+                options = {key: sorted(self._counts[key]) for key in FACET_FIELDS}
+                # Every known domain stays selectable, even with no faculty yet
+                options["domains"] = list(self.domains)
+                options["counts"] = {
+                    key: dict(sorted(counter.items())) for key, counter in self._counts.items()
+                }
+                digest = hashlib.sha1(json.dumps(options, sort_keys=True).encode("utf-8")).hexdigest()
+                self._snapshot = (options, f'"{digest}"')
+            return self._snapshot
+
+
+async def scan_faculty_facets(client) -> List[Dict]:
+    """Read the facet columns of every faculty row, a page at a time"""
+    rows: List[Dict] = []
+    while True:
+        response = await client.table("faculty") \
+            .select(FACET_COLUMNS) \
+            .order("id") \
+            .range(len(rows), len(rows) + FACET_SCAN_PAGE_SIZE - 1) \
+            .execute()
+        page = response.data if hasattr(response, 'data') else []
+        rows.extend(page)
+        if len(page) < FACET_SCAN_PAGE_SIZE:
+            return rows
+
+
+# Shared index behind /filter-options, updated by faculty ingestion
+facet_index = FacetIndex(RESEARCH_DOMAINS)
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SUBQUERY_TIMEOUT = float(os.getenv("SEARCH_SUBQUERY_TIMEOUT", "5"))
+FANOUT_MAX_WORKERS = int(os.getenv("SEARCH_FANOUT_WORKERS", "16"))
+
+
+class FanOutResult:
+    """Outcome of a fan-out: per-task results plus the tasks that did not finish"""
+
+    def __init__(self):
+        self.results: Dict[str, Any] = {}
+        self.timed_out: List[str] = []
+        self.failed: List[str] = []
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.timed_out or self.failed)
+
+
+class FanOutExecutor:
+    """
+    Run independent sub-queries concurrently: coroutine functions on the
+    event loop, blocking callables on a bounded thread pool.
+
+    Every task gets its own timeout. A task that times out or raises does not
+    fail the whole fan-out; its name is recorded on the result and the caller
+    decides what to substitute, so overall latency tracks the slowest task
+    that finishes in time rather than the sum of all of them.
+    """
+
+    def __init__(self, max_workers: int = FANOUT_MAX_WORKERS, default_timeout: float = DEFAULT_SUBQUERY_TIMEOUT):
+        self.default_timeout = default_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="search-fanout")
+
+    async def _run_task(self, name: str, func: Callable[[], Any], timeout: float) -> Any:
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            if asyncio.iscoroutinefunction(func):
+                # Cancelled on timeout, which also releases its connection
+                return await asyncio.wait_for(func(), timeout)
+            # A timed-out thread cannot be interrupted; it finishes in the
+            # background and its result is discarded. The pool bound keeps
+            # slow upstreams from piling up unbounded threads.
+            return await asyncio.wait_for(loop.run_in_executor(self._executor, func), timeout)
+        finally:
+            logger.debug(f"Sub-query {name} finished in {time.perf_counter() - started:.3f}s")
+
+    async def run(self, tasks: Dict[str, Callable[[], Any]], timeouts: Optional[Dict[str, float]] = None) -> FanOutResult:
+        """
+        Run all tasks concurrently
+        Args:
+            tasks: Mapping of task name to a zero-argument coroutine function or blocking callable
+            timeouts: Optional per-task timeouts in seconds
+        Returns:
+            FanOutResult with the results of the tasks that completed
+        """
+        timeouts = timeouts or {}
+        outcome = FanOutResult()
+        names = list(tasks)
+
+        results = await asyncio.gather(
+            *[self._run_task(name, tasks[name], timeouts.get(name, self.default_timeout)) for name in names],
+            return_exceptions=True
+        )
+
+        for name, result in zip(names, results):
+            if isinstance(result, asyncio.TimeoutError):
+                logger.warning(f"Sub-query {name} timed out after {timeouts.get(name, self.default_timeout)}s")
+                outcome.timed_out.append(name)
+            elif isinstance(result, Exception):
+                logger.error(f"Sub-query {name} failed: {str(result)}")
+                outcome.failed.append(name)
+            else:
+                outcome.results[name] = result
+
+        return outcome
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
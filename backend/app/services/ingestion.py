@@ -0,0 +1,285 @@
+import asyncio
+import logging
+import os
+import random
+import re
+import time
+from typing import Any, Dict, List
+
+import httpx
+
+from ..database.postgrest import AsyncPostgrestClient, PostgrestError
+from ..ml.embeddings import embed_texts, faculty_text, publication_text, to_pgvector
+from .analytics_service import analytics_snapshot
+from .cache import search_cache
+from .facets import facet_index
+from .neighbors import NEIGHBOR_TABLES, NEIGHBORS_REFRESH_ON_INGEST, similarity_index
+from .semantic import vector_indexes
+from .trends import TREND_KEY, TRENDS_REFRESH_ON_INGEST, trend_engine
+
+logger = logging.getLogger(__name__)
+
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "500"))
+INGEST_MAX_RETRIES = int(os.getenv("INGEST_MAX_RETRIES", "3"))
+INGEST_RETRY_BACKOFF = float(os.getenv("INGEST_RETRY_BACKOFF", "0.5"))
+# Faculty records buffered before the pipeline writes them out
+INGEST_FACULTY_BATCH = int(os.getenv("INGEST_FACULTY_BATCH", "200"))
+# Compute embeddings for semantic search while storing rows
+INGEST_EMBEDDINGS = os.getenv("INGEST_EMBEDDINGS", "true").lower() == "true"
+
+# Natural keys the upserts resolve conflicts on (unique indexes from 005)
+FACULTY_KEY = ("name", "department")
+PUBLICATION_KEY = "dedupe_key"
+LINK_KEY = ("faculty_id", "publication_id")
+
+_NON_ALPHANUMERIC = re.compile(r"[^0-9a-z]+")
+
+
+def publication_key(publication: Dict) -> str:
+    """DOI when known, otherwise normalized title plus year"""
+    doi = (publication.get("doi") or "").strip().lower()
+    if doi:
+        return f"doi:{doi}"
+    title = _NON_ALPHANUMERIC.sub(" ", (publication.get("title") or "").lower()).strip()
+    return f"title:{title}:{publication.get('year') or ''}"
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, PostgrestError):
+        return error.status_code >= 500 or error.status_code in (408, 429)
+    return isinstance(error, (httpx.TransportError, asyncio.TimeoutError))
+
+
+class BulkUpserter:
+    """
+    Upsert rows into one table in chunks, retrying transient failures.
+
+    Rows are written chunk_size at a time in a single request each. A chunk
+    that fails with a server or network error is retried with exponential
+    backoff and jitter; one that still fails is counted and skipped so the
+    rest of the ingest carries on.
+    """
+
+    def __init__(
+        self,
+        client: AsyncPostgrestClient,
+        table: str,
+        on_conflict: str,
+        chunk_size: int = INGEST_CHUNK_SIZE,
+        max_retries: int = INGEST_MAX_RETRIES,
+        backoff: float = INGEST_RETRY_BACKOFF
+    ):
+        self.client = client
+        self.table = table
+        self.on_conflict = on_conflict
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.rows_written = 0
+        self.rows_failed = 0
+        self.chunks = 0
+        self.retries = 0
+        self.seconds = 0.0
+
+    async def _upsert_chunk(self, chunk: List[Dict]) -> List[Dict]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self.client.table(self.table) \
+                    .upsert(chunk, on_conflict=self.on_conflict) \
+                    .execute()
+                return response.data or []
+            except Exception as e:
+                if attempt == self.max_retries or not _is_retryable(e):
+                    raise
+                self.retries += 1
+                delay = self.backoff * (2 ** attempt) * (0.5 + random.random())
+                logger.warning(f"Upsert of {len(chunk)} {self.table} rows failed ({str(e)}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+        return []
+
+    async def upsert(self, rows: List[Dict]) -> List[Dict]:
+        """
+        Write rows in chunks
+        Returns:
+            The stored rows (with their ids) of every chunk that succeeded
+        """
+        written: List[Dict] = []
+        started = time.perf_counter()
+        for start in range(0, len(rows), self.chunk_size):
+            chunk = rows[start:start + self.chunk_size]
+            self.chunks += 1
+            try:
+                stored = await self._upsert_chunk(chunk)
+                written.extend(stored)
+                self.rows_written += len(chunk)
+            except Exception as e:
+                self.rows_failed += len(chunk)
+                logger.error(f"Giving up on {len(chunk)} {self.table} rows: {str(e)}")
+        self.seconds += time.perf_counter() - started
+        return written
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rows_written": self.rows_written,
+            "rows_failed": self.rows_failed,
+            "chunks": self.chunks,
+            "retries": self.retries,
+            "seconds": round(self.seconds, 3),
+            "rows_per_sec": round(self.rows_written / self.seconds, 1) if self.seconds else None
+        }
+
+
+class FacultyIngestion:
+    """
+    Buffer scraped faculty with their publications and store them in bulk.
+
+    flush() upserts the buffered faculty, maps their natural keys to the
+    stored ids, upserts the publications (deduplicated across faculty) and
+    then the faculty-publication links, so a batch costs a handful of
+    requests instead of one per row.
+    """
+
+    def __init__(
+        self,
+        client: AsyncPostgrestClient,
+        chunk_size: int = INGEST_CHUNK_SIZE,
+        embeddings: bool = INGEST_EMBEDDINGS,
+        neighbors: bool = NEIGHBORS_REFRESH_ON_INGEST,
+        trends: bool = TRENDS_REFRESH_ON_INGEST
+    ):
+        self.client = client
+        self.embeddings = embeddings
+        self.neighbors = neighbors
+        self.trends = trends
+        self.faculty = BulkUpserter(client, "faculty", ",".join(FACULTY_KEY), chunk_size)
+        self.publications = BulkUpserter(client, "publications", PUBLICATION_KEY, chunk_size)
+        self.links = BulkUpserter(client, "faculty_publications", ",".join(LINK_KEY), chunk_size)
+        self.neighbor_lists = {
+            kind: BulkUpserter(client, table, key, chunk_size) for kind, (table, key) in NEIGHBOR_TABLES.items()
+        }
+        self.research_trends = BulkUpserter(client, "research_trends", TREND_KEY, chunk_size)
+        self._faculty_rows: Dict[tuple, Dict] = {}
+        self._publication_rows: Dict[str, Dict] = {}
+        self._authorship: Dict[tuple, List[str]] = {}
+
+    @property
+    def pending(self) -> int:
+        return len(self._faculty_rows)
+
+    @property
+    def rows_failed(self) -> int:
+        return self.faculty.rows_failed + self.publications.rows_failed + self.links.rows_failed
+
+    def add(self, faculty: Dict):
+        """Buffer one scraped faculty record (publications already classified)"""
+        row = {
+            'name': faculty['name'],
+            'department': faculty['department'],
+            'designation': faculty.get('designation', ''),
+            'email': faculty.get('email', ''),
+            'research_interests': faculty.get('research_interests', []),
+            'image_url': faculty.get('image_url', faculty.get('photo_url')),
+            'irins_profile_url': faculty.get('profile_url')
+        }
+        key = tuple(row[column] for column in FACULTY_KEY)
+        self._faculty_rows[key] = row
+
+        keys = self._authorship.setdefault(key, [])
+        for pub in faculty.get('publications', []):
+            pub_key = publication_key(pub)
+            # Co-authors scraped separately share one publication row
+            self._publication_rows[pub_key] = {
+                'title': pub['title'],
+                'authors': pub.get('authors', []),
+                'journal': pub.get('journal') or pub.get('venue') or '',
+                'year': pub.get('year') or None,
+                'doi': pub.get('doi', None),
+                'research_domains': pub.get('research_domains', ['Other']),
+                PUBLICATION_KEY: pub_key
+            }
+            if pub_key not in keys:
+                keys.append(pub_key)
+
+    async def flush(self):
+        """Write everything buffered so far"""
+        if not self._faculty_rows:
+            return
+        faculty_rows, self._faculty_rows = list(self._faculty_rows.values()), {}
+        publication_rows, self._publication_rows = list(self._publication_rows.values()), {}
+        authorship, self._authorship = self._authorship, {}
+        if self.embeddings:
+            await self._embed(faculty_rows, publication_rows, authorship)
+
+        stored_faculty = await self.faculty.upsert(faculty_rows)
+        faculty_ids = {tuple(row.get(column) for column in FACULTY_KEY): row['id'] for row in stored_faculty}
+        for row in stored_faculty:
+            facet_index.update(row)
+            vector_indexes["faculty"].update(row)
+
+        stored_publications = await self.publications.upsert(publication_rows)
+        publication_ids = {row.get(PUBLICATION_KEY): row['id'] for row in stored_publications}
+        for row in stored_publications:
+            vector_indexes["publications"].update(row)
+
+        links = [
+            {'faculty_id': faculty_ids[key], 'publication_id': publication_ids[pub_key]}
+            for key, pub_keys in authorship.items() if key in faculty_ids
+            for pub_key in pub_keys if pub_key in publication_ids
+        ]
+        await self.links.upsert(links)
+        if self.neighbors:
+            await self._refresh_neighbors(stored_publications, stored_faculty, links)
+        if self.trends:
+            await self._refresh_trends(stored_publications, links)
+
+        # Cached searches over these tables may now be stale
+        search_cache.invalidate(["faculty", "publications", "faculty_publications", "research_trends",
+                                 *(t for t, _ in NEIGHBOR_TABLES.values())])
+        analytics_snapshot.invalidate()
+        logger.info(f"Stored {len(stored_faculty)} faculty, {len(stored_publications)} publications "
+                    f"and {len(links)} authorship links")
+
+    async def _embed(self, faculty_rows: List[Dict], publication_rows: List[Dict], authorship: Dict[tuple, List[str]]):
+        """Attach an embedding to every row; rows are stored without one if the model fails"""
+        titles = {row[PUBLICATION_KEY]: row['title'] for row in publication_rows}
+        texts = [publication_text(row) for row in publication_rows] + [
+            faculty_text(row, (titles[key] for key in authorship.get(tuple(row[c] for c in FACULTY_KEY), []) if key in titles))
+            for row in faculty_rows
+        ]
+        try:
+            vectors = await embed_texts(texts, block=True)
+        except Exception as e:
+            logger.error(f"Could not embed {len(texts)} rows, storing them without embeddings: {str(e)}")
+            return
+        for row, vector in zip(publication_rows + faculty_rows, vectors):
+            row['embedding'] = to_pgvector(vector)
+
+    async def _refresh_neighbors(self, publications: List[Dict], faculty: List[Dict], links: List[Dict]):
+        """Update the similar-items lists this batch affects; on failure they stay as they were until a rebuild"""
+        try:
+            changed = await similarity_index.refresh(self.client, publications, faculty, links)
+        except Exception as e:
+            logger.error(f"Could not refresh neighbour lists: {str(e)}")
+            return
+        for kind, item_ids in changed.items():
+            await self.neighbor_lists[kind].upsert(similarity_index.rows(kind, item_ids))
+
+    async def _refresh_trends(self, publications: List[Dict], links: List[Dict]):
+        """Rewrite the research_trends cells this batch affects; on failure they stay as they were until a rebuild"""
+        try:
+            upserts, stale_ids = await trend_engine.refresh(self.client, publications, links)
+            trend_engine.remember(await self.research_trends.upsert(upserts))
+            if stale_ids:
+                await self.client.table("research_trends").delete().in_("id", stale_ids).execute()
+                trend_engine.forget(stale_ids)
+        except Exception as e:
+            logger.error(f"Could not refresh research trends: {str(e)}")
+
+    def stats(self) -> Dict[str, Dict]:
+        return {
+            "faculty": self.faculty.stats(),
+            "publications": self.publications.stats(),
+            "faculty_publications": self.links.stats(),
+            "research_trends": self.research_trends.stats(),
+            **{table: self.neighbor_lists[kind].stats() for kind, (table, _) in NEIGHBOR_TABLES.items()}
+        }
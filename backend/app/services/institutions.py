@@ -0,0 +1,148 @@
+import json
+import logging
+import os
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+INSTITUTION_ALIASES_PATH = os.getenv(
+    "INSTITUTION_ALIASES_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "institution_aliases.json")
+)
+INSTITUTION_LOOKUP_CACHE_SIZE = int(os.getenv("INSTITUTION_LOOKUP_CACHE_SIZE", "65536"))
+
+_NON_ALPHANUMERIC = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase, turn punctuation into spaces and collapse whitespace"""
+    return _NON_ALPHANUMERIC.sub(" ", (name or "").lower()).strip()
+
+
+class AliasAutomaton:
+    """
+    Aho-Corasick automaton over normalized aliases.
+
+    Finds every alias occurring in a name in one pass over its characters,
+    however many aliases are registered. Only matches on word boundaries
+    count, so "rit" matches "rit bangalore" but not "spirit".
+    """
+
+    def __init__(self, patterns: Dict[str, int]):
+        # Node 0 is the root; each node has transitions, a failure link and
+        # the (pattern length, value) pairs that end there
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, int]]] = [[]]
+
+        for pattern, value in patterns.items():
+            node = 0
+            for char in pattern:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = next_node
+            self._out[node].append((len(pattern), value))
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def longest_match(self, text: str) -> Optional[int]:
+        """Value of the longest whole-word alias in text, or None"""
+        best: Optional[Tuple[int, int]] = None
+        node = 0
+        for end, char in enumerate(text, start=1):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for length, value in self._out[node]:
+                start = end - length
+                if (start == 0 or text[start - 1] == " ") and (end == len(text) or text[end] == " "):
+                    if best is None or length > best[0]:
+                        best = (length, value)
+        return best[1] if best else None
+
+
+class InstitutionRegistry:
+    """
+    Canonical institution names and their known aliases.
+
+    Lookups resolve any spelling of an institution to its canonical name
+    and are memoized, since the same few names repeat across result rows.
+    """
+
+    def __init__(self, entries: Iterable[Dict], cache_size: int = INSTITUTION_LOOKUP_CACHE_SIZE):
+        self.names: List[str] = []
+        self.aliases: List[List[str]] = []
+        patterns: Dict[str, int] = {}
+        for entry in entries:
+            index = len(self.names)
+            self.names.append(entry["name"])
+            spellings = [entry["name"]] + list(entry.get("aliases", []))
+            self.aliases.append(spellings)
+            for spelling in spellings:
+                key = normalize_name(spelling)
+                if key and patterns.setdefault(key, index) != index:
+                    logger.warning(f"Institution alias '{spelling}' is claimed by more than one institution")
+        self._automaton = AliasAutomaton(patterns)
+        self.resolve = lru_cache(maxsize=cache_size)(self._resolve)
+
+    @classmethod
+    def from_file(cls, path: str) -> "InstitutionRegistry":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _resolve(self, institution: str) -> Optional[int]:
+        return self._automaton.longest_match(normalize_name(institution))
+
+    def canonical_name(self, institution: str) -> str:
+        """Canonical name of an institution, or the input if it is not registered"""
+        if not institution:
+            return ""
+        index = self.resolve(institution)
+        return self.names[index] if index is not None else institution
+
+    def institution_key(self, institution: str) -> Optional[str]:
+        """
+        Key stored in faculty.institution_key: the normalized canonical name
+        of a registered institution, otherwise the normalized name itself
+        """
+        if not institution:
+            return None
+        index = self.resolve(institution)
+        return normalize_name(self.names[index] if index is not None else institution) or None
+
+    def filter_keys(self, institutions: Iterable[str]) -> List[str]:
+        """Institution keys to filter on, so a filter on one spelling finds all of them"""
+        keys: List[str] = []
+        for institution in institutions:
+            key = self.institution_key(institution)
+            if key and key not in keys:
+                keys.append(key)
+        return keys
+
+@lru_cache()
+def get_institution_registry() -> InstitutionRegistry:
+    """Load the alias registry once; an unreadable file leaves it empty"""
+    try:
+        registry = InstitutionRegistry.from_file(INSTITUTION_ALIASES_PATH)
+        logger.info(f"Loaded {len(registry.names)} institutions from {INSTITUTION_ALIASES_PATH}")
+        return registry
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Failed to load institution aliases: {str(e)}")
+        return InstitutionRegistry([])
@@ -0,0 +1,349 @@
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from ..ml.embeddings import parse_vector
+from .semantic import VectorIndex, scan_embeddings
+
+logger = logging.getLogger(__name__)
+
+# Neighbours stored per item; lookups can ask for at most this many
+NEIGHBORS_K = int(os.getenv("NEIGHBORS_K", "20"))
+# Seconds before a process reloads the index, picking up lists rebuilt elsewhere
+NEIGHBORS_INDEX_TTL = float(os.getenv("NEIGHBORS_INDEX_TTL", "3600"))
+# Query rows per matrix product, bounding the (block x items) similarity matrix
+NEIGHBORS_BLOCK_SIZE = int(os.getenv("NEIGHBORS_BLOCK_SIZE", "1024"))
+NEIGHBORS_SCAN_PAGE_SIZE = int(os.getenv("NEIGHBORS_SCAN_PAGE_SIZE", "1000"))
+# Refresh neighbour lists in the same flush that stores new rows
+NEIGHBORS_REFRESH_ON_INGEST = os.getenv("NEIGHBORS_REFRESH_ON_INGEST", "true").lower() == "true"
+
+# kind -> (neighbour table, its key column)
+NEIGHBOR_TABLES = {
+    "publications": ("publication_neighbors", "publication_id"),
+    "faculty": ("faculty_neighbors", "faculty_id")
+}
+
+
+def top_k(queries: np.ndarray, matrix: np.ndarray, k: int, exclude: Optional[np.ndarray] = None,
+          block_size: int = NEIGHBORS_BLOCK_SIZE) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k rows of matrix by dot product with each query row, best first
+    Args:
+        queries: (q, d) normalized query vectors
+        matrix: (n, d) normalized item vectors
+        k: Neighbours per query (capped at n, or n - 1 with exclude)
+        exclude: Per query, the matrix row to leave out (the query itself), or -1
+    Returns:
+        (q, k) arrays of matrix row indices and similarities
+    """
+    n = len(matrix)
+    k = min(k, n - 1 if exclude is not None else n)
+    if k <= 0 or not len(queries):
+        return np.zeros((len(queries), 0), np.int64), np.zeros((len(queries), 0), np.float32)
+
+    indices = np.empty((len(queries), k), np.int64)
+    similarities = np.empty((len(queries), k), np.float32)
+    for start in range(0, len(queries), block_size):
+        block = queries[start:start + block_size] @ matrix.T
+        if exclude is not None:
+            rows = np.arange(len(block))
+            own = exclude[start:start + block_size]
+            block[rows[own >= 0], own[own >= 0]] = -np.inf
+        # argpartition finds the k best in O(n); only those k get sorted
+        best = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        scores = np.take_along_axis(block, best, axis=1)
+        order = np.argsort(-scores, axis=1, kind="stable")
+        indices[start:start + len(block)] = np.take_along_axis(best, order, axis=1)
+        similarities[start:start + len(block)] = np.take_along_axis(scores, order, axis=1)
+    return indices, similarities
+
+
+class NeighborIndex:
+    """
+    Vectors of one kind of item and each item's precomputed top-k most
+    similar items.
+
+    compute_all() fills every list with blocked matrix products. After that,
+    refresh() handles changed vectors without touching the rest: changed
+    items get new lists, and an existing item is recomputed only if a
+    changed item was on its list or now beats its k-th neighbour. That
+    check is one (items x changed) product, so a refresh costs
+    O(items x changed) rather than O(items^2).
+    """
+
+    def __init__(self, k: int = NEIGHBORS_K):
+        self.k = k
+        self.vectors = VectorIndex(())
+        self.neighbors: Dict[str, List[Tuple[str, float]]] = {}
+        # item -> items whose lists contain it
+        self._referrers: Dict[str, Set[str]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def _set(self, item_id: str, neighbors: List[Tuple[str, float]]):
+        for neighbor_id, _ in self.neighbors.get(item_id, []):
+            self._referrers[neighbor_id].discard(item_id)
+        self.neighbors[item_id] = neighbors
+        for neighbor_id, _ in neighbors:
+            self._referrers[neighbor_id].add(item_id)
+
+    def load_lists(self, rows: Iterable[Tuple[str, List[str], List[float]]]):
+        """Adopt neighbour lists computed earlier (e.g. read back from the database)"""
+        for item_id, neighbor_ids, similarities in rows:
+            self._set(str(item_id), [(str(n), float(s)) for n, s in zip(neighbor_ids, similarities)])
+
+    def _compute(self, item_ids: Iterable[str]) -> Set[str]:
+        ids, matrix = self.vectors.vectors()
+        positions = {item_id: i for i, item_id in enumerate(ids)}
+        targets = [item_id for item_id in item_ids if item_id in positions]
+        if not targets:
+            return set()
+        rows = np.array([positions[item_id] for item_id in targets])
+        indices, similarities = top_k(matrix[rows], matrix, self.k, exclude=rows)
+        for item_id, row_indices, row_similarities in zip(targets, indices, similarities):
+            self._set(item_id, [(ids[i], round(float(s), 6)) for i, s in zip(row_indices, row_similarities)])
+        return set(targets)
+
+    def compute_all(self) -> Set[str]:
+        """Recompute every list"""
+        ids, _ = self.vectors.vectors()
+        return self._compute(ids)
+
+    def compute_missing(self) -> Set[str]:
+        """Compute lists for items that have a vector but no list yet"""
+        ids, _ = self.vectors.vectors()
+        return self._compute([item_id for item_id in ids if item_id not in self.neighbors])
+
+    def refresh(self, changed: Dict[str, np.ndarray]) -> Set[str]:
+        """
+        Store changed vectors and update the lists they affect
+        Returns:
+            Ids whose neighbour lists changed
+        """
+        for item_id, vector in changed.items():
+            self.vectors.put(item_id, vector)
+        if not changed:
+            return set()
+
+        ids, matrix = self.vectors.vectors()
+        positions = {item_id: i for i, item_id in enumerate(ids)}
+        changed_rows = np.array([positions[str(item_id)] for item_id in changed])
+        affected = {str(item_id) for item_id in changed}
+        for item_id in changed:
+            affected |= self._referrers.get(str(item_id), set())
+
+        # Similarity an item's k-th neighbour has to beat; lists shorter than k take anything
+        kth = np.full(len(ids), -np.inf, np.float32)
+        for i, item_id in enumerate(ids):
+            neighbors = self.neighbors.get(item_id, [])
+            if len(neighbors) >= self.k:
+                kth[i] = neighbors[-1][1]
+        changed_matrix = matrix[changed_rows]
+        for start in range(0, len(ids), NEIGHBORS_BLOCK_SIZE):
+            similarities = matrix[start:start + NEIGHBORS_BLOCK_SIZE] @ changed_matrix.T
+            beaten = (similarities > kth[start:start + NEIGHBORS_BLOCK_SIZE, None]).any(axis=1)
+            affected.update(ids[start + i] for i in np.flatnonzero(beaten))
+
+        return self._compute(affected)
+
+    def lookup(self, item_id: str, limit: int) -> List[Tuple[str, float]]:
+        return self.neighbors.get(str(item_id), [])[:limit]
+
+    def rows(self, kind: str, item_ids: Iterable[str]) -> List[Dict]:
+        """Rows for the neighbour table of kind; items without a list (e.g. dropped by a reload since) are skipped"""
+        _, key = NEIGHBOR_TABLES[kind]
+        computed_at = datetime.now(timezone.utc).isoformat()
+        return [{
+            key: item_id,
+            "neighbor_ids": [neighbor_id for neighbor_id, _ in self.neighbors[item_id]],
+            "similarities": [similarity for _, similarity in self.neighbors[item_id]],
+            "computed_at": computed_at
+        } for item_id in item_ids if item_id in self.neighbors]
+
+
+async def scan_rows(client, table: str, columns: str, order: str) -> List[Dict]:
+    """Read columns of every row of table, a page at a time"""
+    rows: List[Dict] = []
+    while True:
+        response = await client.table(table) \
+            .select(columns) \
+            .order(order) \
+            .range(len(rows), len(rows) + NEIGHBORS_SCAN_PAGE_SIZE - 1) \
+            .execute()
+        page = response.data if hasattr(response, 'data') else []
+        rows.extend(page)
+        if len(page) < NEIGHBORS_SCAN_PAGE_SIZE:
+            return rows
+
+
+class SimilarityIndex:
+    """
+    Neighbour lists for publications and faculty.
+
+    Publications are compared by their embeddings. A faculty member's vector
+    is their own embedding (research interests, department) plus the mean
+    embedding of the publications they authored, so experts with related
+    output are neighbours even when their stated interests differ.
+
+    The index is loaded per process (embeddings, authorship links and the
+    stored lists) and reloaded after the TTL, so lists rebuilt by
+    scripts/build_neighbors.py are picked up; in between, ingestion calls
+    refresh() with what it wrote and persists the lists that changed.
+
+    Without an explicit k, each kind keeps as many neighbours as its stored
+    lists hold (NEIGHBORS_K when there are none), so ingestion does not
+    rewrite lists built with a different --k.
+    """
+
+    def __init__(self, k: Optional[int] = None, ttl: float = NEIGHBORS_INDEX_TTL):
+        self.k = k if k is not None else NEIGHBORS_K
+        self.fixed_k = k is not None
+        self.ttl = ttl
+        # Serializes loads, refreshes and rebuilds, so none works on state another is replacing
+        self._lock = asyncio.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.publications = NeighborIndex(self.k)
+        self.faculty = NeighborIndex(self.k)
+        self._faculty_embeddings: Dict[str, np.ndarray] = {}
+        self._authored: Dict[str, Set[str]] = defaultdict(set)
+        self._loaded_at: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    def _faculty_vector(self, faculty_id: str) -> Optional[np.ndarray]:
+        parts = []
+        own = self._faculty_embeddings.get(faculty_id)
+        if own is not None:
+            parts.append(own / (np.linalg.norm(own) or 1.0))
+        publication_vectors = [
+            vector for vector in (self.publications.vectors.get(p) for p in self._authored.get(faculty_id, ()))
+            if vector is not None
+        ]
+        if publication_vectors:
+            mean = np.mean(publication_vectors, axis=0)
+            parts.append(mean / (np.linalg.norm(mean) or 1.0))
+        return np.sum(parts, axis=0) if parts else None
+
+    async def load(self, client, compute_missing: bool = True) -> Dict[str, Set[str]]:
+        """
+        Read embeddings, links and stored lists (again once the TTL has
+        passed); with compute_missing, fill in lists for items that have none
+        Returns:
+            Per kind, the ids whose lists were computed here (to be persisted)
+        """
+        async with self._lock:
+            return await self._load(client, compute_missing)
+
+    async def _load(self, client, compute_missing: bool = True) -> Dict[str, Set[str]]:
+        if self.loaded:
+            return {"publications": set(), "faculty": set()}
+        self._reset()
+        publications = await scan_embeddings(client, "publications", ())
+        faculty = await scan_embeddings(client, "faculty", ())
+        links = await scan_rows(client, "faculty_publications", "faculty_id,publication_id", "faculty_id")
+
+        for row in publications:
+            vector = parse_vector(row.get("embedding"))
+            if vector is not None:
+                self.publications.vectors.put(row["id"], vector)
+        for row in faculty:
+            vector = parse_vector(row.get("embedding"))
+            if vector is not None:
+                self._faculty_embeddings[str(row["id"])] = vector
+        for link in links:
+            self._authored[str(link["faculty_id"])].add(str(link["publication_id"]))
+        for row in faculty:
+            vector = self._faculty_vector(str(row["id"]))
+            if vector is not None:
+                self.faculty.vectors.put(row["id"], vector)
+
+        for kind, index in (("publications", self.publications), ("faculty", self.faculty)):
+            table, key = NEIGHBOR_TABLES[kind]
+            stored = await scan_rows(client, table, f"{key},neighbor_ids,similarities", key)
+            index.load_lists((row[key], row["neighbor_ids"] or [], row["similarities"] or []) for row in stored)
+            if not self.fixed_k:
+                self._adopt_stored_k(kind, index)
+
+        computed = {"publications": set(), "faculty": set()}
+        if compute_missing:
+            computed["publications"] = await asyncio.to_thread(self.publications.compute_missing)
+            computed["faculty"] = await asyncio.to_thread(self.faculty.compute_missing)
+        self._loaded_at = time.monotonic()
+        logger.info(f"Loaded similarity index: {len(self.publications)} publications, {len(self.faculty)} faculty")
+        return computed
+
+    def _adopt_stored_k(self, kind: str, index: NeighborIndex):
+        """Keep as many neighbours as the stored lists do, if they were built with another k"""
+        stored_k = max((len(neighbors) for neighbors in index.neighbors.values()), default=0)
+        # Lists are shorter than k anyway when there are no more than k other items
+        if not stored_k or stored_k == index.k or (stored_k < index.k and stored_k >= len(index) - 1):
+            return
+        logger.info(f"Stored {kind} neighbour lists hold {stored_k} items, using k={stored_k} instead of {index.k}")
+        index.k = stored_k
+
+    def _refresh(self, publications: List[Dict], faculty: List[Dict], links: List[Dict]) -> Dict[str, Set[str]]:
+        changed_publications = {}
+        for row in publications:
+            vector = parse_vector(row.get("embedding"))
+            if vector is not None:
+                changed_publications[str(row["id"])] = vector
+        for row in faculty:
+            vector = parse_vector(row.get("embedding"))
+            if vector is not None:
+                self._faculty_embeddings[str(row["id"])] = vector
+        for link in links:
+            self._authored[str(link["faculty_id"])].add(str(link["publication_id"]))
+
+        updated_publications = self.publications.refresh(changed_publications)
+        # Faculty whose own embedding, links or publications changed
+        touched = {str(row["id"]) for row in faculty} | {str(link["faculty_id"]) for link in links}
+        touched |= {
+            faculty_id for faculty_id, authored in self._authored.items()
+            if not authored.isdisjoint(changed_publications)
+        }
+        changed_faculty = {}
+        for faculty_id in touched:
+            vector = self._faculty_vector(faculty_id)
+            if vector is not None:
+                changed_faculty[faculty_id] = vector
+        return {"publications": updated_publications, "faculty": self.faculty.refresh(changed_faculty)}
+
+    async def refresh(self, client, publications: List[Dict], faculty: List[Dict], links: List[Dict]) -> Dict[str, Set[str]]:
+        """
+        Fold stored rows into the index
+        Returns:
+            Per kind, the ids whose lists changed (to be persisted)
+        """
+        async with self._lock:
+            computed = await self._load(client)
+            updated = await asyncio.to_thread(self._refresh, publications, faculty, links)
+            return {kind: computed[kind] | updated[kind] for kind in updated}
+
+    async def rebuild(self, client) -> Dict[str, Set[str]]:
+        """Reload everything and recompute every list"""
+        async with self._lock:
+            self._loaded_at = None
+            await self._load(client, compute_missing=False)
+            return {
+                "publications": await asyncio.to_thread(self.publications.compute_all),
+                "faculty": await asyncio.to_thread(self.faculty.compute_all)
+            }
+
+    def rows(self, kind: str, item_ids: Iterable[str]) -> List[Dict]:
+        index = self.publications if kind == "publications" else self.faculty
+        return index.rows(kind, item_ids)
+
+
+# Shared index, refreshed by ingestion
+similarity_index = SimilarityIndex()
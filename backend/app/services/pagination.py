@@ -0,0 +1,65 @@
+import base64
+import binascii
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+# Upper bound on the page size any search endpoint will serve
+MAX_PAGE_SIZE = int(os.getenv("SEARCH_MAX_PAGE_SIZE", "100"))
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor that cannot be decoded"""
+
+
+def encode_cursor(mode: str, positions: Dict[str, Dict]) -> Optional[str]:
+    """
+    Pack the last-seen position of each paginated section into an opaque token.
+
+    Returns None when no section has more rows, so clients can stop paging.
+    """
+    if not positions:
+        return None
+    payload = json.dumps({"m": mode, "p": positions}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], mode: str) -> Optional[Dict[str, Dict]]:
+    """
+    Unpack a token from encode_cursor.
+
+    Returns None for the first page (no cursor), otherwise the positions by
+    section. Sections missing from a cursor have been exhausted; an empty
+    position restarts a section from its first row.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        positions = payload["p"]
+        cursor_mode = payload["m"]
+    except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError):
+        raise InvalidCursor("Malformed cursor")
+    if cursor_mode != mode:
+        raise InvalidCursor(f"Cursor was issued for {cursor_mode} search, not {mode}")
+    if not isinstance(positions, dict) or not all(isinstance(p, dict) for p in positions.values()):
+        raise InvalidCursor("Malformed cursor")
+    return positions
+
+
+def split_page(rows: List[Dict], limit: int, ranked: bool) -> Tuple[List[Dict], Optional[Dict[str, Any]]]:
+    """
+    Trim rows fetched with limit + 1 to one page.
+
+    Returns the page and, if the extra row showed there is more, the keyset
+    position of its last row: (rank, id) for ranked results, id otherwise.
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    position = {"id": last.get("id")}
+    if ranked:
+        position["rank"] = last.get("rank")
+    return rows, position
@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ..ml.domain_classifier import classify_publications_async
+from .ingestion import FacultyIngestion, INGEST_FACULTY_BATCH
+from scripts.crawl_state import CrawlStateStore
+from scripts.scraper import AsyncIRINSScraper, MAX_CONCURRENT_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# Workers per stage. Fetch concurrency is also capped per host by the scraper.
+SCRAPE_FETCH_WORKERS = int(os.getenv("SCRAPE_FETCH_WORKERS", str(MAX_CONCURRENT_REQUESTS)))
+SCRAPE_PARSE_WORKERS = int(os.getenv("SCRAPE_PARSE_WORKERS", "2"))
+SCRAPE_CLASSIFY_WORKERS = int(os.getenv("SCRAPE_CLASSIFY_WORKERS", "4"))
+# Items each queue between stages holds before its producer waits
+SCRAPE_QUEUE_SIZE = int(os.getenv("SCRAPE_QUEUE_SIZE", "100"))
+# Seconds the store stage waits for more records before flushing a partial batch
+SCRAPE_FLUSH_INTERVAL = float(os.getenv("SCRAPE_FLUSH_INTERVAL", "5"))
+
+# Tells a stage's workers that the stage upstream has finished
+_DONE = object()
+
+
+class ScrapePipeline:
+    """
+    Crawl, classify and store faculty as a stream of bounded stages.
+
+        discover -> fetch -> parse -> classify -> store
+
+    Each stage runs its own number of workers and hands items on through a
+    queue of at most queue_size, so a slow stage holds back the ones before
+    it instead of letting records pile up in memory. The store stage writes
+    a batch whenever INGEST_FACULTY_BATCH records are buffered or none have
+    arrived for flush_interval seconds, so faculty reach the database while
+    the crawl is still running.
+
+    With crawl state, records an interrupted run left pending are fed in
+    first, and each batch is confirmed with mark_emitted once every row of
+    it was stored.
+    """
+
+    def __init__(
+        self,
+        scraper: AsyncIRINSScraper,
+        ingestion: FacultyIngestion,
+        crawl_state: Optional[CrawlStateStore] = None,
+        fetch_workers: int = SCRAPE_FETCH_WORKERS,
+        parse_workers: int = SCRAPE_PARSE_WORKERS,
+        classify_workers: int = SCRAPE_CLASSIFY_WORKERS,
+        queue_size: int = SCRAPE_QUEUE_SIZE,
+        batch_size: int = INGEST_FACULTY_BATCH,
+        flush_interval: float = SCRAPE_FLUSH_INTERVAL,
+        classify: Callable[[List[Dict]], Awaitable[List[Dict]]] = classify_publications_async,
+        status: Optional[Dict[str, Any]] = None
+    ):
+        self.scraper = scraper
+        self.ingestion = ingestion
+        self.crawl_state = crawl_state
+        self.workers = {"fetch": fetch_workers, "parse": parse_workers, "classify": classify_workers}
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.classify = classify
+        # Progress is written here as it happens (the scrape route's scraping_status)
+        self.status = status if status is not None else {}
+
+        self.fetch_queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.parse_queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.classify_queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.store_queue: asyncio.Queue = asyncio.Queue(queue_size)
+
+        self.discovered = 0
+        self.stored = 0
+        self.flushes = 0
+        self.errors = {"fetch": 0, "parse": 0, "classify": 0}
+        self.first_store_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self._started = 0.0
+        self._batch_urls: List[str] = []
+
+    async def run(self) -> Dict[str, Any]:
+        """Run the crawl to completion and return the pipeline stats"""
+        self._started = time.perf_counter()
+        async with self.scraper:
+            try:
+                # If any stage fails, the task group cancels the others, so no
+                # worker is left blocked on a queue or using the closed client
+                async with asyncio.TaskGroup() as stages:
+                    stages.create_task(self._discover())
+                    stages.create_task(self._stage("fetch", self._fetch, self.fetch_queue, self.parse_queue, self.workers["parse"]))
+                    stages.create_task(self._stage("parse", self._parse, self.parse_queue, self.classify_queue, self.workers["classify"]))
+                    stages.create_task(self._stage("classify", self._classify, self.classify_queue, self.store_queue, 1))
+                    stages.create_task(self._store())
+            except ExceptionGroup as group:
+                self.error = str(group.exceptions[0])
+                raise group.exceptions[0]
+        if self.crawl_state is not None and self.error is None:
+            self.crawl_state.finish_run()
+        return self.stats()
+
+    async def _discover(self):
+        try:
+            if self.crawl_state is not None:
+                # Left pending by a run that stopped before storing them
+                for record in self.crawl_state.pending_records():
+                    await self.classify_queue.put(record)
+                self.crawl_state.begin_run(self.scraper.base_url)
+
+            for dept in await self.scraper.list_departments():
+                for profile_url in await self.scraper.list_profiles(dept):
+                    self.discovered += 1
+                    self.status["total_faculty"] = self.discovered
+                    await self.fetch_queue.put((profile_url, dept['name']))
+        except Exception as e:
+            logger.error(f"Error discovering faculty profiles: {str(e)}")
+            self.error = str(e)
+        # Not in a finally: when cancelled, waiting on a full queue would never return
+        for _ in range(self.workers["fetch"]):
+            await self.fetch_queue.put(_DONE)
+
+    async def _stage(self, name: str, handler, inbox: asyncio.Queue, outbox: asyncio.Queue, downstream_workers: int):
+        async def worker():
+            while True:
+                item = await inbox.get()
+                if item is _DONE:
+                    return
+                try:
+                    result = await handler(*item) if isinstance(item, tuple) else await handler(item)
+                except Exception as e:
+                    self.errors[name] += 1
+                    logger.error(f"Error in {name} stage: {str(e)}")
+                    continue
+                if result is not None:
+                    await outbox.put(result)
+
+        await asyncio.gather(*(worker() for _ in range(self.workers[name])))
+        for _ in range(downstream_workers):
+            await outbox.put(_DONE)
+
+    async def _fetch(self, profile_url: str, department: str):
+        response = await self.scraper.fetch_profile(profile_url)
+        return (profile_url, department, response) if response is not None else None
+
+    async def _parse(self, profile_url: str, department: str, response):
+        record = await asyncio.to_thread(self.scraper.parse_profile_response, profile_url, department, response)
+        if record is not None:
+            self.scraper.count_faculty(department)
+        return record
+
+    async def _classify(self, faculty: Dict) -> Dict:
+        if faculty.get('publications'):
+            faculty['publications'] = await self.classify(faculty['publications'])
+        return faculty
+
+    async def _store(self):
+        while True:
+            try:
+                faculty = await asyncio.wait_for(self.store_queue.get(), self.flush_interval)
+            except asyncio.TimeoutError:
+                # Crawl is slow right now; write what we have rather than wait for a full batch
+                await self._flush()
+                continue
+            if faculty is _DONE:
+                await self._flush()
+                return
+
+            self.ingestion.add(faculty)
+            self._batch_urls.append(faculty['profile_url'])
+            self.stored += 1
+            self.status["processed_faculty"] = self.stored
+            self.status["current_faculty"] = faculty['name']
+            if self.ingestion.pending >= self.batch_size:
+                await self._flush()
+
+    async def _flush(self):
+        if not self.ingestion.pending:
+            return
+        failed_before = self.ingestion.rows_failed
+        try:
+            await self.ingestion.flush()
+        except Exception as e:
+            # Keep draining the queue so the stages upstream never block
+            logger.error(f"Error storing faculty batch: {str(e)}")
+            self._batch_urls = []
+            return
+        self.flushes += 1
+        if self.first_store_seconds is None:
+            self.first_store_seconds = round(time.perf_counter() - self._started, 3)
+        # Confirm only fully stored batches; the rest are re-emitted next crawl
+        if self.crawl_state is not None and self.ingestion.rows_failed == failed_before:
+            self.crawl_state.mark_emitted(self._batch_urls)
+        self._batch_urls = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "discovered_profiles": self.discovered,
+            "stored_faculty": self.stored,
+            "flushes": self.flushes,
+            "stage_errors": dict(self.errors),
+            "seconds": round(time.perf_counter() - self._started, 3),
+            "first_store_seconds": self.first_store_seconds,
+            "error": self.error,
+            "crawl": self.scraper.crawl_stats(),
+            "department_stats": dict(self.scraper.department_counter)
+        }
@@ -0,0 +1,235 @@
+import asyncio
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from ..ml.embeddings import EMBEDDING_DIM, parse_vector
+
+logger = logging.getLogger(__name__)
+
+# "pgvector" (ANN index in the database, migration 006) or "numpy"
+# (exact search over an in-process copy of the embeddings, for local runs)
+SEMANTIC_SEARCH_BACKEND = os.getenv("SEMANTIC_SEARCH_BACKEND", "pgvector")
+# HNSW candidate list size per query; higher trades latency for recall
+SEMANTIC_EF_SEARCH = int(os.getenv("SEMANTIC_EF_SEARCH", "40"))
+SEMANTIC_INDEX_TTL = float(os.getenv("SEMANTIC_INDEX_TTL", "3600"))
+SEMANTIC_SCAN_PAGE_SIZE = int(os.getenv("SEMANTIC_SCAN_PAGE_SIZE", "1000"))
+
+# Searchable table -> (match RPC, columns the NumPy index scores text on)
+SEMANTIC_TARGETS = {
+    "publications": ("match_publications", ("title", "abstract", "journal")),
+    "faculty": ("match_faculty", ("name", "department", "research_interests"))
+}
+
+_TOKEN = re.compile(r"[0-9a-z]{3,}")
+
+
+def _tokens(text: str) -> frozenset:
+    return frozenset(_TOKEN.findall(text.lower()))
+
+
+def _row_text(row: Dict, columns: Iterable[str]) -> str:
+    parts = []
+    for column in columns:
+        value = row.get(column)
+        parts.extend(value if isinstance(value, list) else [value or ""])
+    return " ".join(str(part) for part in parts)
+
+
+class VectorIndex:
+    """
+    In-process exact cosine index over one table's embeddings.
+
+    Vectors are kept L2-normalized in one contiguous matrix, so a query is a
+    single matrix-vector product followed by a partial sort. The matrix
+    grows by doubling; removed rows are swapped with the last one. Like the
+    facet index it is built from one table scan and then kept current by
+    ingestion through update().
+    """
+
+    def __init__(self, text_columns: Iterable[str], dim: int = EMBEDDING_DIM, ttl: float = SEMANTIC_INDEX_TTL):
+        self.text_columns = tuple(text_columns)
+        self.dim = dim
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._build_lock = asyncio.Lock()
+        self._matrix = np.zeros((0, dim), np.float32)
+        self._ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._tokens: List[frozenset] = []
+        self._built_at: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._built_at is not None and time.monotonic() - self._built_at < self.ttl
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _put(self, row_id: str, vector: np.ndarray, tokens: frozenset):
+        position = self._positions.get(row_id)
+        if position is None:
+            position = len(self._ids)
+            if position == len(self._matrix):
+                grown = np.zeros((max(16, 2 * len(self._matrix)), self.dim), np.float32)
+                grown[:position] = self._matrix[:position]
+                self._matrix = grown
+            self._ids.append(row_id)
+            self._tokens.append(tokens)
+            self._positions[row_id] = position
+        norm = float(np.linalg.norm(vector))
+        self._matrix[position] = vector / norm if norm else vector
+        self._tokens[position] = tokens
+
+    def _drop(self, row_id: str):
+        position = self._positions.pop(row_id, None)
+        if position is None:
+            return
+        last = len(self._ids) - 1
+        if position != last:
+            self._matrix[position] = self._matrix[last]
+            self._ids[position] = self._ids[last]
+            self._tokens[position] = self._tokens[last]
+            self._positions[self._ids[position]] = position
+        self._ids.pop()
+        self._tokens.pop()
+
+    def rebuild(self, rows: Iterable[Dict]):
+        """Replace the index with the embedded rows among rows"""
+        with self._lock:
+            self._matrix = np.zeros((0, self.dim), np.float32)
+            self._ids, self._positions, self._tokens = [], {}, []
+            for row in rows:
+                vector = parse_vector(row.get("embedding"))
+                if vector is not None:
+                    self._put(str(row["id"]), vector, _tokens(_row_text(row, self.text_columns)))
+            self._built_at = time.monotonic()
+        logger.info(f"Built vector index over {len(self._ids)} rows")
+
+    def put(self, row_id, vector: np.ndarray):
+        """Insert or replace one vector, whether or not the index was built from a scan"""
+        with self._lock:
+            self._put(str(row_id), vector, frozenset())
+
+    def vectors(self):
+        """The ids and their normalized vectors (a view; rows line up with ids)"""
+        with self._lock:
+            return list(self._ids), self._matrix[:len(self._ids)]
+
+    def get(self, row_id) -> Optional[np.ndarray]:
+        with self._lock:
+            position = self._positions.get(str(row_id))
+            return None if position is None else self._matrix[position]
+
+    def update(self, row: Dict):
+        """Apply an inserted or updated row"""
+        with self._lock:
+            if self._built_at is None:
+                return  # the first build will see the row
+            vector = parse_vector(row.get("embedding"))
+            if vector is None:
+                self._drop(str(row["id"]))
+            else:
+                self._put(str(row["id"]), vector, _tokens(_row_text(row, self.text_columns)))
+
+    def remove(self, row_id):
+        with self._lock:
+            self._drop(str(row_id))
+
+    def search(
+        self,
+        vector: np.ndarray,
+        limit: int,
+        query_text: Optional[str] = None,
+        text_weight: float = 0.0,
+        min_similarity: float = 0.0
+    ) -> List[Dict]:
+        """
+        Rows most similar to vector, best first, as {id, similarity,
+        text_rank, score}. With text_weight, score blends cosine similarity
+        with the share of query terms the row's text contains.
+        """
+        with self._lock:
+            count = len(self._ids)
+            if not count:
+                return []
+            similarities = self._matrix[:count] @ vector.astype(np.float32)
+            # Blending can reorder, so rank a wider candidate set first
+            candidates = min(count, max(limit * 4, 40) if text_weight else limit)
+            top = np.argpartition(-similarities, candidates - 1)[:candidates]
+            query_tokens = _tokens(query_text or "") if text_weight else frozenset()
+
+            matches = []
+            for position in top:
+                similarity = float(similarities[position])
+                if similarity < min_similarity:
+                    continue
+                text_rank = len(query_tokens & self._tokens[position]) / len(query_tokens) if query_tokens else 0.0
+                matches.append({
+                    "id": self._ids[position],
+                    "similarity": similarity,
+                    "text_rank": text_rank,
+                    "score": (1 - text_weight) * similarity + text_weight * text_rank
+                })
+        matches.sort(key=lambda match: (-match["score"], match["id"]))
+        return matches[:limit]
+
+
+async def scan_embeddings(client, table: str, text_columns: Iterable[str]) -> List[Dict]:
+    """Read the id, text columns and embedding of every row, a page at a time"""
+    columns = ",".join(("id", *text_columns, "embedding"))
+    rows: List[Dict] = []
+    while True:
+        response = await client.table(table) \
+            .select(columns) \
+            .order("id") \
+            .range(len(rows), len(rows) + SEMANTIC_SCAN_PAGE_SIZE - 1) \
+            .execute()
+        page = response.data if hasattr(response, 'data') else []
+        rows.extend(page)
+        if len(page) < SEMANTIC_SCAN_PAGE_SIZE:
+            return rows
+
+
+# Shared in-process indexes for SEMANTIC_SEARCH_BACKEND=numpy, updated by ingestion
+vector_indexes = {table: VectorIndex(columns) for table, (_, columns) in SEMANTIC_TARGETS.items()}
+
+
+async def semantic_match(
+    client,
+    table: str,
+    vector: np.ndarray,
+    limit: int,
+    query_text: Optional[str] = None,
+    text_weight: float = 0.0,
+    min_similarity: float = 0.0,
+    backend: str = SEMANTIC_SEARCH_BACKEND
+) -> List[Dict]:
+    """
+    Nearest neighbours of vector in table, best first
+    Returns:
+        Dicts with id, similarity (cosine), text_rank and the blended score
+    """
+    function, columns = SEMANTIC_TARGETS[table]
+    if backend == "numpy":
+        index = vector_indexes[table]
+        if not index.loaded:
+            async with index._build_lock:
+                if not index.loaded:
+                    index.rebuild(await scan_embeddings(client, table, columns))
+        return index.search(vector, limit, query_text, text_weight, min_similarity)
+
+    response = await client.rpc(function, {
+        "query_embedding": [float(x) for x in vector],
+        "match_count": limit,
+        "query_text": query_text if text_weight else None,
+        "text_weight": text_weight,
+        "min_similarity": min_similarity,
+        "ef_search": SEMANTIC_EF_SEARCH
+    }).execute()
+    return response.data or []
@@ -0,0 +1,255 @@
+import asyncio
+import logging
+import os
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Years in the rolling window behind trending_score
+TRENDS_WINDOW_YEARS = int(os.getenv("TRENDS_WINDOW_YEARS", "3"))
+TRENDS_SCAN_PAGE_SIZE = int(os.getenv("TRENDS_SCAN_PAGE_SIZE", "1000"))
+# Update the affected trend cells in the same flush that stores new publications
+TRENDS_REFRESH_ON_INGEST = os.getenv("TRENDS_REFRESH_ON_INGEST", "true").lower() == "true"
+
+# Publications only carry a year, so every cell covers a whole year
+YEAR_QUARTER = 0
+# Classifier fallback label; not a research topic worth trending
+EXCLUDED_TOPICS = frozenset({"Other"})
+TREND_KEY = "topic,year,quarter"
+METRIC_COLUMNS = ("publication_count", "citation_count", "faculty_count", "growth_rate", "trending_score")
+
+Cell = Tuple[str, int]
+
+
+class _CellCounts:
+    __slots__ = ("publications", "citations", "faculty")
+
+    def __init__(self):
+        self.publications = 0
+        self.citations = 0
+        # faculty id -> their publications in the cell
+        self.faculty: Counter = Counter()
+
+
+def trend_metrics(cells: pd.DataFrame, window: int = TRENDS_WINDOW_YEARS) -> pd.DataFrame:
+    """
+    Year-over-year growth and trending score for every (topic, year) cell
+    Args:
+        cells: One row per cell with topic, year, publication_count,
+            citation_count and faculty_count
+        window: Years averaged into trending_score
+    Returns:
+        cells plus growth_rate (None without publications the year before)
+        and trending_score: the window's mean publication count scaled by
+        1 + its mean growth (clipped to [-1, 3])
+    """
+    if cells.empty:
+        return cells.assign(growth_rate=pd.Series(dtype=object), trending_score=pd.Series(dtype=float))
+
+    # Topics x years, with the years a topic had no publications filled in as 0
+    years = np.arange(cells["year"].min() - 1, cells["year"].max() + 1)
+    counts = cells.pivot_table(index="topic", columns="year", values="publication_count", aggfunc="sum", fill_value=0)
+    counts = counts.reindex(columns=years, fill_value=0).astype(float)
+
+    previous = counts.shift(1, axis=1)
+    growth = (counts - previous) / previous.where(previous > 0)
+    mean_count = counts.T.rolling(window, min_periods=1).mean().T
+    mean_growth = growth.T.rolling(window, min_periods=1).mean().T.fillna(0).clip(-1, 3)
+    score = mean_count * (1 + mean_growth)
+
+    rows = counts.index.get_indexer(cells["topic"])
+    columns = cells["year"].to_numpy() - years[0]
+    growth_rate = pd.Series(growth.to_numpy()[rows, columns].round(4), index=cells.index, dtype=object)
+    return cells.assign(
+        growth_rate=growth_rate.where(growth_rate.notna(), None),
+        trending_score=score.to_numpy()[rows, columns].round(4)
+    )
+
+
+async def scan_table(client, table: str, columns: str, order: str = "id") -> List[Dict]:
+    """Read columns of every row of table, a page at a time"""
+    rows: List[Dict] = []
+    while True:
+        response = await client.table(table) \
+            .select(columns) \
+            .order(order) \
+            .range(len(rows), len(rows) + TRENDS_SCAN_PAGE_SIZE - 1) \
+            .execute()
+        page = response.data if hasattr(response, 'data') else []
+        rows.extend(page)
+        if len(page) < TRENDS_SCAN_PAGE_SIZE:
+            return rows
+
+
+class TrendEngine:
+    """
+    research_trends rows derived from publications: per research domain and
+    year, the publication, citation and distinct-author counts, growth over
+    the year before and a windowed trending score.
+
+    Counts are kept per cell in memory and moved by each publication or
+    authorship change, so a batch only touches the cells its publications
+    are in (before and after the change). Growth and trending score are then
+    recomputed with vectorized window operations over the affected topics
+    only, and just the cells whose values changed are written back.
+    """
+
+    def __init__(self, window: int = TRENDS_WINDOW_YEARS):
+        self.window = window
+        self._lock = asyncio.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._publications: Dict[str, Tuple[Optional[int], int, Tuple[str, ...]]] = {}
+        self._authors: Dict[str, Set[str]] = defaultdict(set)
+        self._cells: Dict[Cell, _CellCounts] = {}
+        # Values last written for each cell, and the row ids to delete emptied cells by
+        self._stored: Dict[Cell, Dict] = {}
+        self._ids: Dict[Cell, str] = {}
+        self.loaded = False
+
+    def _publication_cells(self, publication_id: str) -> List[Cell]:
+        year, _, topics = self._publications.get(publication_id, (None, 0, ()))
+        return [(topic, year) for topic in topics] if year is not None else []
+
+    def _count(self, publication_id: str, sign: int) -> Set[Cell]:
+        _, citations, _ = self._publications.get(publication_id, (None, 0, ()))
+        cells = self._publication_cells(publication_id)
+        for cell in cells:
+            counts = self._cells.setdefault(cell, _CellCounts())
+            counts.publications += sign
+            counts.citations += sign * citations
+            for faculty_id in self._authors.get(publication_id, ()):
+                counts.faculty[faculty_id] += sign
+                if counts.faculty[faculty_id] <= 0:
+                    del counts.faculty[faculty_id]
+            if counts.publications <= 0:
+                del self._cells[cell]
+        return set(cells)
+
+    def _apply(self, publications: Iterable[Dict], links: Iterable[Dict]) -> Set[str]:
+        """Move the counts for changed publications and new authorship links; returns the affected topics"""
+        touched: Set[Cell] = set()
+        for row in publications:
+            publication_id = str(row["id"])
+            topics = tuple(sorted(set(row.get("research_domains") or ()) - EXCLUDED_TOPICS))
+            state = (row.get("year"), int(row.get("citations") or 0), topics)
+            if self._publications.get(publication_id) == state:
+                continue
+            touched |= self._count(publication_id, -1)
+            self._publications[publication_id] = state
+            touched |= self._count(publication_id, 1)
+
+        for link in links:
+            publication_id, faculty_id = str(link["publication_id"]), str(link["faculty_id"])
+            if faculty_id in self._authors[publication_id]:
+                continue
+            self._authors[publication_id].add(faculty_id)
+            for cell in self._publication_cells(publication_id):
+                if cell in self._cells:
+                    self._cells[cell].faculty[faculty_id] += 1
+                    touched.add(cell)
+        return {topic for topic, _ in touched}
+
+    def _diff(self, topics: Set[str]) -> Tuple[List[Dict], List[str]]:
+        """Rows to upsert and row ids to delete for the cells of topics"""
+        if not topics:
+            return [], []
+        cells = pd.DataFrame(
+            [
+                (topic, year, counts.publications, counts.citations, len(counts.faculty))
+                for (topic, year), counts in self._cells.items() if topic in topics
+            ],
+            columns=["topic", "year", "publication_count", "citation_count", "faculty_count"]
+        )
+        metrics = trend_metrics(cells, self.window)
+
+        updated_at = datetime.now(timezone.utc).isoformat()
+        upserts = []
+        current = set()
+        for record in metrics.to_dict("records"):
+            cell = (record["topic"], int(record["year"]))
+            current.add(cell)
+            values = {
+                "publication_count": int(record["publication_count"]),
+                "citation_count": int(record["citation_count"]),
+                "faculty_count": int(record["faculty_count"]),
+                "growth_rate": None if pd.isna(record["growth_rate"]) else float(record["growth_rate"]),
+                "trending_score": float(record["trending_score"])
+            }
+            if self._stored.get(cell) == values:
+                continue
+            upserts.append({
+                "topic": cell[0], "year": cell[1], "quarter": YEAR_QUARTER, **values,
+                "computed": True, "updated_at": updated_at
+            })
+
+        stale_ids = [
+            self._ids[cell] for cell in self._stored
+            if cell[0] in topics and cell not in current and cell in self._ids
+        ]
+        return upserts, stale_ids
+
+    def remember(self, stored_rows: Iterable[Dict]):
+        """
+        Note the values and ids of trend rows that were written, so later
+        batches diff against them and emptied cells can be deleted. Rows
+        that failed to write are left out and come up again in the next diff.
+        """
+        for row in stored_rows:
+            cell = (row["topic"], int(row["year"]))
+            self._stored[cell] = {column: row.get(column) for column in METRIC_COLUMNS}
+            self._ids[cell] = str(row["id"])
+
+    def forget(self, deleted_ids: Iterable[str]):
+        """Drop the cells of trend rows that were deleted"""
+        deleted = set(deleted_ids)
+        for cell in [cell for cell, row_id in self._ids.items() if row_id in deleted]:
+            del self._ids[cell]
+            self._stored.pop(cell, None)
+
+    async def load(self, client) -> Tuple[List[Dict], List[str]]:
+        """
+        Read publications, authorship links and the stored trend rows, and
+        compute every cell. Only rows the engine wrote (computed) are
+        compared and deleted; other trend rows are left as they are unless
+        a computed cell replaces them.
+        Returns:
+            The trend rows that differ from what is stored and the ids of
+            computed rows with no publications behind them
+        """
+        self._reset()
+        publications = await scan_table(client, "publications", "id,year,citations,research_domains")
+        links = await scan_table(client, "faculty_publications", "faculty_id,publication_id", "publication_id")
+        stored = await scan_table(client, "research_trends", f"id,{TREND_KEY},computed,{','.join(METRIC_COLUMNS)}")
+        self.remember(row for row in stored if row.get("computed") and row.get("quarter") == YEAR_QUARTER)
+
+        topics = await asyncio.to_thread(self._apply, publications, links)
+        topics |= {topic for topic, _ in self._stored}
+        upserts, stale_ids = await asyncio.to_thread(self._diff, topics)
+        self.loaded = True
+        logger.info(f"Loaded trend engine: {len(self._publications)} publications, {len(self._cells)} cells")
+        return upserts, stale_ids
+
+    async def refresh(self, client, publications: List[Dict], links: List[Dict]) -> Tuple[List[Dict], List[str]]:
+        """
+        Fold stored publications and links into the trends (loading first
+        if needed). Pass the written rows to remember() and the deleted ids
+        to forget() afterwards.
+        Returns:
+            The trend rows to upsert and the trend row ids to delete
+        """
+        async with self._lock:
+            if not self.loaded:
+                return await self.load(client)
+            topics = await asyncio.to_thread(self._apply, publications, links)
+            return await asyncio.to_thread(self._diff, topics)
+
+
+# Shared engine, refreshed by ingestion
+trend_engine = TrendEngine()
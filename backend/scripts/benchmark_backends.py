@@ -0,0 +1,115 @@
+"""
+Measure memory footprint and latency of the classifier inference backends.
+
+Run from the backend directory:
+    python -m scripts.benchmark_backends [--backends pytorch int8 onnx] [--corpus PATH]
+
+Each backend is measured in its own subprocess so resident memory is not
+shared between them. Reported per backend: load time, resident memory added
+by loading the model, single-text latency (p50/p95), batched throughput,
+and top-1 agreement with the full-precision pytorch backend.
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "classifier_corpus.json")
+
+
+def resident_mb() -> float:
+    """Current resident set size in MB (Linux), falling back to the peak"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(backend: str, corpus: str) -> Dict:
+    """Load one backend and time it on the corpus; runs inside the worker process"""
+    import torch  # noqa: F401 - count framework imports in the baseline, not the model
+    from app.ml.classification_cache import ClassificationCache
+    from app.ml.domain_classifier import DomainClassifier, domains_from_scores, get_classifier
+    from scripts.benchmark_classifier import load_corpus
+
+    texts = load_corpus(corpus)
+    baseline_mb = resident_mb()
+
+    started = time.perf_counter()
+    get_classifier(backend)
+    load_seconds = time.perf_counter() - started
+    loaded_mb = resident_mb()
+
+    # Cache and fast path off so every text goes through the model
+    classifier = DomainClassifier(cache=ClassificationCache(":memory:"), fast_path=False, backend=backend)
+    classifier.score_texts(texts[:2])  # warm-up
+
+    latencies: List[float] = []
+    for text in texts:
+        classifier.cache = ClassificationCache(":memory:")
+        started = time.perf_counter()
+        classifier.score_texts([text])
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    classifier.cache = ClassificationCache(":memory:")
+    started = time.perf_counter()
+    scores = classifier.score_texts(texts)
+    batched_seconds = time.perf_counter() - started
+
+    return {
+        "backend": backend,
+        "load_seconds": round(load_seconds, 2),
+        "model_rss_mb": round(loaded_mb - baseline_mb, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "latency_ms_p50": round(statistics.median(latencies), 1),
+        "latency_ms_p95": round(sorted(latencies)[int(0.95 * (len(latencies) - 1))], 1),
+        "batched_texts_per_sec": round(len(texts) / batched_seconds, 2),
+        "top_domains": [domains_from_scores(s)[0] for s in scores]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["pytorch", "int8", "onnx"])
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure(args.worker, args.corpus)))
+        return
+
+    results = []
+    for backend in args.backends:
+        completed = subprocess.run(
+            [sys.executable, "-m", "scripts.benchmark_backends", "--worker", backend, "--corpus", args.corpus],
+            capture_output=True,
+            text=True
+        )
+        if completed.returncode != 0:
+            error = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "failed"
+            results.append({"backend": backend, "error": error})
+            continue
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    reference = next((r["top_domains"] for r in results if r.get("backend") == "pytorch" and "top_domains" in r), None)
+    for result in results:
+        top_domains = result.pop("top_domains", None)
+        if reference and top_domains:
+            matches = sum(a == b for a, b in zip(reference, top_domains))
+            result["top1_agreement_with_pytorch"] = round(matches / len(reference), 3)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
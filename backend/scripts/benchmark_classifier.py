@@ -0,0 +1,102 @@
+"""
+Compare the tiered domain classifier against zero-shot BART alone.
+
+Run from the backend directory:
+    python -m scripts.benchmark_classifier [--corpus PATH] [--threshold 0.3]
+
+Reports throughput (texts/sec) of each configuration, how many texts the
+fast path answered, and how closely the tiered results agree with BART.
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from typing import Dict, List
+
+from app.ml.classification_cache import ClassificationCache
+from app.ml.domain_classifier import DomainClassifier, domains_from_scores, get_classifier
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "classifier_corpus.json")
+
+
+def load_corpus(path: str) -> List[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [f"{p['title']} {p.get('abstract') or ''}" for p in json.load(f)]
+
+
+def timed_scores(classifier: DomainClassifier, texts: List[str]):
+    started = time.perf_counter()
+    scores = classifier.score_texts(texts)
+    return scores, time.perf_counter() - started
+
+
+def agreement(reference: List[List[str]], candidate: List[List[str]], indices: List[int]) -> Dict:
+    """Top-1 agreement and mean Jaccard overlap over the given texts"""
+    if not indices:
+        return {"texts": 0, "top1": None, "top1_in_reference": None, "jaccard": None}
+    top1 = sum(reference[i][0] == candidate[i][0] for i in indices)
+    top1_in_reference = sum(candidate[i][0] in reference[i] for i in indices)
+    jaccard = sum(
+        len(set(reference[i]) & set(candidate[i])) / len(set(reference[i]) | set(candidate[i]))
+        for i in indices
+    )
+    return {
+        "texts": len(indices),
+        "top1": round(top1 / len(indices), 3),
+        "top1_in_reference": round(top1_in_reference / len(indices), 3),
+        "jaccard": round(jaccard / len(indices), 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--threshold", type=float, default=0.3)
+    args = parser.parse_args()
+
+    texts = load_corpus(args.corpus)
+
+    started = time.perf_counter()
+    get_classifier()
+    print(f"Model load: {time.perf_counter() - started:.2f}s")
+
+    # Fresh in-memory caches so every text is classified from scratch
+    baseline = DomainClassifier(cache=ClassificationCache(":memory:"), fast_path=False)
+    tiered = DomainClassifier(cache=ClassificationCache(":memory:"), fast_path=True)
+
+    baseline_scores, baseline_seconds = timed_scores(baseline, texts)
+    tiered_scores, tiered_seconds = timed_scores(tiered, texts)
+
+    # The fast path alone, repeated so the timing is measurable
+    repeats = 50
+    started = time.perf_counter()
+    for _ in range(repeats):
+        fast_results = tiered.fast_path.score(texts)
+    fast_seconds = (time.perf_counter() - started) / repeats
+
+    reference = [domains_from_scores(s, args.threshold) for s in baseline_scores]
+    candidate = [domains_from_scores(s, args.threshold) for s in tiered_scores]
+    answered = [i for i, result in enumerate(fast_results) if result is not None]
+
+    report = {
+        "texts": len(texts),
+        "throughput_texts_per_sec": {
+            "zero_shot_only": round(len(texts) / baseline_seconds, 2),
+            "tiered": round(len(texts) / tiered_seconds, 2),
+            "fast_path_only": round(len(texts) / fast_seconds, 2)
+        },
+        "fast_path_coverage": round(len(answered) / len(texts), 3),
+        "agreement_with_zero_shot": {
+            "all_texts": agreement(reference, candidate, list(range(len(texts)))),
+            "fast_path_texts": agreement(reference, candidate, answered)
+        }
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Measure the per-row cost of resolving institution names.
+
+Run from the backend directory:
+    python -m scripts.benchmark_institutions [--rows 100000] [--distinct 500] [--extra-institutions 0]
+
+Generates a synthetic list of institution names (registered aliases in
+varied spellings, plus unregistered names) and resolves every row with the
+old linear-scan normalize_institution, the same linear scan over every
+registered alias, the alias automaton without memoization, and the
+memoized registry lookup. Reports microseconds per row.
+
+--extra-institutions adds synthetic registry entries (six aliases each) to
+show how the linear scan and the automaton scale with the registry size.
+"""
+import argparse
+import json
+import random
+import time
+from typing import Callable, Dict, List
+
+from app.services.institutions import INSTITUTION_ALIASES_PATH, InstitutionRegistry
+
+
+def legacy_normalize_institution(institution: str) -> str:
+    """The previous implementation from routes/search.py, kept for comparison"""
+    if not institution:
+        return ""
+    inst_lower = institution.lower().strip()
+    variations = {
+        "m s ramaiah institute of technology": [
+            "m s ramaiah institute of technology",
+            "m.s. ramaiah institute of technology",
+            "ms ramaiah institute of technology",
+            "ramaiah institute of technology",
+            "msrit",
+            "rit bangalore"
+        ],
+    }
+    for standard_name, variants in variations.items():
+        if inst_lower in variants or any(v in inst_lower for v in variants):
+            return "M S Ramaiah Institute of Technology, Bangalore"
+    return institution
+
+
+def linear_scan(entries: List[Dict]) -> Callable[[str], str]:
+    """The legacy substring scan, generalized to every entry of a registry"""
+    variants = [(entry["name"], [a.lower() for a in [entry["name"]] + entry.get("aliases", [])]) for entry in entries]
+
+    def resolve(institution: str) -> str:
+        inst_lower = institution.lower().strip()
+        for name, aliases in variants:
+            if inst_lower in aliases or any(a in inst_lower for a in aliases):
+                return name
+        return institution
+    return resolve
+
+
+def synthetic_entries(count: int) -> List[Dict]:
+    return [{
+        "name": f"College of Engineering {i}, City {i}",
+        "aliases": [f"college of engineering {i}", f"coe{i}", f"coe {i} city {i}", f"c.o.e. {i}",
+                    f"engineering college {i}", f"ce{i} city"]
+    } for i in range(count)]
+
+
+def synthetic_names(registry: InstitutionRegistry, rows: int, distinct: int, seed: int = 7) -> List[str]:
+    """Rows drawn from a pool of distinct spellings, like a faculty table"""
+    rng = random.Random(seed)
+    pool = []
+    aliases = [alias for spellings in registry.aliases for alias in spellings]
+    suffixes = ["", ", Bangalore", ", Bengaluru", " (Autonomous)", ", Karnataka"]
+    while len(pool) < distinct:
+        if aliases and rng.random() < 0.5:
+            name = rng.choice(aliases) + rng.choice(suffixes)
+            pool.append(name.upper() if rng.random() < 0.2 else name)
+        else:
+            pool.append(f"Institute of Science and Technology {rng.randint(1, 10 * distinct)}" + rng.choice(suffixes))
+    return [rng.choice(pool) for _ in range(rows)]
+
+
+def per_row_us(resolve: Callable[[str], str], names: List[str]) -> float:
+    started = time.perf_counter()
+    for name in names:
+        resolve(name)
+    return (time.perf_counter() - started) / len(names) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--distinct", type=int, default=500)
+    parser.add_argument("--extra-institutions", type=int, default=0)
+    args = parser.parse_args()
+
+    with open(INSTITUTION_ALIASES_PATH, "r", encoding="utf-8") as f:
+        entries = json.load(f) + synthetic_entries(args.extra_institutions)
+    registry = InstitutionRegistry(entries)
+    uncached = InstitutionRegistry(entries, cache_size=0)
+    names = synthetic_names(registry, args.rows, args.distinct)
+
+    memoized = per_row_us(registry.canonical_name, names)
+    report = {
+        "rows": args.rows,
+        "distinct_names": len(set(names)),
+        "registered_institutions": len(registry.names),
+        "us_per_row": {
+            "legacy_normalize_institution": round(per_row_us(legacy_normalize_institution, names), 3),
+            "linear_scan_all_aliases": round(per_row_us(linear_scan(entries), names), 3),
+            "automaton_uncached": round(per_row_us(uncached.canonical_name, names), 3),
+            "automaton_memoized": round(memoized, 3)
+        },
+        "lookup_cache": registry.resolve.cache_info()._asdict()
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
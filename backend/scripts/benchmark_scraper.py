@@ -0,0 +1,103 @@
+"""
+Compare the sequential and async IRINS crawls against saved pages.
+
+Run from the backend directory:
+    python -m scripts.benchmark_scraper [--latency 0.1] [--error-rate 0.0] [--delay 0]
+                                        [--concurrency 5] [--rate 5] [--burst 10]
+
+Serves scripts/fixtures/irins (an index page, department pages and faculty
+profiles saved in the IRINS layout) from a local HTTP server that adds
+--latency seconds to every response and fails --error-rate of them with a
+503, then crawls it with IRINSScraper and AsyncIRINSScraper. --delay is the
+sequential crawler's pause between departments (SCRAPER_DELAY, in seconds);
+--concurrency, --rate and --burst are the async crawler's per-host limits.
+Reports wall time and request/retry counts, and checks that both crawls
+extract the same faculty.
+"""
+import argparse
+import asyncio
+import functools
+import json
+import os
+import random
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+from scripts.scraper import (
+    MAX_CONCURRENT_REQUESTS,
+    SCRAPER_BURST,
+    SCRAPER_RATE_LIMIT,
+    AsyncIRINSScraper,
+    IRINSScraper
+)
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "irins")
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    latency = 0.0
+    error_rate = 0.0
+    rng = random.Random(7)
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        if self.path != "/" and self.rng.random() < self.error_rate:
+            self.send_error(503, "Service Unavailable")
+            return
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_fixtures(latency: float, error_rate: float) -> ThreadingHTTPServer:
+    """Start the fixture server on a free port in a background thread"""
+    handler = type("Handler", (FixtureHandler,), {"latency": latency, "error_rate": error_rate})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(handler, directory=FIXTURE_DIR))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def comparable(faculty: List[Dict]) -> List[tuple]:
+    return sorted((f["name"], f["department"], len(f["publications"])) for f in faculty)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--delay", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENT_REQUESTS)
+    parser.add_argument("--rate", type=float, default=SCRAPER_RATE_LIMIT)
+    parser.add_argument("--burst", type=int, default=SCRAPER_BURST)
+    args = parser.parse_args()
+
+    server = serve_fixtures(args.latency, args.error_rate)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/"
+    try:
+        started = time.perf_counter()
+        sync_results = IRINSScraper(base_url, delay=args.delay).scrape()
+        sync_seconds = time.perf_counter() - started
+
+        scraper = AsyncIRINSScraper(base_url, max_concurrent=args.concurrency, rate_limit=args.rate,
+                                    burst=args.burst, backoff=0.05)
+        started = time.perf_counter()
+        async_results = asyncio.run(scraper.scrape())
+        async_seconds = time.perf_counter() - started
+    finally:
+        server.shutdown()
+
+    report = {
+        "faculty": {"sync": len(sync_results["faculty"]), "async": len(async_results["faculty"])},
+        "same_faculty": comparable(sync_results["faculty"]) == comparable(async_results["faculty"]),
+        "seconds": {"sync": round(sync_seconds, 3), "async": round(async_seconds, 3)},
+        "speedup": round(sync_seconds / async_seconds, 1) if async_seconds else None,
+        "async_crawl_stats": async_results["crawl_stats"]
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
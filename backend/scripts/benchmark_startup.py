@@ -0,0 +1,75 @@
+"""
+Measure cold-start time and resident memory of the API.
+
+Run from the backend directory:
+    python -m scripts.benchmark_startup [--runs 5] [--warmup]
+
+Every run starts a fresh interpreter, imports app.main:app and runs its
+startup (lifespan) hooks. --warmup sets ML_WARMUP=true so the model load is
+included. Reports median import and startup seconds, resident memory, and
+whether the heavy ML libraries were imported.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = r"""
+import asyncio, json, sys, time
+
+def resident_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def startup():
+    async with app.router.lifespan_context(app):
+        pass
+
+asyncio.run(startup())
+ready = time.perf_counter()
+
+print(json.dumps({
+    "import_seconds": imported - started,
+    "startup_seconds": ready - started,
+    "rss_mb": resident_mb(),
+    "ml_modules_loaded": sorted(m for m in ("torch", "transformers", "sklearn") if m in sys.modules)
+}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warmup", action="store_true", help="include the ML_WARMUP model load")
+    args = parser.parse_args()
+
+    env = dict(os.environ, ML_WARMUP="true" if args.warmup else "false")
+    samples = []
+    for _ in range(args.runs):
+        completed = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, env=env)
+        if completed.returncode != 0:
+            print(completed.stderr, file=sys.stderr)
+            sys.exit(completed.returncode)
+        samples.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    print(json.dumps({
+        "runs": args.runs,
+        "warmup": args.warmup,
+        "import_seconds_median": round(statistics.median(s["import_seconds"] for s in samples), 3),
+        "startup_seconds_median": round(statistics.median(s["startup_seconds"] for s in samples), 3),
+        "rss_mb_median": round(statistics.median(s["rss_mb"] for s in samples), 1),
+        "ml_modules_loaded": samples[-1]["ml_modules_loaded"]
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
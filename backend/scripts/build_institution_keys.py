@@ -0,0 +1,57 @@
+"""
+Set faculty.institution_key from the institution alias registry.
+
+Run from the backend directory (after migration 010):
+    python -m scripts.build_institution_keys
+
+Every spelling of a registered institution gets the same key (its
+normalized canonical name); unregistered names get their normalized
+spelling. Institution filters match on this key, so run this after
+editing app/data/institution_aliases.json or loading faculty from
+outside the API.
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import defaultdict
+
+from app.database.supabase import get_supabase_client
+from app.services.institutions import get_institution_registry
+from app.services.trends import scan_table
+
+
+async def build() -> dict:
+    client = get_supabase_client()
+    registry = get_institution_registry()
+
+    started = time.perf_counter()
+    rows = await scan_table(client, "faculty", "id,institution,institution_key")
+    stored_keys = defaultdict(set)
+    for row in rows:
+        if row.get("institution"):
+            stored_keys[row["institution"]].add(row.get("institution_key"))
+
+    # One update per spelling whose rows do not all carry its key yet
+    updated = 0
+    for institution, keys in stored_keys.items():
+        key = registry.institution_key(institution)
+        if keys != {key}:
+            await client.table("faculty").update({"institution_key": key}).eq("institution", institution).execute()
+            updated += 1
+    return {
+        "faculty": len(rows),
+        "spellings": len(stored_keys),
+        "spellings_updated": updated,
+        "seconds": round(time.perf_counter() - started, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+    print(json.dumps(asyncio.run(build()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Recompute every similar-publications and similar-faculty list.
+
+Run from the backend directory (after migration 007):
+    python -m scripts.build_neighbors [--k 20]
+
+Reads all embeddings and authorship links, computes each item's top-k
+neighbours with blocked matrix products and upserts the lists into
+publication_neighbors and faculty_neighbors. Ingestion keeps the lists
+current afterwards (running servers reload the lists, and adopt their k,
+within NEIGHBORS_INDEX_TTL); run this after changing the embedding model
+or k, or after bulk edits made outside ingestion.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from app.database.supabase import get_supabase_client
+from app.services.ingestion import BulkUpserter
+from app.services.neighbors import NEIGHBOR_TABLES, NEIGHBORS_K, SimilarityIndex
+
+
+async def build(k: int) -> dict:
+    client = get_supabase_client()
+    index = SimilarityIndex(k)
+
+    started = time.perf_counter()
+    computed = await index.rebuild(client)
+    compute_seconds = time.perf_counter() - started
+
+    results = {"k": k, "compute_seconds": round(compute_seconds, 3)}
+    for kind, (table, key) in NEIGHBOR_TABLES.items():
+        upserter = BulkUpserter(client, table, key)
+        await upserter.upsert(index.rows(kind, sorted(computed[kind])))
+        results[table] = {"lists": len(computed[kind]), **upserter.stats()}
+    results["seconds"] = round(time.perf_counter() - started, 3)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=NEIGHBORS_K)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(build(args.k)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
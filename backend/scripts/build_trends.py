@@ -0,0 +1,54 @@
+"""
+Recompute every research_trends cell from the publications table.
+
+Run from the backend directory (after migration 009):
+    python -m scripts.build_trends [--window 3]
+
+Reads all publications and authorship links, aggregates them per research
+domain and year, and writes the cells that differ from what is stored,
+deleting the cells it wrote earlier that have no publications left (rows
+loaded into research_trends by other means are left alone). Ingestion keeps the cells
+current afterwards; run this after changing the window or after edits
+made outside ingestion.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from app.database.supabase import get_supabase_client
+from app.services.ingestion import BulkUpserter
+from app.services.trends import TREND_KEY, TRENDS_WINDOW_YEARS, TrendEngine
+
+
+async def build(window: int) -> dict:
+    client = get_supabase_client()
+    engine = TrendEngine(window)
+
+    started = time.perf_counter()
+    upserts, stale_ids = await engine.load(client)
+    compute_seconds = time.perf_counter() - started
+
+    upserter = BulkUpserter(client, "research_trends", TREND_KEY)
+    await upserter.upsert(upserts)
+    if stale_ids:
+        await client.table("research_trends").delete().in_("id", stale_ids).execute()
+    return {
+        "window": window,
+        "compute_seconds": round(compute_seconds, 3),
+        "cells_written": len(upserts),
+        "cells_deleted": len(stale_ids),
+        "research_trends": upserter.stats(),
+        "seconds": round(time.perf_counter() - started, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--window", type=int, default=TRENDS_WINDOW_YEARS)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(build(args.window)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
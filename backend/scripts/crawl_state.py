@@ -0,0 +1,228 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CRAWL_STATE_PATH = os.getenv("CRAWL_STATE_PATH", "./scraper_state/crawl_state.sqlite3")
+
+# Fields that change on every scrape and so must not count as a content change
+VOLATILE_FIELDS = ("scraped_at",)
+
+
+def record_hash(record: Dict) -> str:
+    """
+    Hash the extracted faculty record rather than the raw HTML, so markup
+    that changes on every request (tokens, timestamps) is not a change
+    """
+    stable = {key: value for key, value in record.items() if key not in VOLATILE_FIELDS}
+    return hashlib.sha256(json.dumps(stable, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class CrawlStateStore:
+    """
+    SQLite-backed crawl state for incremental, resumable scraping.
+
+    pages keeps one fingerprint per profile URL: the ETag and Last-Modified
+    validators for conditional GETs and a hash of the extracted record.
+    A changed record is stored with the fingerprint and stays pending until
+    the caller confirms it was stored downstream (mark_emitted), so a crash
+    between scraping and storing re-emits it on the next run.
+
+    Each crawl is a run; visited URLs are checkpointed per run as they are
+    processed. begin_run() resumes the last run if it never finished, and
+    is_visited() lets the crawler skip what that run already covered.
+    """
+
+    def __init__(self, path: str = CRAWL_STATE_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("pragma journal_mode=wal")
+        self._conn.executescript("""
+            create table if not exists pages (
+                url text primary key,
+                etag text,
+                last_modified text,
+                content_hash text,
+                record text,
+                pending integer not null default 0,
+                fetched_at text,
+                changed_at text
+            );
+            create table if not exists runs (
+                id integer primary key autoincrement,
+                base_url text not null,
+                started_at text not null,
+                finished_at text
+            );
+            create table if not exists run_pages (
+                run_id integer not null,
+                url text not null,
+                primary key (run_id, url)
+            );
+        """)
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self.run_id: Optional[int] = None
+        self._visited: set = set()
+        self.resumed = False
+
+    def begin_run(self, base_url: str) -> int:
+        """Resume the last unfinished crawl of base_url, or start a new one"""
+        with self._lock:
+            row = self._conn.execute(
+                "select id from runs where base_url = ? and finished_at is null order by id desc limit 1",
+                (base_url,)
+            ).fetchone()
+            if row:
+                self.run_id = row[0]
+                self._visited = {url for (url,) in self._conn.execute(
+                    "select url from run_pages where run_id = ?", (self.run_id,)
+                )}
+                self.resumed = True
+                logger.info(f"Resuming crawl run {self.run_id}: {len(self._visited)} pages already done")
+            else:
+                self.run_id = self._conn.execute(
+                    "insert into runs (base_url, started_at) values (?, ?)",
+                    (base_url, datetime.now().isoformat())
+                ).lastrowid
+                self._visited = set()
+                self.resumed = False
+                self._conn.commit()
+            return self.run_id
+
+    def finish_run(self):
+        """Mark the current run complete; the next begin_run starts afresh"""
+        with self._lock:
+            self._conn.execute(
+                "update runs set finished_at = ? where id = ?",
+                (datetime.now().isoformat(), self.run_id)
+            )
+            self._conn.execute("delete from run_pages where run_id = ?", (self.run_id,))
+            self._conn.commit()
+
+    def is_visited(self, url: str) -> bool:
+        return url in self._visited
+
+    def validators(self, url: str) -> Dict[str, str]:
+        """Conditional request headers for a previously fetched URL"""
+        with self._lock:
+            row = self._conn.execute(
+                "select etag, last_modified from pages where url = ?", (url,)
+            ).fetchone()
+        headers = {}
+        if row and row[0]:
+            headers["If-None-Match"] = row[0]
+        if row and row[1]:
+            headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def record_unchanged(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """Checkpoint a page that came back 304 or with an identical record"""
+        with self._lock:
+            self._conn.execute(
+                """
+                update pages set fetched_at = ?,
+                    etag = coalesce(?, etag),
+                    last_modified = coalesce(?, last_modified)
+                where url = ?
+                """,
+                (datetime.now().isoformat(), etag, last_modified, url)
+            )
+            self._checkpoint(url)
+
+    def record_page(self, url: str, record: Dict, etag: Optional[str] = None, last_modified: Optional[str] = None) -> bool:
+        """
+        Store a fetched page's fingerprint and checkpoint it
+        Returns:
+            True if the record changed since the last crawl (it is then
+            pending until mark_emitted)
+        """
+        digest = record_hash(record)
+        now = datetime.now().isoformat()
+        with self._lock:
+            row = self._conn.execute("select content_hash from pages where url = ?", (url,)).fetchone()
+            changed = row is None or row[0] != digest
+            if changed:
+                self._conn.execute(
+                    """
+                    insert into pages (url, etag, last_modified, content_hash, record, pending, fetched_at, changed_at)
+                    values (?, ?, ?, ?, ?, 1, ?, ?)
+                    on conflict (url) do update set
+                        etag = excluded.etag, last_modified = excluded.last_modified,
+                        content_hash = excluded.content_hash, record = excluded.record,
+                        pending = 1, fetched_at = excluded.fetched_at, changed_at = excluded.changed_at
+                    """,
+                    (url, etag, last_modified, digest, json.dumps(record, default=str), now, now)
+                )
+            else:
+                self._conn.execute(
+                    "update pages set etag = ?, last_modified = ?, fetched_at = ? where url = ?",
+                    (etag, last_modified, now, url)
+                )
+            self._checkpoint(url)
+        return changed
+
+    def _checkpoint(self, url: str):
+        if self.run_id is not None:
+            self._conn.execute(
+                "insert or ignore into run_pages (run_id, url) values (?, ?)", (self.run_id, url)
+            )
+            self._visited.add(url)
+        self._conn.commit()
+
+    def pending_records(self) -> List[Dict]:
+        """Changed records not yet confirmed as stored downstream"""
+        with self._lock:
+            rows = self._conn.execute("select record from pages where pending = 1 order by changed_at").fetchall()
+        return [json.loads(record) for (record,) in rows]
+
+    def mark_emitted(self, urls: Iterable[str]):
+        """Confirm that the records of urls were stored downstream"""
+        urls = list(urls)
+        with self._lock:
+            for start in range(0, len(urls), 500):
+                chunk = urls[start:start + 500]
+                self._conn.execute(
+                    f"update pages set pending = 0, record = null where url in ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+            self._conn.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            pages, pending = self._conn.execute(
+                "select count(*), coalesce(sum(pending), 0) from pages"
+            ).fetchone()
+        return {
+            "path": self.path,
+            "pages": pages,
+            "pending": pending,
+            "run_id": self.run_id,
+            "resumed": self.resumed,
+            "visited_this_run": len(self._visited)
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+@lru_cache()
+def get_crawl_state() -> Optional[CrawlStateStore]:
+    """Shared crawl state, or None if it is disabled or cannot be opened"""
+    if os.getenv("CRAWL_STATE_ENABLED", "true").lower() != "true":
+        return None
+    try:
+        return CrawlStateStore()
+    except Exception as e:
+        logger.error(f"Crawl state unavailable: {str(e)}")
+        return None
@@ -1,12 +1,23 @@
+import argparse
+import asyncio
+import os
+import random
 import requests
+import httpx
 from bs4 import BeautifulSoup
 import time
 import logging
 from typing import Dict, List, Optional
 import re
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlsplit
 import json
 from datetime import datetime
+from dotenv import load_dotenv
+try:
+    from scripts.crawl_state import CRAWL_STATE_PATH, CrawlStateStore
+except ImportError:
+    # Run directly as python scripts/scraper.py, with only scripts/ on the path
+    from crawl_state import CRAWL_STATE_PATH, CrawlStateStore
 
 # Configure logging
 logging.basicConfig(
@@ -15,16 +26,48 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+load_dotenv()
+
+IRINS_BASE_URL = os.getenv("IRINS_BASE_URL", "https://msrit.irins.org/")
+# Pause between departments in the sequential crawl, in milliseconds
+SCRAPER_DELAY = int(os.getenv("SCRAPER_DELAY", "2000"))
+# Async crawl: requests in flight per host, and sustained requests/sec per host
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "5"))
+SCRAPER_RATE_LIMIT = float(os.getenv("SCRAPER_RATE_LIMIT", "5"))
+SCRAPER_BURST = int(os.getenv("SCRAPER_BURST", "10"))
+SCRAPER_MAX_RETRIES = int(os.getenv("SCRAPER_MAX_RETRIES", "3"))
+SCRAPER_RETRY_BACKOFF = float(os.getenv("SCRAPER_RETRY_BACKOFF", "1.0"))
+SCRAPER_TIMEOUT = float(os.getenv("SCRAPER_TIMEOUT", "30"))
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Statuses worth retrying; anything else >= 400 fails immediately
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
 class IRINSScraper:
-    def __init__(self, base_url: str):
+    """
+    Sequential IRINS crawler.
+
+    With a CrawlStateStore, profile pages are fetched with conditional
+    requests, unchanged and already-checkpointed profiles are skipped, and
+    scrape() returns only faculty whose records changed (including any left
+    pending by an interrupted run).
+    """
+
+    def __init__(self, base_url: str, delay: float = SCRAPER_DELAY / 1000, state: Optional[CrawlStateStore] = None):
         self.base_url = base_url
+        self.delay = delay
+        self.state = state
         self.session = requests.Session()
         self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            'User-Agent': USER_AGENT
         }
         self.faculty_data = []
         self.department_counter = {}
-        
+        self.unchanged = 0
+        self.skipped = 0
+
+
     def get_page(self, url: str) -> Optional[BeautifulSoup]:
         """Fetch a page and return its BeautifulSoup object"""
         try:
@@ -66,6 +109,22 @@ class IRINSScraper:
 
         return departments
 
+    def extract_profile_links(self, soup: BeautifulSoup, dept_name: str) -> List[str]:
+        """Extract faculty profile URLs from a department page"""
+        profile_urls = []
+        # Find the main div containing faculty profiles - updated selector for MSRIT
+        faculty_container = soup.select_one('div.row.faculty-list')
+        if not faculty_container:
+            logger.error(f"Could not find faculty container for department: {dept_name}")
+            return profile_urls
+
+        for faculty_div in faculty_container.find_all('div', class_='col-md-4'):
+            # Extract faculty profile link
+            profile_link = faculty_div.find('a')
+            if profile_link and profile_link.get('href'):
+                profile_urls.append(urljoin(self.base_url, profile_link['href']))
+        return profile_urls
+
     def extract_faculty_from_department(self, dept_url: str, dept_name: str) -> List[Dict]:
         """Extract faculty information from a department page"""
         faculty_list = []
@@ -74,21 +133,9 @@ class IRINSScraper:
             if not soup:
                 return faculty_list
 
-            # Find the main div containing faculty profiles - updated selector for MSRIT
-            faculty_container = soup.select_one('div.row.faculty-list')
-            if not faculty_container:
-                logger.error(f"Could not find faculty container for department: {dept_name}")
-                return faculty_list
-
             # Extract faculty profiles
-            for faculty_div in faculty_container.find_all('div', class_='col-md-4'):
+            for profile_url in self.extract_profile_links(soup, dept_name):
                 try:
-                    # Extract faculty profile link
-                    profile_link = faculty_div.find('a')
-                    if not profile_link:
-                        continue
-
-                    profile_url = urljoin(self.base_url, profile_link['href'])
                     faculty_data = self.extract_faculty_profile(profile_url, dept_name)
                     if faculty_data:
                         faculty_list.append(faculty_data)
@@ -96,7 +143,7 @@ class IRINSScraper:
                         logger.info(f"Extracted faculty: {faculty_data['name']} from {dept_name}")
 
                 except Exception as e:
-                    logger.error(f"Error processing faculty div: {str(e)}")
+                    logger.error(f"Error processing faculty profile {profile_url}: {str(e)}")
                     continue
 
         except Exception as e:
@@ -106,11 +153,45 @@ class IRINSScraper:
 
     def extract_faculty_profile(self, profile_url: str, department: str) -> Optional[Dict]:
         """Extract detailed information from a faculty profile page"""
-        try:
+        if self.state is None:
             soup = self.get_page(profile_url)
             if not soup:
                 return None
+            return self.parse_faculty_profile(soup, profile_url, department)
+
+        if self.state.is_visited(profile_url):
+            self.skipped += 1
+            return None
+        try:
+            response = self.session.get(profile_url, headers={**self.headers, **self.state.validators(profile_url)})
+            response.raise_for_status()
+        except Exception as e:
+            logger.error(f"Error fetching {profile_url}: {str(e)}")
+            return None
+        return self.store_profile(profile_url, department, response.status_code, response.headers, response.text)
+
+    def store_profile(self, profile_url: str, department: str, status_code: int, headers, html: str) -> Optional[Dict]:
+        """
+        Fingerprint a conditionally fetched profile in the crawl state
+        Returns:
+            The faculty record if it changed since the last crawl, else None
+        """
+        etag, last_modified = headers.get('ETag'), headers.get('Last-Modified')
+        if status_code == 304:
+            self.state.record_unchanged(profile_url, etag, last_modified)
+            self.unchanged += 1
+            return None
+        record = self.parse_faculty_profile(BeautifulSoup(html, 'html.parser'), profile_url, department)
+        if record is None:
+            return None
+        if not self.state.record_page(profile_url, record, etag, last_modified):
+            self.unchanged += 1
+            return None
+        return record
 
+    def parse_faculty_profile(self, soup: BeautifulSoup, profile_url: str, department: str) -> Optional[Dict]:
+        """Build the faculty record from a fetched profile page"""
+        try:
             # Extract basic information - updated selectors for MSRIT
             name = soup.select_one('h1.page-header')
             name = name.text.strip() if name else "Unknown"
@@ -177,6 +258,9 @@ class IRINSScraper:
     def scrape(self) -> Dict:
         """Main scraping function"""
         try:
+            if self.state is not None:
+                self.state.begin_run(self.base_url)
+
             # Get the main page
             soup = self.get_page(self.base_url)
             if not soup:
@@ -193,14 +277,9 @@ class IRINSScraper:
                 self.faculty_data.extend(faculty_list)
                 
                 # Add a small delay between departments
-                time.sleep(2)
+                time.sleep(self.delay)
 
-            return {
-                'faculty': self.faculty_data,
-                'department_stats': self.department_counter,
-                'total_faculty': len(self.faculty_data),
-                'total_departments': len(departments)
-            }
+            return self.results(departments)
 
         except Exception as e:
             logger.error(f"Error in main scraping function: {str(e)}")
@@ -210,17 +289,255 @@ class IRINSScraper:
                 'department_stats': self.department_counter
             }
 
+    def results(self, departments: List[Dict]) -> Dict:
+        """Result of a completed crawl; with crawl state, only changed faculty"""
+        if self.state is not None:
+            self.state.finish_run()
+            # Changed records stay pending until mark_emitted, so this also
+            # re-emits whatever an interrupted run scraped but never stored
+            self.faculty_data = self.state.pending_records()
+        return {
+            'faculty': self.faculty_data,
+            'department_stats': self.department_counter,
+            'total_faculty': len(self.faculty_data),
+            'total_departments': len(departments),
+            'unchanged_faculty': self.unchanged,
+            'skipped_faculty': self.skipped
+        }
+
+class TokenBucket:
+    """
+    Async token bucket: allows bursts of up to capacity requests, then
+    rate requests per second on average. Waiters are served in order.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class AsyncIRINSScraper(IRINSScraper):
+    """
+    Concurrent crawl over one pooled keep-alive connection set.
+
+    Department and profile pages are fetched in parallel, with at most
+    max_concurrent requests in flight and rate_limit requests/sec (bursts
+    of up to burst) per host. Timeouts, connection errors, 429 and 5xx
+    responses are retried with exponential backoff and jitter, honouring
+    Retry-After. Parsing reuses the IRINSScraper selectors and runs in a
+    worker thread so the event loop keeps serving other requests.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        max_concurrent: int = MAX_CONCURRENT_REQUESTS,
+        rate_limit: float = SCRAPER_RATE_LIMIT,
+        burst: int = SCRAPER_BURST,
+        max_retries: int = SCRAPER_MAX_RETRIES,
+        backoff: float = SCRAPER_RETRY_BACKOFF,
+        timeout: float = SCRAPER_TIMEOUT,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        state: Optional[CrawlStateStore] = None
+    ):
+        super().__init__(base_url, delay=0, state=state)
+        self.max_concurrent = max_concurrent
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.transport = transport
+        self.client: Optional[httpx.AsyncClient] = None
+        self._hosts: Dict[str, tuple] = {}
+        self.requests_made = 0
+        self.retries = 0
+        self.failures = 0
+
+    def _host_limits(self, url: str) -> tuple:
+        host = urlsplit(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = (asyncio.Semaphore(self.max_concurrent), TokenBucket(self.rate_limit, self.burst))
+        return self._hosts[host]
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        retry_after = response.headers.get('Retry-After', '') if response is not None else ''
+        if retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff * (2 ** attempt) * (0.5 + random.random())
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> Optional[httpx.Response]:
+        """Fetch a page (a 304 counts as success), or None once retries are exhausted"""
+        semaphore, bucket = self._host_limits(url)
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                async with semaphore:
+                    await bucket.acquire()
+                    self.requests_made += 1
+                    response = await self.client.get(url, headers=headers)
+                if response.status_code < 400:
+                    return response
+                if response.status_code not in RETRYABLE_STATUSES:
+                    logger.error(f"Error fetching {url}: HTTP {response.status_code}")
+                    break
+                error = f"HTTP {response.status_code}"
+            except (httpx.TransportError, asyncio.TimeoutError) as e:
+                error = str(e) or type(e).__name__
+            if attempt == self.max_retries:
+                logger.error(f"Error fetching {url}: {error} (gave up after {attempt + 1} attempts)")
+                break
+            self.retries += 1
+            delay = self._retry_delay(attempt, response)
+            logger.warning(f"Fetching {url} failed ({error}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+        self.failures += 1
+        return None
+
+    async def get_page_async(self, url: str) -> Optional[BeautifulSoup]:
+        response = await self.fetch(url)
+        if response is None:
+            return None
+        return await asyncio.to_thread(BeautifulSoup, response.text, 'html.parser')
+
+    async def fetch_profile(self, profile_url: str) -> Optional[httpx.Response]:
+        """Fetch a profile page, conditionally when there is crawl state; None if skipped or failed"""
+        if self.state is None:
+            return await self.fetch(profile_url)
+        if self.state.is_visited(profile_url):
+            self.skipped += 1
+            return None
+        return await self.fetch(profile_url, self.state.validators(profile_url))
+
+    def parse_profile_response(self, profile_url: str, department: str, response: httpx.Response) -> Optional[Dict]:
+        """Parse a fetched profile (blocking; run it in a thread); None if unchanged"""
+        if self.state is None:
+            return self.parse_faculty_profile(BeautifulSoup(response.text, 'html.parser'), profile_url, department)
+        return self.store_profile(profile_url, department, response.status_code, response.headers, response.text)
+
+    async def scrape_profile(self, profile_url: str, department: str) -> Optional[Dict]:
+        response = await self.fetch_profile(profile_url)
+        if response is None:
+            return None
+        return await asyncio.to_thread(self.parse_profile_response, profile_url, department, response)
+
+    async def list_departments(self) -> List[Dict]:
+        soup = await self.get_page_async(self.base_url)
+        if not soup:
+            raise Exception("Could not fetch main page")
+        departments = self.extract_departments(soup)
+        logger.info(f"Found {len(departments)} departments")
+        return departments
+
+    async def list_profiles(self, dept: Dict) -> List[str]:
+        logger.info(f"Processing department: {dept['name']}")
+        soup = await self.get_page_async(dept['url'])
+        if not soup:
+            return []
+        return self.extract_profile_links(soup, dept['name'])
+
+    def count_faculty(self, department: str, count: int = 1):
+        self.department_counter[department] = self.department_counter.get(department, 0) + count
+
+    async def scrape_department(self, dept: Dict) -> List[Dict]:
+        profile_urls = await self.list_profiles(dept)
+        profiles = await asyncio.gather(*(self.scrape_profile(url, dept['name']) for url in profile_urls))
+
+        faculty_list = [faculty for faculty in profiles if faculty]
+        if faculty_list:
+            self.count_faculty(dept['name'], len(faculty_list))
+            logger.info(f"Extracted {len(faculty_list)} faculty from {dept['name']}")
+        return faculty_list
+
+    def crawl_stats(self) -> Dict:
+        return {
+            'requests': self.requests_made,
+            'retries': self.retries,
+            'failed_pages': self.failures,
+            'unchanged_pages': self.unchanged,
+            'skipped_pages': self.skipped
+        }
+
+    async def __aenter__(self) -> "AsyncIRINSScraper":
+        """Open the pooled HTTP client the fetch methods use"""
+        self.client = httpx.AsyncClient(
+            headers=self.headers,
+            limits=httpx.Limits(
+                max_connections=self.max_concurrent,
+                max_keepalive_connections=self.max_concurrent
+            ),
+            timeout=self.timeout,
+            follow_redirects=True,
+            transport=self.transport
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+        self.client = None
+
+    async def scrape(self) -> Dict:
+        """Crawl every department concurrently; same result shape as IRINSScraper.scrape()"""
+        async with self:
+            try:
+                if self.state is not None:
+                    self.state.begin_run(self.base_url)
+
+                departments = await self.list_departments()
+
+                # gather keeps department order, so results match the sequential crawl
+                for faculty_list in await asyncio.gather(*(self.scrape_department(dept) for dept in departments)):
+                    self.faculty_data.extend(faculty_list)
+
+                results = self.results(departments)
+                results['crawl_stats'] = self.crawl_stats()
+                return results
+
+            except Exception as e:
+                logger.error(f"Error in main scraping function: {str(e)}")
+                return {
+                    'error': str(e),
+                    'faculty': self.faculty_data,
+                    'department_stats': self.department_counter,
+                    'crawl_stats': self.crawl_stats()
+                }
+
 def main():
-    # Example usage
-    base_url = "https://msrit.irins.org/"  # MSRIT IRINS URL
-    scraper = IRINSScraper(base_url)
-    results = scraper.scrape()
+    parser = argparse.ArgumentParser(description="Scrape faculty profiles from an IRINS site")
+    parser.add_argument("--base-url", default=IRINS_BASE_URL)
+    parser.add_argument("--sync", action="store_true", help="Use the sequential crawler")
+    parser.add_argument("--output", default="faculty_data.json")
+    parser.add_argument("--state", default=CRAWL_STATE_PATH, help="Crawl state database")
+    parser.add_argument("--full", action="store_true", help="Ignore the crawl state and fetch every page")
+    args = parser.parse_args()
+
+    state = None if args.full else CrawlStateStore(args.state)
+    if args.sync:
+        results = IRINSScraper(args.base_url, state=state).scrape()
+    else:
+        results = asyncio.run(AsyncIRINSScraper(args.base_url, state=state).scrape())
     
     # Save results to a JSON file
-    with open('faculty_data.json', 'w', encoding='utf-8') as f:
+    with open(args.output, 'w', encoding='utf-8') as f:
         json.dump(results, f, indent=2, ensure_ascii=False)
+    if state is not None:
+        state.mark_emitted(faculty['profile_url'] for faculty in results['faculty'])
+        logger.info(f"Crawl state: {state.stats()}")
     
-    logger.info(f"Scraping completed. Found {results['total_faculty']} faculty members across {results['total_departments']} departments.")
+    logger.info(f"Scraping completed. Found {len(results['faculty'])} faculty members across {results.get('total_departments', 0)} departments.")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -1,4 +1,5 @@
 import os
+import re
 from dotenv import load_dotenv
 from supabase import create_client, Client
 import logging
@@ -14,6 +15,59 @@ def read_sql_file(file_path):
     with open(file_path, 'r') as file:
         return file.read()
 
+def split_sql_statements(sql):
+    """
+    Split a SQL script on the semicolons that end statements, leaving
+    semicolons inside $$-quoted function bodies, string literals and
+    comments alone
+    """
+    statements = []
+    current = []
+    i = 0
+    dollar_tag = None
+    while i < len(sql):
+        char = sql[i]
+        if dollar_tag:
+            if sql.startswith(dollar_tag, i):
+                current.append(dollar_tag)
+                i += len(dollar_tag)
+                dollar_tag = None
+                continue
+        elif sql.startswith('--', i):
+            end = sql.find('\n', i)
+            end = len(sql) if end == -1 else end
+            current.append(sql[i:end])
+            i = end
+            continue
+        elif char == "'":
+            end = i + 1
+            while end < len(sql):
+                if sql[end] == "'" and sql[end + 1:end + 2] == "'":
+                    end += 2
+                elif sql[end] == "'":
+                    break
+                else:
+                    end += 1
+            current.append(sql[i:end + 1])
+            i = end + 1
+            continue
+        elif char == '$':
+            tag = re.match(r'\$[A-Za-z_]*\$', sql[i:])
+            if tag:
+                dollar_tag = tag.group(0)
+                current.append(dollar_tag)
+                i += len(dollar_tag)
+                continue
+        elif char == ';':
+            statements.append(''.join(current))
+            current = []
+            i += 1
+            continue
+        current.append(char)
+        i += 1
+    statements.append(''.join(current))
+    return [statement for statement in statements if statement.strip()]
+
 def main():
     try:
         # Initialize Supabase client
@@ -30,27 +84,29 @@ def main():
         current_dir = os.path.dirname(os.path.abspath(__file__))
         base_dir = os.path.dirname(current_dir)
 
-        # Execute schema migrations
-        schema_path = os.path.join(base_dir, 'app', 'database', 'migrations', '001_initial_schema.sql')
-        schema_sql = read_sql_file(schema_path)
-        logger.info("Executing schema migrations...")
-        
-        # Split the SQL into separate statements and execute each one
-        statements = schema_sql.split(';')
-        for statement in statements:
-            if statement.strip():
-                try:
-                    supabase.db.execute(statement)
-                except Exception as e:
-                    logger.error(f"Error executing statement: {statement}")
-                    logger.error(f"Error details: {str(e)}")
+        # Execute schema migrations in order
+        migrations_dir = os.path.join(base_dir, 'app', 'database', 'migrations')
+        for migration in sorted(f for f in os.listdir(migrations_dir) if f.endswith('.sql')):
+            schema_sql = read_sql_file(os.path.join(migrations_dir, migration))
+            logger.info(f"Executing schema migration {migration}...")
+            
+            # Split the SQL into separate statements and execute each one
+            # (function bodies such as 006's plpgsql keep their semicolons)
+            statements = split_sql_statements(schema_sql)
+            for statement in statements:
+                if statement.strip():
+                    try:
+                        supabase.db.execute(statement)
+                    except Exception as e:
+                        logger.error(f"Error executing statement: {statement}")
+                        logger.error(f"Error details: {str(e)}")
 
         # Insert sample data
         sample_data_path = os.path.join(base_dir, 'app', 'database', 'seeds', 'sample_data.sql')
         sample_data_sql = read_sql_file(sample_data_path)
         logger.info("Inserting sample data...")
         
-        statements = sample_data_sql.split(';')
+        statements = split_sql_statements(sample_data_sql)
         for statement in statements:
             if statement.strip():
                 try:
@@ -0,0 +1,43 @@
+import asyncio
+
+import httpx
+
+from app.auth import deps
+from app.auth.utils import create_access_token
+from app.database.fake_postgrest import InMemoryPostgrest
+from app.database.postgrest import AsyncPostgrestClient
+
+PROFILE = {"id": "u1", "email": "asha@example.com", "full_name": "Asha Rao", "password_hash": "secret"}
+
+
+def test_principal_is_cached_without_secrets(monkeypatch):
+    fake = InMemoryPostgrest({"profiles": [PROFILE]})
+    monkeypatch.setattr(deps, "supabase_client", fake.client())
+    deps.principal_cache.clear()
+    token = create_access_token({"sub": "u1"})
+
+    first = asyncio.run(deps.get_current_user(token))
+    second = asyncio.run(deps.get_current_user(token))
+
+    assert "password_hash" not in first
+    assert second == first
+    assert len(fake.requests) == 1
+
+
+def test_principal_changed_mid_lookup_is_not_cached(monkeypatch):
+    fake = InMemoryPostgrest({"profiles": [PROFILE]})
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        # The profile is updated while this lookup is in flight
+        response = fake.handle(request)
+        deps.invalidate_principal("u1")
+        return response
+
+    client = AsyncPostgrestClient("http://postgrest.test", transport=httpx.MockTransport(handle))
+    monkeypatch.setattr(deps, "supabase_client", client)
+    deps.principal_cache.clear()
+    token = create_access_token({"sub": "u1"})
+
+    asyncio.run(deps.get_current_user(token))
+
+    assert deps.principal_cache.get("u1") is None
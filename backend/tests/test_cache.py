@@ -0,0 +1,33 @@
+from app.services.cache import TTLCache
+
+
+def test_set_skips_values_invalidated_while_computing():
+    cache = TTLCache(maxsize=10, ttl=60)
+    generation = cache.generation()
+    cache.invalidate(["faculty"])
+    cache.set("stale", 1, tags=("faculty",), generation=generation)
+    cache.set("unrelated", 2, tags=("research_works",), generation=generation)
+
+    assert cache.get("stale") is None
+    assert cache.get("unrelated") == 2
+    assert cache.stats()["stale_sets"] == 1
+
+
+def test_set_keeps_values_computed_after_invalidation():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.invalidate(["faculty"])
+    generation = cache.generation()
+    cache.set("fresh", 1, tags=("faculty",), generation=generation)
+
+    assert cache.get("fresh") == 1
+
+
+def test_set_skips_values_once_their_invalidation_was_pruned():
+    cache = TTLCache(maxsize=2, ttl=60)
+    generation = cache.generation()
+    cache.invalidate(["u1"])
+    cache.invalidate(["u2"])
+    cache.invalidate(["u3"])
+    cache.set("u1", 1, tags=("u1",), generation=generation)
+
+    assert cache.get("u1") is None
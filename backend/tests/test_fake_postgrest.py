@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from app.database.fake_postgrest import InMemoryPostgrest
+from app.database.postgrest import PostgrestError
+from app.services import facets
+from app.services.facets import FacetIndex, scan_faculty_facets
+
+FACULTY = [
+    {"id": "1", "name": "Asha Rao", "department": "Computer Science", "institution": "MSRIT",
+     "city": "Bangalore", "expertise": ["Machine Learning"]},
+    {"id": "2", "name": "Vikram Iyer", "department": "Civil Engineering",
+     "institution": "M S Ramaiah Institute of Technology, Bangalore", "city": "Bangalore", "expertise": []},
+    {"id": "3", "name": "Meera Das", "department": "Computer Science, AI", "institution": "Spirit College",
+     "city": "Chennai", "expertise": ["Machine Learning", "Robotics"]}
+]
+
+
+def test_filters_order_and_range():
+    fake = InMemoryPostgrest({"faculty": FACULTY})
+    client = fake.client()
+
+    response = asyncio.run(
+        client.table("faculty")
+        .select("id,name")
+        .in_("department", ["Computer Science", "Computer Science, AI"])
+        .order("name", desc=True)
+        .range(0, 0)
+        .execute()
+    )
+
+    assert response.data == [{"id": "3", "name": "Meera Das"}]
+    # Values with reserved characters are quoted inside in.(...)
+    assert fake.requests[-1].url.params["department"] == 'in.("Computer Science","Computer Science, AI")'
+
+
+def test_single_upsert_and_rpc():
+    fake = InMemoryPostgrest({"faculty": FACULTY})
+    fake.functions["count_faculty"] = lambda params, db: len(db.tables["faculty"])
+    client = fake.client()
+
+    async def run():
+        await client.table("faculty").upsert({"id": "1", "name": "Asha R."}, on_conflict="id").execute()
+        row = await client.table("faculty").select("name").eq("id", "1").single().execute()
+        count = await client.rpc("count_faculty").execute()
+        with pytest.raises(PostgrestError) as missing:
+            await client.rpc("no_such_function").execute()
+        return row, count, missing.value
+
+    row, count, missing = asyncio.run(run())
+
+    assert row.data == {"name": "Asha R."}
+    assert count.data == 3
+    assert missing.status_code == 404
+
+
+def test_facet_index_scans_pages_and_tracks_updates(monkeypatch):
+    monkeypatch.setattr(facets, "FACET_SCAN_PAGE_SIZE", 2)
+    fake = InMemoryPostgrest({"faculty": FACULTY})
+    client = fake.client()
+    index = FacetIndex(["Machine Learning", "Robotics"])
+
+    options, etag = asyncio.run(index.snapshot(lambda: scan_faculty_facets(client)))
+
+    assert len(fake.requests) == 2
+    # Both spellings count under the registered canonical name
+    assert options["counts"]["institutions"] == {"M S Ramaiah Institute of Technology, Bangalore": 2, "Spirit College": 1}
+    assert options["counts"]["domains"] == {"Machine Learning": 2, "Robotics": 1}
+
+    index.update({**FACULTY[2], "city": "Bangalore"})
+    options, new_etag = asyncio.run(index.snapshot(lambda: scan_faculty_facets(client)))
+
+    assert len(fake.requests) == 2
+    assert options["counts"]["cities"] == {"Bangalore": 3}
+    assert new_etag != etag
+
+
+def test_client_reopens_after_close():
+    fake = InMemoryPostgrest({"faculty": [{"id": "1", "name": "Asha Rao"}]})
+    client = fake.client()
+
+    async def run():
+        await client.aclose()
+        return await client.table("faculty").select("name").execute()
+
+    assert asyncio.run(run()).data == [{"name": "Asha Rao"}]
+
+
+def test_facet_index_keeps_updates_made_during_a_rebuild():
+    fake = InMemoryPostgrest({"faculty": FACULTY})
+    client = fake.client()
+    index = FacetIndex(["Machine Learning", "Robotics"], ttl=0)
+
+    async def scan_then_ingest():
+        rows = await scan_faculty_facets(client)
+        # Ingestion writes a new city for faculty 3 after the scan read the row
+        index.update({**FACULTY[2], "city": "Mysore"})
+        return rows
+
+    options, _ = asyncio.run(index.snapshot(scan_then_ingest))
+
+    assert options["counts"]["cities"] == {"Bangalore": 2, "Mysore": 1}
@@ -0,0 +1,39 @@
+import asyncio
+
+from app.database.fake_postgrest import InMemoryPostgrest
+from app.routes import search
+from app.services.cache import search_cache
+from app.services.ingestion import FacultyIngestion
+
+
+def test_ingestion_flush_and_search(monkeypatch):
+    fake = InMemoryPostgrest()
+    client = fake.client()
+    monkeypatch.setattr(search, "supabase", client)
+    search_cache.clear()
+
+    async def run():
+        ingestion = FacultyIngestion(client, embeddings=False, neighbors=False, trends=False)
+        ingestion.add({
+            "name": "Asha Rao",
+            "department": "Computer Science",
+            "profile_url": "https://irins.example/profile/1",
+            "publications": [{"title": "Graph neural networks", "year": 2022, "research_domains": ["Machine Learning"]}]
+        })
+        ingestion.add({
+            "name": "Vikram Iyer",
+            "department": "Civil Engineering",
+            "profile_url": "https://irins.example/profile/2",
+            "publications": [{"title": "Seismic retrofitting", "year": 2021, "research_domains": ["Civil Engineering"]}]
+        })
+        await ingestion.flush()
+        results = await search.search_faculty(search.SearchQuery(query="computer", mode="ilike", limit=5))
+        return ingestion, results
+
+    ingestion, results = asyncio.run(run())
+
+    assert len(fake.tables["faculty"]) == 2
+    assert len(fake.tables["publications"]) == 2
+    assert len(fake.tables["faculty_publications"]) == 2
+    assert ingestion.rows_failed == 0
+    assert [r["name"] for r in results["results"]] == ["Asha Rao"]
@@ -0,0 +1,12 @@
+from app.services.institutions import InstitutionRegistry
+
+REGISTRY = InstitutionRegistry([{"name": "RIT Bangalore", "aliases": ["msrit", "ramaiah institute of technology"]}])
+
+
+def test_spellings_of_one_institution_share_a_key():
+    assert REGISTRY.filter_keys(["MSRIT", "Ramaiah Institute of Technology", "RIT, Bangalore"]) == ["rit bangalore"]
+
+
+def test_unregistered_names_key_on_whole_normalized_name():
+    assert REGISTRY.institution_key("Spirit College") == "spirit college"
+    assert REGISTRY.filter_keys(["100%_Institute", ""]) == ["100 institute"]
@@ -0,0 +1,49 @@
+import asyncio
+import threading
+
+from app.ml.scheduler import InferenceScheduler, SchedulerStopped
+
+
+async def outcome(future):
+    try:
+        return await future
+    except Exception as e:
+        return e
+
+
+def test_batches_requests_and_restarts_after_stop():
+    scheduler = InferenceScheduler(lambda items: [item * 2 for item in items], max_wait_ms=5)
+
+    async def run():
+        first = await scheduler.submit_many([1, 2, 3])
+        await scheduler.stop()
+        return first, await scheduler.submit(4)
+
+    assert asyncio.run(run()) == ([2, 4, 6], 8)
+    asyncio.run(scheduler.stop())
+
+
+def test_callers_on_a_stopped_loop_fail_instead_of_hanging():
+    release = threading.Event()
+    scheduler = InferenceScheduler(lambda items: [release.wait() and item for item in items], max_wait_ms=1)
+    old_loop = asyncio.new_event_loop()
+    threading.Thread(target=old_loop.run_forever, daemon=True).start()
+
+    async def queue_two():
+        running = await scheduler.enqueue("running")
+        await asyncio.sleep(0.05)
+        return running, await scheduler.enqueue("waiting")
+
+    running, waiting = asyncio.run_coroutine_threadsafe(queue_two(), old_loop).result(5)
+    # A new loop takes over with one batch in flight and one item queued on
+    # the old one; the in-flight batch finishes once the takeover is done
+    threading.Timer(0.2, release.set).start()
+
+    async def restart():
+        return await scheduler.submit("next")
+
+    assert asyncio.run(restart()) == "next"
+    assert isinstance(asyncio.run_coroutine_threadsafe(outcome(running), old_loop).result(5), SchedulerStopped)
+    assert isinstance(asyncio.run_coroutine_threadsafe(outcome(waiting), old_loop).result(5), SchedulerStopped)
+    asyncio.run(scheduler.stop())
+    old_loop.call_soon_threadsafe(old_loop.stop)